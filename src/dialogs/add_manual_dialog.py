@@ -4,7 +4,6 @@
 
 import logging
 import os
-import shutil
 from datetime import date, datetime
 from gettext import gettext as _
 from gettext import pgettext as C_
@@ -22,6 +21,7 @@ from ..models.language_model import LanguageModel
 from ..models.movie_model import MovieModel
 from ..models.season_model import SeasonModel
 from ..models.series_model import SeriesModel
+from ..providers.image_store import ImageStore
 from ..providers.local_provider import LocalProvider as local
 from ..widgets.season_expander import SeasonExpander
 
@@ -354,8 +354,7 @@ class AddManualDialog(Adw.Window):
         """
 
         poster_uri = self._copy_image_to_data(self._poster.get_uri(),
-                                              shared.poster_dir,
-                                              self._title_entry.get_text()
+                                              shared.poster_dir
                                               ) if not self.edit_mode else self._content.poster_path  # type: ignore
 
         if self._movies_btn.get_active():
@@ -370,8 +369,6 @@ class AddManualDialog(Adw.Window):
                      activity: BackgroundActivity):
         """Callback to complete async activity"""
 
-        self.get_ancestor(Adw.Window).get_transient_for(
-        ).activate_action('win.refresh', None)
         activity.end()
 
     def _save_movie(self, poster_uri: str) -> None:
@@ -429,8 +426,9 @@ class AddManualDialog(Adw.Window):
         """
 
         show_id = local.get_next_manual_series()
-        base_season_id = local.get_next_manual_season()
-        base_episode_id = local.get_next_manual_episode()
+        base_season_id = local.get_next_manual_season(count=max(len(self.seasons), 1))
+        base_episode_id = local.get_next_manual_episode(
+            count=max(sum(len(season[2]) for season in self.seasons), 1))
 
         seasons = []
         for idx, season in enumerate(self.seasons):
@@ -442,16 +440,14 @@ class AddManualDialog(Adw.Window):
 
             # Copy the season poster
             poster_uri = self._copy_image_to_data(season[1],
-                                                  f'{shared.series_dir}/{show_id}/{self._increment_manual_id(base_season_id, idx)}',
-                                                  season[0])
+                                                  f'{shared.series_dir}/{show_id}/{self._increment_manual_id(base_season_id, idx)}')
 
             episodes = []
             for jdx, episode in enumerate(season[2]):
 
                 # Copy the episode still
                 still_uri = self._copy_image_to_data(episode[4],
-                                                     f'{shared.series_dir}/{show_id}/{self._increment_manual_id(base_season_id, idx)}',
-                                                     episode[0]
+                                                     f'{shared.series_dir}/{show_id}/{self._increment_manual_id(base_season_id, idx)}'
                                                      )
                 episode_id = self._increment_manual_id(base_episode_id, jdx)
                 season_number = idx+1
@@ -470,7 +466,7 @@ class AddManualDialog(Adw.Window):
                 )))
 
             base_episode_id = self._increment_manual_id(
-                base_episode_id, len(episodes)+1)
+                base_episode_id, len(episodes))
             season_id = self._increment_manual_id(base_season_id, idx)
             season_number = idx+1
 
@@ -552,26 +548,21 @@ class AddManualDialog(Adw.Window):
                 num += 1
         return num
 
-    def _copy_image_to_data(self, src_uri: str, dest_folder: str, filename: str) -> str:
+    def _copy_image_to_data(self, src_uri: str, dest_folder: str) -> str:
         """
-        Copies src_uri to dest_folder as filename. If src_uri is a resource (empty poster/still) the operation is not
-        carried out.
-        dest_folder must already exist on file system.
+        Copies src_uri to dest_folder, named after the hash of its content. If the same image is already in
+        dest_folder it is reused. If src_uri is a resource (empty poster/still) the operation is not carried out.
 
         Args:
             src_uri (str): source file uri
             dest_folder (str): path to the destination folder
-            filename (str): new name for the copied file
 
         Returns:
             uri of the copied file or src_uri if is a resource.
         """
 
         if src_uri.startswith('file'):
-            extension = src_uri[src_uri.rindex('.'):]
-            shutil.copy2(
-                src_uri[7:], f'{dest_folder}/{unquote(filename)}{extension}')
-            return f'file://{dest_folder}/{unquote(filename)}{extension}'
+            return ImageStore.import_file(unquote(src_uri[7:]), dest_folder)
         return src_uri
 
     def update_seasons_ui(self) -> None:
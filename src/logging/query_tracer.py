@@ -0,0 +1,229 @@
+# Copyright (C) 2023 Alessandro Iepure
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import contextlib
+import logging
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+
+class QueryTracer:
+    """
+    This class collects statistics about the statements run on the local db.
+    Every statement is attributed to the method that ran it, and the ones slower than the threshold are written to a
+    dedicated slow-query log. Tracing is enabled by opening connections with connection_factory, plain connections
+    are not affected in any way.
+
+    Properties:
+        threshold (float): duration, in seconds, above which a statement is logged as slow
+
+    Methods:
+        connection_factory(): Returns the sqlite3.Connection subclass to open traced connections with
+        record(sql: str, method: str, duration: float, rows: int): Accounts for a completed statement
+        get_stats(): Returns the counters aggregated per method
+        log_stats(): Writes the counters aggregated per method to the log
+    """
+
+    def __init__(self, threshold_ms: int, slow_log: Path):
+        self.threshold = threshold_ms / 1000
+        self._lock = threading.Lock()
+        self._stats: Dict[str, List] = {}
+
+        self._slow_logger = logging.getLogger('ticketbooth.db.slow')
+        self._slow_logger.setLevel(logging.INFO)
+        self._slow_logger.propagate = False
+        if not self._slow_logger.handlers:
+            handler = logging.FileHandler(slow_log, encoding='utf-8', delay=True)
+            handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
+            self._slow_logger.addHandler(handler)
+
+    def connection_factory(self) -> type:
+        """
+        Returns the sqlite3.Connection subclass to pass as factory to sqlite3.connect() to trace a connection.
+
+        Args:
+            None
+
+        Returns:
+            a subclass of TracingConnection bound to self
+        """
+
+        return type('BoundTracingConnection', (TracingConnection,), {'tracer': self})
+
+    def record(self, sql: str, method: str, duration: float, rows: int) -> None:
+        """
+        Accounts for a completed statement, logging it if slower than the threshold.
+
+        Args:
+            sql (str): the statement
+            method (str): name of the method that ran the statement
+            duration (float): time spent running the statement and fetching its rows, in seconds
+            rows (int): number of rows returned or modified
+
+        Returns:
+            None
+        """
+
+        with self._lock:
+            stats = self._stats.setdefault(method, [0, 0.0, 0, 0.0])
+            stats[0] += 1
+            stats[1] += duration
+            stats[2] += rows
+            stats[3] = max(stats[3], duration)
+
+        if duration >= self.threshold:
+            self._slow_logger.warning('%.1f ms, %d rows, %s: %s',
+                                      duration * 1000, rows, method, ' '.join(sql.split()))
+
+    def get_stats(self) -> Dict[str, Tuple[int, float, int, float]]:
+        """
+        Returns the counters aggregated per method.
+
+        Args:
+            None
+
+        Returns:
+            dict mapping the method name to a tuple with the number of statements, the total duration, the total
+            number of rows and the longest duration (durations in seconds)
+        """
+
+        with self._lock:
+            return {method: tuple(stats) for method, stats in self._stats.items()}  # type: ignore
+
+    def log_stats(self) -> None:
+        """
+        Writes the counters aggregated per method to the log, slowest first.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+
+        stats = sorted(self.get_stats().items(), key=lambda item: item[1][1], reverse=True)
+        for method, (count, total, rows, longest) in stats:
+            logging.info('[db] %s: %d statements, %.1f ms total, %.1f ms max, %d rows',
+                         method, count, total * 1000, longest * 1000, rows)
+
+
+# Frames in these files are skipped when looking for the method that ran a statement
+_INTERNAL_FILES = {__file__, contextlib.__file__}
+
+
+def _calling_method() -> str:
+    """
+    Finds the name of the method that ran the statement being traced.
+
+    Args:
+        None
+
+    Returns:
+        the qualified name of the method
+    """
+
+    frame = sys._getframe(1)
+    while frame.f_back is not None and frame.f_code.co_filename in _INTERNAL_FILES:
+        frame = frame.f_back
+    return getattr(frame.f_code, 'co_qualname', frame.f_code.co_name)
+
+
+class TracingCursor(sqlite3.Cursor):
+    """
+    A cursor reporting every statement it runs to the tracer of its connection.
+    The time spent fetching the rows of a query is added to the statement, which is reported once the rows are
+    exhausted, another statement is run, or the cursor is closed.
+    """
+
+    _pending: List | None = None
+
+    def _flush(self) -> None:
+        if self._pending is not None:
+            self.connection.tracer.record(*self._pending)  # type: ignore
+            self._pending = None
+
+    def _start(self, sql: str, started: float) -> None:
+        duration = time.perf_counter() - started
+        if self.description is None:
+            self.connection.tracer.record(sql, _calling_method(), duration, max(self.rowcount, 0))  # type: ignore
+        else:
+            self._pending = [sql, _calling_method(), duration, 0]
+
+    def _fetched(self, started: float, rows: int, done: bool) -> None:
+        if self._pending is not None:
+            self._pending[2] += time.perf_counter() - started
+            self._pending[3] += rows
+            if done:
+                self._flush()
+
+    def execute(self, sql, parameters=()):
+        self._flush()
+        started = time.perf_counter()
+        super().execute(sql, parameters)
+        self._start(sql, started)
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._flush()
+        started = time.perf_counter()
+        super().executemany(sql, seq_of_parameters)
+        self._start(sql, started)
+        return self
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(started, row is not None, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = super().fetchmany(size if size is not None else self.arraysize)
+        self._fetched(started, len(rows), not rows)
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(started, len(rows), True)
+        return rows
+
+    def __next__(self):
+        started = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(started, 0, True)
+            raise
+        self._fetched(started, 1, False)
+        return row
+
+    def close(self):
+        self._flush()
+        super().close()
+
+    def __del__(self):
+        self._flush()
+
+
+class TracingConnection(sqlite3.Connection):
+    """
+    A connection whose statements, including the ones run through the execute() shortcuts, go through a
+    TracingCursor. Use QueryTracer.connection_factory() to get a subclass bound to a tracer.
+    """
+
+    tracer: QueryTracer
+
+    def cursor(self, factory=TracingCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
@@ -2,15 +2,12 @@
 #
 # SPDX-License-Identifier: GPL-3.0-or-later
 
-import glob
-import os
 import re
 
-import requests
 from gi.repository import GObject
-from PIL import Image
 
 from .. import shared  # type: ignore
+from ..providers.image_store import ImageStore
 
 
 class EpisodeModel(GObject.GObject):
@@ -47,7 +44,7 @@ class EpisodeModel(GObject.GObject):
     title = GObject.Property(type=str, default='')
     watched = GObject.Property(type=bool, default=False)
 
-    def __init__(self, d=None, t=None):
+    def __init__(self, d=None, t=None, download_images: bool = True):
         super().__init__()
 
         if d is not None:
@@ -57,7 +54,8 @@ class EpisodeModel(GObject.GObject):
             self.runtime = d['runtime'] if d['runtime'] else 0
             self.season_number = d['season_number']
             self.show_id = d['show_id']
-            self.still_path = self._download_still(d['still_path'])
+            # The TMDB path is kept when not downloading, the caller replaces it with the result of _download_still
+            self.still_path = self._download_still(d['still_path']) if download_images else d['still_path'] or ''
             self.title = d['name']
             self.watched = False
         else:
@@ -85,28 +83,6 @@ class EpisodeModel(GObject.GObject):
         if not path:
             return f'resource://{shared.PREFIX}/blank_still.jpg'
 
-        if not os.path.exists(f'{shared.series_dir}/{self.show_id}/{self.season_number}'):
-            os.makedirs(
-                f'{shared.series_dir}/{self.show_id}/{self.season_number}')
-
-        files = glob.glob(
-            f'{path[1:-4]}.jpg', root_dir=f'{shared.series_dir}/{self.show_id}/{self.season_number}')
-        if files:
-            return f'file://{shared.series_dir}/{self.show_id}/{self.season_number}/{files[0]}'
-
-        url = f'https://image.tmdb.org/t/p/w500{path}'
-        try:
-            r = requests.get(url)
-            if r.status_code == 200:
-                with open(f'{shared.series_dir}/{self.show_id}/{self.season_number}{path}', 'wb') as f:
-                    f.write(r.content)
-
-                with Image.open(f'{shared.series_dir}/{self.show_id}/{self.season_number}{path}') as img:
-                    img = img.resize((500, 281))
-                    img.save(
-                        f'{shared.series_dir}/{self.show_id}/{self.season_number}{path}', 'JPEG')
-                return f'file://{shared.series_dir}/{self.show_id}/{self.season_number}{path}'
-            else:
-                return f'resource://{shared.PREFIX}/blank_still.jpg'
-        except (requests.exceptions.ConnectionError, requests.exceptions.SSLError):
-            return f'resource://{shared.PREFIX}/blank_still.jpg'
+        uri = ImageStore.fetch(f'{shared.series_dir}/{self.show_id}/{self.season_number}', path,
+                               process=ImageStore.resize_still)
+        return uri if uri else f'resource://{shared.PREFIX}/blank_still.jpg'
@@ -2,19 +2,17 @@
 #
 # SPDX-License-Identifier: GPL-3.0-or-later
 
-import glob
 import re
 from datetime import datetime
 from typing import List
 
-import requests
 from gi.repository import GLib, GObject
-from PIL import Image, ImageFilter
 
 import src.providers.local_provider as local
 
 from .. import shared  # type: ignore
 from ..models.language_model import LanguageModel
+from ..providers.image_store import ImageStore
 
 
 class MovieModel(GObject.GObject):
@@ -149,30 +147,8 @@ class MovieModel(GObject.GObject):
         if not path:
             return ''
 
-        files = glob.glob(f'{path[1:-4]}.jpg', root_dir=shared.background_dir)
-        if files:
-            return f'file://{shared.background_dir}/{files[0]}'
-
-        url = f'https://image.tmdb.org/t/p/w500{path}'
-        try:
-            r = requests.get(url)
-            if r.status_code == 200:
-                with open(f'{shared.background_dir}{path}', 'wb') as f:
-                    f.write(r.content)
-
-                with Image.open(f'{shared.background_dir}{path}') as image:
-                    image = (
-                        image.convert('RGB')
-                        .filter(ImageFilter.GaussianBlur(20))
-                    )
-
-                    image.save(f'{shared.background_dir}{path}', 'JPEG')
-
-                return f'file://{shared.background_dir}{path}'
-            else:
-                return ''
-        except (requests.exceptions.ConnectionError, requests.exceptions.SSLError):
-            return ''
+        uri = ImageStore.fetch(shared.background_dir, path, process=ImageStore.blur_background)
+        return uri if uri else ''
 
     def _download_poster(self, path: str) -> str:
         """
@@ -188,18 +164,5 @@ class MovieModel(GObject.GObject):
         if not path:
             return f'resource://{shared.PREFIX}/blank_poster.jpg'
 
-        files = glob.glob(f'{path[1:-4]}.jpg', root_dir=shared.poster_dir)
-        if files:
-            return f'file://{shared.poster_dir}/{files[0]}'
-
-        url = f'https://image.tmdb.org/t/p/w500{path}'
-        try:
-            r = requests.get(url)
-            if r.status_code == 200:
-                with open(f'{shared.poster_dir}{path}', 'wb') as f:
-                    f.write(r.content)
-                return f'file://{shared.poster_dir}{path}'
-            else:
-                return f'resource://{shared.PREFIX}/blank_poster.jpg'
-        except (requests.exceptions.ConnectionError, requests.exceptions.SSLError):
-            return f'resource://{shared.PREFIX}/blank_poster.jpg'
+        uri = ImageStore.fetch(shared.poster_dir, path)
+        return uri if uri else f'resource://{shared.PREFIX}/blank_poster.jpg'
@@ -2,12 +2,9 @@
 #
 # SPDX-License-Identifier: GPL-3.0-or-later
 
-import glob
-import os
 import re
 from typing import List
 
-import requests
 from gi.repository import GObject
 
 import src.providers.local_provider as local
@@ -15,6 +12,7 @@ import src.providers.tmdb_provider as tmdb
 
 from .. import shared  # type: ignore
 from ..models.episode_model import EpisodeModel
+from ..providers.image_store import ImageStore
 
 
 class SeasonModel(GObject.GObject):
@@ -22,7 +20,7 @@ class SeasonModel(GObject.GObject):
     This class represents a season object stored in the db.
 
     Properties:
-        episodes (List[EpisodeModel]): list of episodes in self
+        episodes (List[EpisodeModel]): list of episodes in self, loaded from the db on first access if not provided
         episodes_number (int): number of episodes in self
         id (str): season id
         number (int): season number
@@ -40,7 +38,6 @@ class SeasonModel(GObject.GObject):
 
     __gtype_name__ = 'SeasonModel'
 
-    episodes = GObject.Property(type=object)
     episodes_number = GObject.Property(type=int, default=0)
     id = GObject.Property(type=str, default='')
     number = GObject.Property(type=int, default=0)
@@ -49,6 +46,19 @@ class SeasonModel(GObject.GObject):
     show_id = GObject.Property(type=str, default='')
     title = GObject.Property(type=str, default='')
 
+    _episodes = None
+
+    @GObject.Property(type=object)
+    def episodes(self) -> List[EpisodeModel]:
+        if self._episodes is None:
+            self._episodes = local.LocalProvider.get_season_episodes(
+                self.show_id, self.number)  # type: ignore
+        return self._episodes
+
+    @episodes.setter
+    def episodes(self, value: List[EpisodeModel]) -> None:
+        self._episodes = value
+
     def __eq__(self, other) -> bool:
         """
         Custom comparing fuction, overrides '==' operator.
@@ -74,7 +84,7 @@ class SeasonModel(GObject.GObject):
         else:
             return False
 
-    def __init__(self, show_id: int = 0, d=None, t=None):
+    def __init__(self, show_id: int = 0, d=None, t=None, download_images: bool = True):
         super().__init__()
 
         if d is not None:
@@ -82,12 +92,15 @@ class SeasonModel(GObject.GObject):
             self.id = d['id']
             self.number = d['season_number']
             self.overview = re.sub(r'\s{2}', ' ', d['overview'])
-            self.poster_path = self._download_poster(show_id, d['poster_path'])
+            # The TMDB paths are kept when not downloading, the caller replaces them with the downloaded images
+            self.poster_path = (self._download_poster(show_id, d['poster_path']) if download_images
+                                else d['poster_path'] or '')
             self.title = d['name']
             self.show_id = show_id
 
-            self.episodes = self._parse_episodes(
-                tmdb.TMDBProvider.get_season_episodes(show_id, self.number))
+            # Episodes are already in the dict when the tv series was fetched with get_serie_with_seasons
+            episodes = d['episodes'] if 'episodes' in d else tmdb.TMDBProvider.get_season_episodes(show_id, self.number)
+            self.episodes = self._parse_episodes(episodes, download_images)
         else:
             self.episodes_number = t[0]  # type: ignore
             self.id = t[1]  # type: ignore
@@ -99,9 +112,6 @@ class SeasonModel(GObject.GObject):
 
             if len(t) == 8:  # type: ignore
                 self.episodes = t[7]    # type: ignore
-            else:
-                self.episodes = local.LocalProvider.get_season_episodes(
-                    self.show_id, self.number)  # type: ignore
 
     def _download_poster(self, show_id: int, path: str) -> str:
         """
@@ -117,32 +127,16 @@ class SeasonModel(GObject.GObject):
         if not path:
             return f'resource://{shared.PREFIX}/blank_poster.jpg'
 
-        if not os.path.exists(f'{shared.series_dir}/{show_id}/{self.number}'):
-            os.makedirs(f'{shared.series_dir}/{show_id}/{self.number}')
-
-        files = glob.glob(
-            f'{path[1:-4]}.jpg', root_dir=f'{shared.series_dir}/{show_id}/{self.number}')
-        if files:
-            return f'file://{shared.series_dir}/{show_id}/{self.number}/{files[0]}'
-
-        url = f'https://image.tmdb.org/t/p/w500{path}'
-        try:
-            r = requests.get(url)
-            if r.status_code == 200:
-                with open(f'{shared.series_dir}/{show_id}/{self.number}{path}', 'wb') as f:
-                    f.write(r.content)
-                return f'file://{shared.series_dir}/{show_id}/{self.number}{path}'
-            else:
-                return f'resource://{shared.PREFIX}/blank_poster.jpg'
-        except (requests.exceptions.ConnectionError, requests.exceptions.SSLError):
-            return f'resource://{shared.PREFIX}/blank_poster.jpg'
+        uri = ImageStore.fetch(f'{shared.series_dir}/{show_id}/{self.number}', path)
+        return uri if uri else f'resource://{shared.PREFIX}/blank_poster.jpg'
 
-    def _parse_episodes(self, episodes: dict) -> List[EpisodeModel]:
+    def _parse_episodes(self, episodes: dict, download_images: bool = True) -> List[EpisodeModel]:
         """
         Parses episode data comming from tmdb into a list of EpisodeModels.
 
         Args:
             episodes (dict): dict from the api
+            download_images (bool): whether the episodes download their stills
 
         Returns:
             List of EpisodeModels
@@ -151,5 +145,5 @@ class SeasonModel(GObject.GObject):
         episode_list = []
 
         for episode in episodes:
-            episode_list.append(EpisodeModel(d=episode))
+            episode_list.append(EpisodeModel(d=episode, download_images=download_images))
         return episode_list
@@ -2,20 +2,20 @@
 #
 # SPDX-License-Identifier: GPL-3.0-or-later
 
-import glob
 import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import List
 
-import requests
 from gi.repository import GLib, GObject
-from PIL import Image, ImageFilter
 
 import src.providers.local_provider as local
 
 from .. import shared  # type: ignore
 from ..models.language_model import LanguageModel
 from ..models.season_model import SeasonModel
+from ..providers.http_session import HttpSession
+from ..providers.image_store import ImageStore
 
 
 class SeriesModel(GObject.GObject):
@@ -37,7 +37,7 @@ class SeriesModel(GObject.GObject):
         poster_path (str): uri of the poster image
         release_date (str): first air date in YYYY-MM-DD format
         seasons_number (int): number of total seasons
-        seasons (List[SeasonModel]): list of SeasonModels
+        seasons (List[SeasonModel]): list of SeasonModels, loaded from the db on first access if not provided
         status (str): series status
         tagline (str): series tagline
         title (str): series title
@@ -66,18 +66,28 @@ class SeriesModel(GObject.GObject):
     poster_path = GObject.Property(type=str, default='')
     release_date = GObject.Property(type=str, default='')
     seasons_number = GObject.Property(type=int, default=0)
-    seasons = GObject.Property(type=object)
     status = GObject.Property(type=str, default='')
     tagline = GObject.Property(type=str, default='')
     title = GObject.Property(type=str, default='')
     watched = GObject.Property(type=bool, default=False)
 
+    _seasons = None
+
+    @GObject.Property(type=object)
+    def seasons(self) -> List[SeasonModel]:
+        if self._seasons is None:
+            self._seasons = local.LocalProvider.get_all_seasons(self.id)  # type: ignore
+        return self._seasons
+
+    @seasons.setter
+    def seasons(self, value: List[SeasonModel]) -> None:
+        self._seasons = value
+
     def __init__(self, d=None, t=None):
         super().__init__()
 
         if d is not None:
             self.add_date = datetime.now()
-            self.backdrop_path = self._download_background(d['backdrop_path'])
             self.created_by = self._parse_creators(api_dict=d['created_by'])
             self.episodes_number = d['number_of_episodes']
             self.genres = self._parse_genres(api_dict=d['genres'])
@@ -88,7 +98,6 @@ class SeriesModel(GObject.GObject):
                 d['original_language'])  # type: ignore
             self.original_title = d['original_name']
             self.overview = re.sub(r'\s{2}', ' ', d['overview'])
-            self.poster_path = self._download_poster(d['poster_path'])
             self.release_date = d['first_air_date']
             self.seasons_number = d['number_of_seasons']
             self.seasons = self._parse_seasons(d['seasons'])
@@ -96,6 +105,7 @@ class SeriesModel(GObject.GObject):
             self.tagline = d['tagline']
             self.title = d['name']
             self.watched = False
+            self._download_images(d['poster_path'], d['backdrop_path'])
         else:
             self.add_date = t[0]  # type: ignore
             self.backdrop_path = t[1]  # type: ignore
@@ -119,9 +129,6 @@ class SeriesModel(GObject.GObject):
 
             if len(t) == 19:  # type: ignore
                 self.seasons = t[18]  # type: ignore
-            else:
-                self.seasons = local.LocalProvider.get_all_seasons(
-                    self.id)  # type: ignore
 
     def _parse_genres(self, api_dict: dict = {}, db_str: str = '') -> List[str]:
         """
@@ -186,9 +193,35 @@ class SeriesModel(GObject.GObject):
         seasons = []
 
         for season in api_dict:
-            seasons.append(SeasonModel(show_id=self.id, d=season))
+            seasons.append(SeasonModel(show_id=self.id, d=season, download_images=False))
         return seasons
 
+    def _download_images(self, poster_path: str, backdrop_path: str) -> None:
+        """
+        Downloads the poster and background of self and the posters and stills of its seasons, in parallel, replacing
+        the TMDB paths left in the seasons and episodes with the uris of the downloaded images.
+
+        Args:
+            poster_path (str): TMDB path of the poster
+            backdrop_path (str): TMDB path of the background
+
+        Returns:
+            None
+        """
+
+        jobs = [(self, 'poster_path', self._download_poster, poster_path),
+                (self, 'backdrop_path', self._download_background, backdrop_path)]
+        for season in self.seasons:
+            jobs.append((season, 'poster_path', lambda path, season=season: season._download_poster(self.id, path),
+                         season.poster_path))
+            jobs += [(episode, 'still_path', episode._download_still, episode.still_path)
+                     for episode in season.episodes]
+
+        with ThreadPoolExecutor(max_workers=HttpSession.POOL_SIZE, thread_name_prefix='images') as pool:
+            results = [pool.submit(download, path) for model, name, download, path in jobs]
+            for (model, name, download, path), result in zip(jobs, results):
+                setattr(model, name, result.result())
+
     def _download_background(self, path: str) -> str:
         """
         Returns the uri of the background image on the local filesystem, downloading if necessary.
@@ -203,30 +236,8 @@ class SeriesModel(GObject.GObject):
         if not path:
             return ''
 
-        files = glob.glob(f'{path[1:-4]}.jpg', root_dir=shared.background_dir)
-        if files:
-            return f'file://{shared.background_dir}/{files[0]}'
-
-        url = f'https://image.tmdb.org/t/p/w500{path}'
-        try:
-            r = requests.get(url)
-            if r.status_code == 200:
-                with open(f'{shared.background_dir}{path}', 'wb') as f:
-                    f.write(r.content)
-
-                with Image.open(f'{shared.background_dir}{path}') as image:
-                    image = (
-                        image.convert('RGB')
-                        .filter(ImageFilter.GaussianBlur(20))
-                    )
-
-                    image.save(f'{shared.background_dir}{path}', 'JPEG')
-
-                return f'file://{shared.background_dir}{path}'
-            else:
-                return ''
-        except (requests.exceptions.ConnectionError, requests.exceptions.SSLError):
-            return ''
+        uri = ImageStore.fetch(shared.background_dir, path, process=ImageStore.blur_background)
+        return uri if uri else ''
 
     def _download_poster(self, path: str) -> str:
         """
@@ -242,18 +253,5 @@ class SeriesModel(GObject.GObject):
         if not path:
             return f'resource://{shared.PREFIX}/blank_poster.jpg'
 
-        files = glob.glob(f'{path[1:-4]}.jpg', root_dir=shared.poster_dir)
-        if files:
-            return f'file://{shared.poster_dir}/{files[0]}'
-
-        url = f'https://image.tmdb.org/t/p/w500{path}'
-        try:
-            r = requests.get(url)
-            if r.status_code == 200:
-                with open(f'{shared.poster_dir}{path}', 'wb') as f:
-                    f.write(r.content)
-                return f'file://{shared.poster_dir}{path}'
-            else:
-                return f'resource://{shared.PREFIX}/blank_poster.jpg'
-        except (requests.exceptions.ConnectionError, requests.exceptions.SSLError):
-            return f'resource://{shared.PREFIX}/blank_poster.jpg'
+        uri = ImageStore.fetch(shared.poster_dir, path)
+        return uri if uri else f'resource://{shared.PREFIX}/blank_poster.jpg'
@@ -0,0 +1,35 @@
+# Copyright (C) 2023 Alessandro Iepure
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from typing import NamedTuple
+
+
+class SummaryModel(NamedTuple):
+    """
+    This class represents the few fields of a movie or tv series needed to show it in the library grid.
+    Full models are loaded from the db only when the details are opened.
+
+    Properties:
+        id (str): content id
+        title (str): content title
+        release_date (str): release date in YYYY-MM-DD format
+        poster_path (str): uri of the poster image
+        watched (bool): whether the content has been watched
+        add_date (str): date of addition to the db (ISO format)
+        media_type (str): 'movie' or 'series'
+
+    Methods:
+        None
+
+    Signals:
+        None
+    """
+
+    id: str
+    title: str
+    release_date: str
+    poster_path: str
+    watched: bool
+    add_date: str
+    media_type: str
@@ -9,7 +9,7 @@ from gettext import ngettext
 from gettext import pgettext as C_
 from typing import List, Tuple
 
-from gi.repository import Adw, Gio, GObject, Gtk
+from gi.repository import Adw, Gio, GLib, GObject, Gtk
 from PIL import Image, ImageStat
 
 from .. import shared  # type: ignore
@@ -19,6 +19,7 @@ from ..dialogs.add_manual_dialog import AddManualDialog
 from ..models.movie_model import MovieModel
 from ..models.season_model import SeasonModel
 from ..models.series_model import SeriesModel
+from ..models.summary_model import SummaryModel
 from ..providers.local_provider import LocalProvider as local
 from ..providers.tmdb_provider import TMDBProvider as tmdb
 from ..widgets.episode_row import EpisodeRow
@@ -31,7 +32,7 @@ class DetailsView(Adw.NavigationPage):
     Widget that represents the details view.
 
     Properties:
-        content (MovieModel or SeriesModel): content associated to the information shown
+        content (MovieModel or SeriesModel): content associated to the information shown, fully loaded from the db
 
     Methods:
         None
@@ -60,6 +61,7 @@ class DetailsView(Adw.NavigationPage):
     _chip1_lbl = Gtk.Template.Child()
     _chip2_lbl = Gtk.Template.Child()
     _chip3_lbl = Gtk.Template.Child()
+    _progress_lbl = Gtk.Template.Child()
     _watched_btn = Gtk.Template.Child()
     _btn_content = Gtk.Template.Child()
     _edit_btn = Gtk.Template.Child()
@@ -73,22 +75,67 @@ class DetailsView(Adw.NavigationPage):
     _additional_info_box = Gtk.Template.Child()
     _flow_box = Gtk.Template.Child()
     _loading_lbl = Gtk.Template.Child()
+    _error_status_page = Gtk.Template.Child()
 
-    def __init__(self, content: MovieModel | SeriesModel):
+    def __init__(self, content: MovieModel | SeriesModel | SummaryModel):
         super().__init__()
 
         # Theme switcher (Adapted from https://gitlab.gnome.org/tijder/blueprintgtk/)
         self._menu_btn.get_popover().add_child(ThemeSwitcher(), 'themeswitcher')
 
-        if type(content) is MovieModel:
-            self.content = local.get_movie_by_id(content.id)
+        if type(content) is SummaryModel:
+            is_movie = content.media_type == 'movie'
         else:
-            self.content = local.get_series_by_id(content.id)
+            is_movie = type(content) is MovieModel
+
         logging.info(
-            f'Loading info [{"movie" if type(content) is MovieModel else "TV Serie"}] {self.content.title}')
+            f'Loading info [{"movie" if is_movie else "TV Serie"}] {content.title}')
 
-        self.set_title(self.content.title)  # type: ignore
+        # Replaced by the full model once loaded
+        self.content = content
+        self.set_title(content.title)  # type: ignore
         self._view_stack.set_visible_child_name('loading')
+        self._episode_rows = []
+        self._season_btns = {}
+        self._changes_handler = None
+        self._toast_overlay = None
+
+        if is_movie:
+            local.get_movie_by_id_async(content.id, self._on_content_loaded)
+        else:
+            local.get_series_by_id_async(content.id, self._on_content_loaded, prefetch=True)
+
+        self.connect('map', self._on_map)
+        self.connect('unmap', self._on_unmap)
+
+    def _on_content_loaded(self, source: GObject.Object | None, result: Gio.AsyncResult) -> None:
+        """
+        Callback for the async load of the content.
+        Populates the widgets with the loaded content, or shows an error if it could not be loaded.
+
+        Args:
+            source (GObject.Object or None): object that started the async operation
+            result (Gio.AsyncResult): result of the async load
+
+        Returns:
+            None
+        """
+
+        try:
+            content = local.read_finish(result)
+        except GLib.Error as error:
+            logging.error('Loading info failed: %s', error.message)
+            self._error_status_page.set_description(_('An error occurred while reading the library.'))
+            self._view_stack.set_visible_child_name('error')
+            return
+
+        if content is None:
+            logging.error(f'Loading info failed: {self.content.id} not in the library')  # type: ignore
+            self._error_status_page.set_description(_('The title is no longer in the library.'))
+            self._view_stack.set_visible_child_name('error')
+            return
+
+        self.content = content
         self._populate_data()
 
     def _populate_data(self) -> None:
@@ -148,16 +195,11 @@ class DetailsView(Adw.NavigationPage):
             self._description_box.set_visible(True)
             self._overview_lbl.set_label(self.content.overview)  # type: ignore
 
+        self._watched_btn.set_visible(True)
+        self._set_watched_btn(self._btn_content, self.content.watched)  # type: ignore
+
         # Movie specific
         if type(self.content) is MovieModel:
-            self._watched_btn.set_visible(True)
-            if self.content.watched:
-                self._btn_content.set_label(_('Watched'))
-                self._btn_content.set_icon_name('check-plain')
-            else:
-                self._btn_content.set_label(_('Mark as Watched'))
-                self._btn_content.set_icon_name('watchlist')
-
             if self.content.runtime:
                 self._chip2_lbl.set_visible(True)
                 self._chip2_lbl.set_text(
@@ -187,6 +229,7 @@ class DetailsView(Adw.NavigationPage):
 
             self._seasons_box.set_visible(True)
             self._build_seasons_group()
+            self._update_progress()
 
         self._build_flow_box()
         self._view_stack.set_visible_child_name('filled')
@@ -206,6 +249,7 @@ class DetailsView(Adw.NavigationPage):
         list_box.remove_all()
 
         self._episode_rows = []
+        self._season_btns = {}
         for season in self.content.seasons:  # type: ignore
             season_row = Adw.ExpanderRow(title=season.title,
                                          subtitle=ngettext('{num} Episode'.format(num=season.episodes_number),
@@ -225,21 +269,13 @@ class DetailsView(Adw.NavigationPage):
             button = Gtk.Button(valign=Gtk.Align.CENTER)
             btn_content = Adw.ButtonContent()
 
-            if all(episode.watched for episode in season.episodes):
-                btn_content.set_label(_('Watched'))
-                btn_content.set_icon_name('check-plain')
-            else:
-                btn_content.set_label(_('Mark as Watched'))
-                btn_content.set_icon_name('watchlist')
-
             button.set_child(btn_content)
+            self._season_btns[season.number] = btn_content
             season_row.add_suffix(button)
 
             tmp = []
             for episode in season.episodes:
                 episode_row = EpisodeRow(episode)
-                episode_row.connect(
-                    'watched-clicked', self._on_episode_watch_clicked, (btn_content, season))
                 season_row.add_row(episode_row)
                 tmp.append(episode_row)
 
@@ -249,48 +285,146 @@ class DetailsView(Adw.NavigationPage):
             button.connect('clicked', self._on_season_watched_clicked,
                            (btn_content, season, self._episode_rows))
 
-    def _on_episode_watch_clicked(self,
-                                  source: Gtk.Widget,
-                                  data: Tuple[Adw.ButtonContent, SeasonModel]) -> None:
+    def _update_progress(self) -> None:
         """
-        Callback for "watched-clicked" signal.
-        Called after an episode is (un)marked as watched, checks and updates, if needed, the watched button for the corresponding season.
+        Loads in the background how many episodes of the tv series and of each of its seasons have been watched, to
+        update the progress and the watched buttons.
 
         Args:
-            source (Gtk.Widget): caller widget
-            data(tuple[Adw.ButtonContent, SeasonModel]): tuple with the Adw.ButtonContent to change and the SeasonModel
-                parent of the changed episode
+            None
 
         Returns:
             None
         """
 
-        self.content = local.get_series_by_id(self.content.id)  # type: ignore
+        local.get_progress_async(self.content.id, self._on_progress_loaded)  # type: ignore
+        local.get_seasons_progress_async(self.content.id, self._on_seasons_progress_loaded)  # type: ignore
 
-        btn_content = data[0]
-        season_idx = 0
-        for idx, season in enumerate(self.content.seasons):  # type: ignore
-            if season == data[1]:
-                season_idx = idx
+    def _on_progress_loaded(self, source: GObject.Object | None, result: Gio.AsyncResult) -> None:
+        """
+        Callback for the async load of the progress of the tv series.
+        Shows how many episodes have been watched, and updates the watched button of the series accordingly.
+
+        Args:
+            source (GObject.Object or None): object that started the async operation
+            result (Gio.AsyncResult): result of the async load
+
+        Returns:
+            None
+        """
+
+        try:
+            watched, total = local.read_finish(result)
+        except GLib.Error as error:
+            logging.error('Loading progress failed: %s', error.message)
+            return
+
+        self._progress_lbl.set_visible(total > 0)
+        # TRANSLATORS: {watched} is the number of watched episodes, {total} the number of episodes
+        self._progress_lbl.set_text(_('{watched}/{total} watched').format(watched=watched, total=total))
+
+        if total > 0:
+            self.content.watched = watched == total  # type: ignore
+            self._set_watched_btn(self._btn_content, self.content.watched)  # type: ignore
+
+    def _on_seasons_progress_loaded(self, source: GObject.Object | None, result: Gio.AsyncResult) -> None:
+        """
+        Callback for the async load of the progress of the seasons.
+        Updates the watched buttons of the seasons.
+
+        Args:
+            source (GObject.Object or None): object that started the async operation
+            result (Gio.AsyncResult): result of the async load
+
+        Returns:
+            None
+        """
+
+        try:
+            seasons_progress = local.read_finish(result)
+        except GLib.Error as error:
+            logging.error('Loading seasons progress failed: %s', error.message)
+            return
+
+        for number, btn_content in self._season_btns.items():
+            watched, total = seasons_progress.get(number, (0, 0))
+            self._set_watched_btn(btn_content, watched == total)
+
+    def _on_map(self, user_data: object | None) -> None:
+        """
+        Callback for the "map" signal.
+        Starts following the changes made to the library, catching up with the ones made while hidden.
+
+        Args:
+            user_data (object or None): additional data passed to the callback
+
+        Returns:
+            None
+        """
+
+        if self._changes_handler is None:
+            self._changes_handler = local.changes.connect('watched-changed', self._on_watched_changed)
+        if type(self.content) is SeriesModel:
+            self._update_progress()
+
+    def _on_unmap(self, user_data: object | None) -> None:
+        """
+        Callback for the "unmap" signal.
+        Stops following the changes made to the library.
+
+        Args:
+            user_data (object or None): additional data passed to the callback
+
+        Returns:
+            None
+        """
+
+        if self._changes_handler is not None:
+            local.changes.disconnect(self._changes_handler)
+            self._changes_handler = None
+
+    def _on_watched_changed(self, source: GObject.Object, media_type: str, ids: list) -> None:
+        """
+        Callback for the "watched-changed" signal of LocalProvider.changes.
+        Updates the progress and the watched buttons if the change involves the content shown.
 
-        if all(episode.watched for episode in self.content.seasons[season_idx].episodes):
+        Args:
+            source (GObject.Object): the ChangeNotifier
+            media_type (str): media type of the changed titles
+            ids (list): ids of the changed titles
+
+        Returns:
+            None
+        """
+
+        if type(self.content) is SeriesModel and media_type == 'series' and str(self.content.id) in ids:
+            self._update_progress()
+
+    def _set_watched_btn(self, btn_content: Adw.ButtonContent, watched: bool) -> None:
+        """
+        Updates the label and icon of a watched button, either the content's one or a season's one.
+
+        Args:
+            btn_content (Adw.ButtonContent): content of the button to change
+            watched (bool): whether the content or season is watched
+
+        Returns:
+            None
+        """
+
+        if watched:
             btn_content.set_label(_('Watched'))
             btn_content.set_icon_name('check-plain')
         else:
             btn_content.set_label(_('Mark as Watched'))
             btn_content.set_icon_name('watchlist')
 
-        # Update season status
-        local.mark_watched_series(self.content.id, all(
-            episode.watched for season in self.content.seasons for episode in season.episodes))  # type: ignore
-        self.activate_action('win.refresh', None)
-
     def _on_season_watched_clicked(self,
                                    source: Gtk.Widget,
                                    data: Tuple[Adw.ButtonContent, SeasonModel, List[Tuple[SeasonModel, List[EpisodeRow]]]]) -> None:
         """
         Callback for "clicked" signal.
-        Marks a whole season as (un)watched, making changes in the db and updating the ui.
+        Loads the progress of the season in the background, to then mark it as (un)watched.
 
         Args:
             source (Gtk.Widget): caller widget
@@ -302,42 +436,53 @@ class DetailsView(Adw.NavigationPage):
             None
         """
 
-        self.content = local.get_series_by_id(self.content.id)  # type: ignore
+        local.get_progress_async(self.content.id,  # type: ignore
+                                 lambda source, result: self._on_season_progress_loaded(result, data),
+                                 season_number=data[1].number)
+
+    def _on_season_progress_loaded(self,
+                                   result: Gio.AsyncResult,
+                                   data: Tuple[Adw.ButtonContent, SeasonModel, List[Tuple[SeasonModel, List[EpisodeRow]]]]) -> None:
+        """
+        Callback for the async load of the progress of a season.
+        Marks the whole season as watched, or as unwatched if all its episodes are already watched, making changes in
+        the db and updating the ui.
+
+        Args:
+            result (Gio.AsyncResult): result of the async load
+            data (Tuple[Adw.ButtonContent, SeasonModel, List[Tuple[SeasonModel, List[EpisodeRow]]]]): tuple with the
+                Adw.ButtonContent to change, the SeasonModel of the modified season, and a list of tuples of all
+                SeasonModels and associated EpisodeRows.
+
+        Returns:
+            None
+        """
+
+        try:
+            watched, total = local.read_finish(result)
+        except GLib.Error as error:
+            logging.error('Loading season progress failed: %s', error.message)
+            return
 
         btn_content = data[0]
-        season_idx = 0
-        for idx, season in enumerate(self.content.seasons):  # type: ignore
-            if season == data[1]:
-                season_idx = idx
+        season = data[1]
 
         episode_rows = []
         for item in data[2]:
-            if item[0] == self.content.seasons[season_idx]:  # type: ignore
+            if item[0] == season:
                 episode_rows = item[1]
 
+        new_status = watched != total
+
         # Make changes in db
-        # type: ignore
-        for episode in self.content.seasons[season_idx].episodes:
-            local.mark_watched_episode(episode.id, not all(
-                episode.watched for episode in self.content.seasons[season_idx].episodes))  # type: ignore
+        local.mark_watched_season(self.content.id, season.number, new_status)  # type: ignore
 
         # Update episode rows
         for episode_row in episode_rows:
-            episode_row.set_watched_btn(
-                not all(episode.watched for episode in self.content.seasons[season_idx].episodes))  # type: ignore
+            episode_row.set_watched_btn(new_status)
 
-        # Update season expander
-        if not all(episode.watched for episode in self.content.seasons[season_idx].episodes):
-            btn_content.set_label(_('Watched'))
-            btn_content.set_icon_name('check-plain')
-        else:
-            btn_content.set_label(_('Mark as Watched'))
-            btn_content.set_icon_name('watchlist')
-
-        # Update season status
-        local.mark_watched_series(self.content.id, not all(  # type: ignore
-            episode.watched for season in self.content.seasons for episode in season.episodes))  # type: ignore
-        self.activate_action('win.refresh', None)
+        # Update season expander, the progress is updated once the change is published
+        self._set_watched_btn(btn_content, new_status)
 
     def _build_flow_box(self) -> None:
         """
@@ -460,17 +605,14 @@ class DetailsView(Adw.NavigationPage):
 
         if type(self.content) is MovieModel:
             local.mark_watched_movie(self.content.id, not self.content.watched)
-
-        self.content.watched = not self.content.watched  # type: ignore
-
-        if self.content.watched:
-            self._btn_content.set_label(_('Watched'))
-            self._btn_content.set_icon_name('check-plain')
         else:
-            self._btn_content.set_label(_('Mark as Watched'))
-            self._btn_content.set_icon_name('watchlist')
+            local.mark_watched_series_episodes(self.content.id, not self.content.watched)  # type: ignore
+            for season, episode_rows in self._episode_rows:
+                for episode_row in episode_rows:
+                    episode_row.set_watched_btn(not self.content.watched)  # type: ignore
 
-        self.activate_action('win.refresh', None)
+        self.content.watched = not self.content.watched  # type: ignore
+        self._set_watched_btn(self._btn_content, self.content.watched)  # type: ignore
 
     @Gtk.Template.Callback('_on_edit_btn_clicked')
     def _on_edit_btn_clicked(self, user_data: object | None) -> None:
@@ -553,7 +695,7 @@ class DetailsView(Adw.NavigationPage):
             self.new_content = MovieModel(tmdb.get_movie(self.content.id))
             local.update_movie(old=self.content, new=self.new_content)
         else:
-            self.new_content = SeriesModel(tmdb.get_serie(self.content.id))
+            self.new_content = SeriesModel(tmdb.get_serie_with_seasons(self.content.id))
             local.update_series(old=self.content, new=self.new_content)
             
 
@@ -600,6 +742,7 @@ class DetailsView(Adw.NavigationPage):
         """
         Callback for the message dialog.
         Finishes the async operation and retrieves the user response. If the later is positive, adds a background activity to delete the content.
+        The delete can be undone from the toast shown once done.
 
         Args:
             source (Gtk.Widget): object that started the async operation
@@ -615,6 +758,7 @@ class DetailsView(Adw.NavigationPage):
             logging.debug('Delete dialog: cancel, aborting')
             return
 
+        self._toast_overlay = self.get_ancestor(Adw.ToastOverlay)
         self.get_ancestor(Adw.NavigationView).pop()
         logging.debug(f'Delete dialog: confim, delete {self.content.title}')
         BackgroundQueue.add(
@@ -650,3 +794,31 @@ class DetailsView(Adw.NavigationPage):
 
         self.emit('deleted')
         activity.end()
+
+        if self._toast_overlay is None:
+            return
+
+        # TRANSLATORS: {title} is the content's title
+        toast = Adw.Toast.new(_('{title} deleted').format(title=self.content.title))
+        toast.set_button_label(_('_Undo'))
+        toast.set_use_markup(False)
+        toast.set_timeout(10)
+        toast.connect('button-clicked', self._on_undo_clicked)
+        self._toast_overlay.add_toast(toast)
+
+    def _on_undo_clicked(self, source: Adw.Toast) -> None:
+        """
+        Callback for the "button-clicked" signal.
+        Restores the deleted content.
+
+        Args:
+            source (Adw.Toast): toast that emitted the signal
+
+        Returns:
+            None
+        """
+
+        media_type = 'movie' if type(self.content) is MovieModel else 'series'
+        logging.debug(f'Undo delete {self.content.title}')
+        if not local.undo_delete(media_type, self.content.id):
+            self._toast_overlay.add_toast(Adw.Toast.new(_('The title could not be restored')))
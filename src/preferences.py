@@ -5,6 +5,8 @@
 import glob
 import logging
 import os
+import sqlite3
+from datetime import datetime
 from gettext import gettext as _
 from gettext import pgettext as C_
 from pathlib import Path
@@ -16,6 +18,8 @@ from requests import HTTPError
 from . import shared  # type: ignore
 from .background_queue import ActivityType, BackgroundActivity, BackgroundQueue
 from .models.language_model import LanguageModel
+from .providers.image_store import ImageStore
+from .providers.library_archive import LibraryArchive
 from .providers.local_provider import LocalProvider as local
 from .providers.tmdb_provider import TMDBProvider as tmdb
 
@@ -37,6 +41,13 @@ class PreferencesWindow(Adw.PreferencesWindow):
     _exit_cache_switch = Gtk.Template.Child()
     _cache_row = Gtk.Template.Child()
     _data_row = Gtk.Template.Child()
+    _maintenance_row = Gtk.Template.Child()
+    _library_group = Gtk.Template.Child()
+    _export_row = Gtk.Template.Child()
+    _import_row = Gtk.Template.Child()
+    _import_images_switch = Gtk.Template.Child()
+    _backup_row = Gtk.Template.Child()
+    _restore_row = Gtk.Template.Child()
 
     def __init__(self):
         super().__init__()
@@ -51,6 +62,8 @@ class PreferencesWindow(Adw.PreferencesWindow):
                            'visible', Gio.SettingsBindFlags.INVERT_BOOLEAN)
         shared.schema.bind('onboard-complete', self._tmdb_group,
                            'sensitive', Gio.SettingsBindFlags.DEFAULT)
+        shared.schema.bind('onboard-complete', self._library_group,
+                           'sensitive', Gio.SettingsBindFlags.DEFAULT)
 
         shared.schema.bind('offline-mode', self._offline_switch,
                            'active', Gio.SettingsBindFlags.DEFAULT)
@@ -168,14 +181,14 @@ class PreferencesWindow(Adw.PreferencesWindow):
             int with the index
         """
 
-        for idx, language in enumerate(local.get_all_languages()):
+        for idx, language in enumerate(local.get_language_registry().languages):
             if language.iso_name == iso_name:
                 return idx
         return 37
 
     def _get_selected_language(self, name: str) -> str:
         """
-        Loops all available languages and returns the iso name of the one with the specified name. If a result is not found, it returns the iso name for English (en).
+        Looks up the language with the specified name and returns its iso name. If a result is not found, it returns the iso name for English (en).
 
         Args:
             name: a language's name
@@ -184,10 +197,8 @@ class PreferencesWindow(Adw.PreferencesWindow):
             str with the iso name
         """
 
-        for language in local.get_all_languages():
-            if language.name == name:
-                return language.iso_name
-        return 'en'
+        language = local.get_language_by_name(name)
+        return language.iso_name if language else 'en'
 
     @Gtk.Template.Callback('_on_download_activate')
     def _on_download_activate(self, user_data: object | None) -> None:
@@ -334,6 +345,7 @@ class PreferencesWindow(Adw.PreferencesWindow):
         for file in files:
             os.remove(shared.cache_dir / file)
             logging.debug(f'Deleted {shared.cache_dir / file}')
+        ImageStore.forget(shared.cache_dir)
 
     def _on_cache_clear_done(self,
                              source: GObject.Object,
@@ -367,9 +379,9 @@ class PreferencesWindow(Adw.PreferencesWindow):
 
         # TRANSLATORS: {number} is the number of titles
         _movies_row.set_subtitle(_('{number} Titles').format(
-            number=len(local.get_all_movies())))
+            number=len(local.get_movie_summaries())))
         _series_row.set_subtitle(_('{number} Titles').format(
-            number=len(local.get_all_series())))
+            number=len(local.get_series_summaries())))
 
         _clear_data_dialog.set_transient_for(self)
         _clear_data_dialog.choose(
@@ -433,9 +445,8 @@ class PreferencesWindow(Adw.PreferencesWindow):
         """
 
         logging.info('Deleting all movies')
-        for movie in local.get_all_movies():    # type: ignore
-            local.delete_movie(movie.id)
-            logging.debug(f'Deleted ({movie.id}) {movie.title}')
+        count = local.delete_all_movies()
+        logging.debug(f'Deleted {count} movies')
 
     def _on_data_clear_done(self,
                             source: GObject.Object,
@@ -445,7 +456,6 @@ class PreferencesWindow(Adw.PreferencesWindow):
         """Callback to complete async activity"""
 
         self._update_occupied_space()
-        self.get_transient_for().activate_action('win.refresh', None)
         activity.end()
 
     def _clear_series(self, activity: BackgroundActivity) -> None:
@@ -460,9 +470,414 @@ class PreferencesWindow(Adw.PreferencesWindow):
         """
 
         logging.info('Deleting all TV series')
-        for serie in local.get_all_series():    # type: ignore
-            local.delete_series(serie.id)
-            logging.debug(f'Deleted ({serie.id}) {serie.title}')
+        count = local.delete_all_series()
+        logging.debug(f'Deleted {count} TV series')
+
+    @Gtk.Template.Callback('_on_maintenance_activate')
+    def _on_maintenance_activate(self, user_data: object | None) -> None:
+        """
+        Callback for "activated" signal.
+        Adds a background activity to run the db maintenance.
+
+        Args:
+            user_data (object or None): additional data passed to the callback
+
+        Returns:
+            None
+        """
+
+        self._maintenance_row.set_sensitive(False)
+        BackgroundQueue.add(
+            activity=BackgroundActivity(
+                activity_type=ActivityType.UPDATE,
+                title=C_('Background activity title', 'Optimize database'),
+                task_function=self._run_maintenance),
+            on_done=self._on_maintenance_done)
+
+    def _run_maintenance(self, activity: BackgroundActivity) -> None:
+        """
+        Runs the db maintenance.
+
+        Args:
+            activity (BackgroundActivity): the calling activity
+
+        Returns:
+            None
+        """
+
+        logging.info('Running database maintenance')
+        try:
+            self._maintenance_report = local.run_maintenance()
+        except (OSError, sqlite3.Error) as error:
+            logging.error('Database maintenance failed: %s', error)
+            self._maintenance_report = None
+
+    def _on_maintenance_done(self,
+                             source: GObject.Object,
+                             result: Gio.AsyncResult,
+                             cancellable: Gio.Cancellable,
+                             activity: BackgroundActivity):
+        """Callback to complete async activity"""
+
+        report = self._maintenance_report
+        shared.schema.set_string('last-maintenance', datetime.now().strftime('%Y-%m-%d'))
+
+        if report is None:
+            self._maintenance_row.set_subtitle(_('Optimization failed'))
+            activity.error()
+        elif report['integrity_ok']:
+            # TRANSLATORS: {space:.2f} is the reclaimed space, {seconds:.1f} the time taken
+            self._maintenance_row.set_subtitle(_('{space:.2f} MB reclaimed in {seconds:.1f} seconds').format(
+                space=max(report['bytes_reclaimed'], 0)/1024.0/1024.0, seconds=report['seconds']))
+        else:
+            self._maintenance_row.set_subtitle(_('The library is damaged, space was not reclaimed'))
+            activity.error()
+
+        self._maintenance_row.set_sensitive(True)
+        self._update_occupied_space()
+        activity.end()
+
+    @Gtk.Template.Callback('_on_export_activate')
+    def _on_export_activate(self, user_data: object | None) -> None:
+        """
+        Callback for "activated" signal.
+        Asks the user where to save the library export.
+
+        Args:
+            user_data (object or None): additional data passed to the callback
+
+        Returns:
+            None
+        """
+
+        dialog = Gtk.FileDialog.new()
+        dialog.set_modal(True)
+        dialog.set_initial_name(f'ticketbooth-library-{datetime.now().strftime("%Y-%m-%d")}.jsonl')
+        dialog.save(self, None, self._on_export_file_chosen, None)
+
+    def _on_export_file_chosen(self,
+                               source: Gtk.FileDialog,
+                               result: Gio.AsyncResult,
+                               user_data: object | None) -> None:
+        """
+        Callback for the file dialog.
+        Adds a background activity to export the library to the chosen file.
+
+        Args:
+            source (Gtk.FileDialog): the file dialog
+            result (Gio.AsyncResult): a Gio.AsyncResult
+            user_data (object or None): additional data passed to the callback
+
+        Returns:
+            None
+        """
+
+        try:
+            file = source.save_finish(result)
+        except GLib.GError:
+            file = None
+
+        if not file:
+            logging.debug('Export dialog: cancel, aborting')
+            return
+
+        self._archive_path = Path(file.get_path())
+        self._archive_error = None
+        BackgroundQueue.add(
+            activity=BackgroundActivity(
+                activity_type=ActivityType.UPDATE,
+                title=C_('Background activity title', 'Export library'),
+                task_function=self._export_library),
+            on_done=self._on_export_done)
+
+    def _export_library(self, activity: BackgroundActivity) -> None:
+        """
+        Exports the library.
+
+        Args:
+            activity (BackgroundActivity): the calling activity
+
+        Returns:
+            None
+        """
+
+        try:
+            self._archive_count = LibraryArchive.export_library(self._archive_path)
+        except OSError as error:
+            logging.error('Export to %s failed: %s', self._archive_path, error)
+            self._archive_error = error
+
+    def _on_export_done(self,
+                        source: GObject.Object,
+                        result: Gio.AsyncResult,
+                        cancellable: Gio.Cancellable,
+                        activity: BackgroundActivity):
+        """Callback to complete async activity"""
+
+        if self._archive_error:
+            self._export_row.set_subtitle(_('Export failed'))
+            activity.error()
+        else:
+            # TRANSLATORS: {number} is the number of titles
+            self._export_row.set_subtitle(_('{number} Titles exported').format(number=self._archive_count))
+        activity.end()
+
+    @Gtk.Template.Callback('_on_import_activate')
+    def _on_import_activate(self, user_data: object | None) -> None:
+        """
+        Callback for "activated" signal.
+        Asks the user for the library export to import.
+
+        Args:
+            user_data (object or None): additional data passed to the callback
+
+        Returns:
+            None
+        """
+
+        file_filter_store = Gio.ListStore.new(Gtk.FileFilter)
+        file_filter = Gtk.FileFilter()
+        file_filter.set_name(_('Library exports'))
+        file_filter.add_pattern('*.jsonl')
+        file_filter_store.append(file_filter)
+
+        dialog = Gtk.FileDialog.new()
+        dialog.set_modal(True)
+        dialog.set_filters(file_filter_store)
+        dialog.open(self, None, self._on_import_file_chosen, None)
+
+    def _on_import_file_chosen(self,
+                               source: Gtk.FileDialog,
+                               result: Gio.AsyncResult,
+                               user_data: object | None) -> None:
+        """
+        Callback for the file dialog.
+        Adds a background activity to import the chosen file.
+
+        Args:
+            source (Gtk.FileDialog): the file dialog
+            result (Gio.AsyncResult): a Gio.AsyncResult
+            user_data (object or None): additional data passed to the callback
+
+        Returns:
+            None
+        """
+
+        try:
+            file = source.open_finish(result)
+        except GLib.GError:
+            file = None
+
+        if not file:
+            logging.debug('Import dialog: cancel, aborting')
+            return
+
+        self._archive_path = Path(file.get_path())
+        self._archive_error = None
+        self._import_download_images = self._import_images_switch.get_active()
+        BackgroundQueue.add(
+            activity=BackgroundActivity(
+                activity_type=ActivityType.ADD,
+                title=C_('Background activity title', 'Import library'),
+                task_function=self._import_library),
+            on_done=self._on_import_done)
+
+    def _import_library(self, activity: BackgroundActivity) -> None:
+        """
+        Imports a library export.
+
+        Args:
+            activity (BackgroundActivity): the calling activity
+
+        Returns:
+            None
+        """
+
+        try:
+            self._archive_count = LibraryArchive.import_library(self._archive_path, self._import_download_images)
+        except (OSError, ValueError, KeyError, sqlite3.Error) as error:
+            logging.error('Import from %s failed: %s', self._archive_path, error)
+            self._archive_error = error
+
+    def _on_import_done(self,
+                        source: GObject.Object,
+                        result: Gio.AsyncResult,
+                        cancellable: Gio.Cancellable,
+                        activity: BackgroundActivity):
+        """Callback to complete async activity"""
+
+        if self._archive_error:
+            self._import_row.set_subtitle(_('Import failed'))
+            activity.error()
+        else:
+            # TRANSLATORS: {number} is the number of titles
+            self._import_row.set_subtitle(_('{number} Titles imported').format(number=self._archive_count))
+        self._update_occupied_space()
+        activity.end()
+
+    @Gtk.Template.Callback('_on_backup_activate')
+    def _on_backup_activate(self, user_data: object | None) -> None:
+        """
+        Callback for "activated" signal.
+        Adds a background activity to save a backup of the library.
+
+        Args:
+            user_data (object or None): additional data passed to the callback
+
+        Returns:
+            None
+        """
+
+        self._backup_row.set_sensitive(False)
+        BackgroundQueue.add(
+            activity=BackgroundActivity(
+                activity_type=ActivityType.UPDATE,
+                title=C_('Background activity title', 'Back up library'),
+                task_function=self._backup_library),
+            on_done=self._on_backup_done)
+
+    def _backup_library(self, activity: BackgroundActivity) -> None:
+        """
+        Saves a backup of the library.
+
+        Args:
+            activity (BackgroundActivity): the calling activity
+
+        Returns:
+            None
+        """
+
+        self._backup_error = None
+        try:
+            local.backup(keep=shared.schema.get_int('backup-keep'))
+        except (OSError, sqlite3.Error) as error:
+            logging.error('Backup failed: %s', error)
+            self._backup_error = error
+
+    def _on_backup_done(self,
+                        source: GObject.Object,
+                        result: Gio.AsyncResult,
+                        cancellable: Gio.Cancellable,
+                        activity: BackgroundActivity):
+        """Callback to complete async activity"""
+
+        if self._backup_error:
+            self._backup_row.set_subtitle(_('Backup failed'))
+            activity.error()
+        else:
+            self._backup_row.set_subtitle(_('Backup saved'))
+        self._backup_row.set_sensitive(True)
+        self._update_occupied_space()
+        activity.end()
+
+    @Gtk.Template.Callback('_on_restore_activate')
+    def _on_restore_activate(self, user_data: object | None) -> None:
+        """
+        Callback for "activated" signal.
+        Shows a dialog to choose the backup to restore.
+
+        Args:
+            user_data (object or None): additional data passed to the callback
+
+        Returns:
+            None
+        """
+
+        logging.debug('Show restore backup dialog')
+        builder = Gtk.Builder.new_from_resource(
+            shared.PREFIX + '/ui/dialogs/message_dialogs.ui')
+        _restore_backup_dialog = builder.get_object('_restore_backup_dialog')
+        _backups_list = builder.get_object('_backups_list')
+
+        self._backup_checkbtns = {}
+        group = None
+        for backup in local.get_backups():
+            stat = backup.stat()
+            checkbtn = Gtk.CheckButton(group=group, active=group is None)
+            group = group or checkbtn
+            row = Adw.ActionRow(title=datetime.fromtimestamp(stat.st_mtime).strftime('%c'),
+                                # TRANSLATORS: {space:.2f} is the size of the backup
+                                subtitle=_('{space:.2f} MB').format(space=stat.st_size/1024.0/1024.0),
+                                activatable_widget=checkbtn)
+            row.add_prefix(checkbtn)
+            _backups_list.append(row)
+            self._backup_checkbtns[backup] = checkbtn
+
+        if not self._backup_checkbtns:
+            _backups_list.append(Adw.ActionRow(title=_('No backups yet')))
+            _restore_backup_dialog.set_response_enabled('restore_confirm', False)
+
+        _restore_backup_dialog.set_transient_for(self)
+        _restore_backup_dialog.choose(
+            None, self._on_restore_message_dialog_choose, None)
+
+    def _on_restore_message_dialog_choose(self,
+                                          source: GObject.Object | None,
+                                          result: Gio.AsyncResult,
+                                          user_data: object | None) -> None:
+        """
+        Callback for the message dialog.
+        Finishes the async operation and retrieves the user response. If the later is positive, adds a background
+        activity to restore the selected backup.
+
+        Args:
+            source (Gtk.Widget): object that started the async operation
+            result (Gio.AsyncResult): a Gio.AsyncResult
+            user_data (object or None): additional data passed to the callback
+
+        Returns:
+            None
+        """
+
+        result = Adw.MessageDialog.choose_finish(source, result)
+        if result == 'restore_cancel':
+            logging.debug('Restore backup dialog: cancel, aborting')
+            return
+
+        self._restore_path = next(backup for backup, checkbtn in self._backup_checkbtns.items()
+                                  if checkbtn.get_active())
+        logging.debug('Restore backup dialog: %s selected', self._restore_path.name)
+        self._restore_row.set_sensitive(False)
+        BackgroundQueue.add(
+            activity=BackgroundActivity(
+                activity_type=ActivityType.UPDATE,
+                title=C_('Background activity title', 'Restore backup'),
+                task_function=self._restore_backup),
+            on_done=self._on_restore_done)
+
+    def _restore_backup(self, activity: BackgroundActivity) -> None:
+        """
+        Restores the selected backup.
+
+        Args:
+            activity (BackgroundActivity): the calling activity
+
+        Returns:
+            None
+        """
+
+        self._backup_error = None
+        try:
+            local.restore_backup(self._restore_path)
+        except (OSError, ValueError, sqlite3.Error) as error:
+            logging.error('Restore of %s failed: %s', self._restore_path, error)
+            self._backup_error = error
+
+    def _on_restore_done(self,
+                         source: GObject.Object,
+                         result: Gio.AsyncResult,
+                         cancellable: Gio.Cancellable,
+                         activity: BackgroundActivity):
+        """Callback to complete async activity"""
+
+        if self._backup_error:
+            self._restore_row.set_subtitle(_('Restore failed'))
+            activity.error()
+        else:
+            self._restore_row.set_subtitle(_('Backup restored'))
+        self._restore_row.set_sensitive(True)
+        self._update_occupied_space()
+        activity.end()
 
     def _calculate_space(self, directory: Path) -> float:
         """
@@ -0,0 +1,102 @@
+# Copyright (C) 2023 Alessandro Iepure
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import logging
+from typing import Iterable
+
+from gi.repository import GLib, GObject
+
+
+class ChangeNotifier(GObject.GObject):
+    """
+    This class is the hub where LocalProvider publishes the changes made to the library, so views can update only
+    the affected widgets. Signals are always emitted on the main loop, after the transaction that caused them has been
+    committed.
+
+    Properties:
+        None
+
+    Methods:
+        publish(signal: str, media_type: str, ids: Iterable[str]): Schedules the emission of a change signal
+        publish_reload(): Schedules the emission of the reloaded signal
+
+    Signals:
+        inserted(media_type: str, ids: list): titles have been added to the library
+        updated(media_type: str, ids: list): the metadata of titles has changed
+        deleted(media_type: str, ids: list): titles have been removed from the library
+        watched-changed(media_type: str, ids: list): the watched status of titles, or of their episodes, has changed
+        reloaded(): the whole content of the library has been replaced
+    """
+
+    __gtype_name__ = 'ChangeNotifier'
+
+    __gsignals__ = {
+        'inserted': (GObject.SIGNAL_RUN_FIRST, None, (str, object)),
+        'updated': (GObject.SIGNAL_RUN_FIRST, None, (str, object)),
+        'deleted': (GObject.SIGNAL_RUN_FIRST, None, (str, object)),
+        'watched-changed': (GObject.SIGNAL_RUN_FIRST, None, (str, object)),
+        'reloaded': (GObject.SIGNAL_RUN_FIRST, None, ()),
+    }
+
+    def publish(self, signal: str, media_type: str, ids: Iterable[str]) -> None:
+        """
+        Schedules the emission of a change signal on the main loop. Safe to call from any thread.
+
+        Args:
+            signal (str): name of the signal to emit
+            media_type (str): 'movie' or 'series'
+            ids (Iterable[str]): ids of the changed titles
+
+        Returns:
+            None
+        """
+
+        ids = [str(id) for id in ids]
+        if ids:
+            GLib.idle_add(self._emit, signal, media_type, ids)
+
+    def publish_reload(self) -> None:
+        """
+        Schedules the emission of the reloaded signal on the main loop. Safe to call from any thread.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+
+        GLib.idle_add(self._emit_reload)
+
+    def _emit(self, signal: str, media_type: str, ids: list) -> bool:
+        """
+        Emits a change signal, called on the main loop.
+
+        Args:
+            signal (str): name of the signal to emit
+            media_type (str): 'movie' or 'series'
+            ids (list): ids of the changed titles
+
+        Returns:
+            False, to run only once
+        """
+
+        logging.debug('[db] Change %s [%s]: %d titles', signal, media_type, len(ids))
+        self.emit(signal, media_type, ids)
+        return GLib.SOURCE_REMOVE
+
+    def _emit_reload(self) -> bool:
+        """
+        Emits the reloaded signal, called on the main loop.
+
+        Args:
+            None
+
+        Returns:
+            False, to run only once
+        """
+
+        logging.debug('[db] Library reloaded')
+        self.emit('reloaded')
+        return GLib.SOURCE_REMOVE
@@ -0,0 +1,81 @@
+# Copyright (C) 2023 Alessandro Iepure
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .. import shared  # type: ignore
+
+
+class HttpSession:
+    """
+    This class holds the HTTP session shared by the whole app, used for both the TMDB API and image downloads.
+    Connections are kept alive and pooled per host, so consecutive requests to the same server reuse them instead of
+    paying a new TCP and TLS handshake every time.
+
+    Properties:
+        None
+
+    Methods:
+        session(): Returns the shared session, creating it on first use
+        get(url: str): Sends a GET request with the shared session
+    """
+
+    # Connections kept open for each host, enough for the image downloads running in parallel
+    POOL_SIZE = 8
+
+    # Hosts with a pool at the same time, TMDB API and images
+    _POOL_HOSTS = 4
+
+    _session: requests.Session | None = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def session() -> requests.Session:
+        """
+        Returns the shared session, creating it on first use. Safe to call from any thread.
+
+        Args:
+            None
+
+        Returns:
+            requests.Session shared by the app
+        """
+
+        if HttpSession._session is None:
+            with HttpSession._lock:
+                if HttpSession._session is None:
+                    # Rate limits and transient server errors are retried, the last response is returned as is
+                    retry = Retry(total=3,
+                                  backoff_factor=0.5,
+                                  status_forcelist=(429, 500, 502, 503, 504),
+                                  allowed_methods=('GET',),
+                                  raise_on_status=False)
+                    adapter = HTTPAdapter(pool_connections=HttpSession._POOL_HOSTS,
+                                          pool_maxsize=HttpSession.POOL_SIZE,
+                                          max_retries=retry)
+
+                    session = requests.Session()
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    session.headers['User-Agent'] = f'{shared.APP_ID}/{shared.VERSION}'
+                    HttpSession._session = session
+        return HttpSession._session
+
+    @staticmethod
+    def get(url: str) -> requests.Response:
+        """
+        Sends a GET request with the shared session.
+
+        Args:
+            url (str): url to request
+
+        Returns:
+            requests.Response of the request
+        """
+
+        return HttpSession.session().get(url)
@@ -0,0 +1,265 @@
+# Copyright (C) 2023 Alessandro Iepure
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Set
+
+import requests
+from PIL import Image, ImageFilter
+
+from .http_session import HttpSession
+
+
+class ImageStore:
+    """
+    This class stores the images on disk and keeps an in-memory index of the files in each image directory, so
+    checking if an image is already stored does not touch the disk. A directory is listed once, the first time it is
+    used, and the index is kept up to date by the methods writing and removing images.
+    Images from TMDB are stored under their TMDB path, files added by the user under the hash of their content, so
+    the same image is stored once even when used by several titles.
+
+    Properties:
+        None
+
+    Methods:
+        lookup(directory: Path | str, name: str): Returns the uri of a stored image, if present
+        fetch(directory: Path | str, path: str, process: Callable or None): Returns the uri of a TMDB image,
+            downloading it if needed
+        import_file(source: Path | str, directory: Path | str): Stores a local file under the hash of its content
+        discard(path: Path | str): Removes a file from the index
+        forget(directory: Path | str): Drops the index of a directory and of the ones inside it
+        blur_background(path: str): Blurs a downloaded background image in place
+        resize_still(path: str): Resizes a downloaded episode still in place
+    """
+
+    _index: Dict[str, Set[str]] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _names(directory: str) -> Set[str]:
+        """
+        Returns the indexed file names of a directory, listing it if not indexed yet. Must be called with _lock held.
+
+        Args:
+            directory (str): normalized path of the directory
+
+        Returns:
+            set with the names of the files in the directory
+        """
+
+        names = ImageStore._index.get(directory)
+        if names is None:
+            try:
+                with os.scandir(directory) as entries:
+                    names = {entry.name for entry in entries if entry.is_file()}
+            except FileNotFoundError:
+                names = set()
+            ImageStore._index[directory] = names
+        return names
+
+    @staticmethod
+    def lookup(directory: Path | str, name: str) -> str | None:
+        """
+        Returns the uri of an image, if stored in the directory.
+
+        Args:
+            directory (Path or str): directory of the image
+            name (str): file name of the image
+
+        Returns:
+            str with the uri of the image or None if not stored
+        """
+
+        directory = os.path.normpath(directory)
+        with ImageStore._lock:
+            if name in ImageStore._names(directory):
+                return f'file://{directory}/{name}'
+        return None
+
+    @staticmethod
+    def _reuse(uri: str) -> str:
+        """
+        Marks a stored image as just used by updating its modification time, so the garbage collector, which spares
+        recently changed files, does not remove it before the title using it is saved.
+
+        Args:
+            uri (str): uri of the image
+
+        Returns:
+            str with the uri of the image
+        """
+
+        try:
+            os.utime(uri[len('file://'):])
+        except FileNotFoundError:
+            ImageStore.discard(uri[len('file://'):])
+            return ''
+        return uri
+
+    @staticmethod
+    def _add(directory: str, name: str, write: Callable[[str], None]) -> str:
+        """
+        Writes an image with the provided function to a temporary file, then moves it in place and indexes it, so a
+        partially written image is never found by lookup().
+
+        Args:
+            directory (str): normalized path of the directory
+            name (str): file name of the image
+            write (Callable): function writing the image to the path it receives
+
+        Returns:
+            str with the uri of the image
+        """
+
+        os.makedirs(directory, exist_ok=True)
+        descriptor, partial = tempfile.mkstemp(dir=directory, prefix='.', suffix='.part')
+        os.close(descriptor)
+        try:
+            write(partial)
+            os.replace(partial, f'{directory}/{name}')
+        except BaseException:
+            os.remove(partial)
+            raise
+
+        with ImageStore._lock:
+            ImageStore._names(directory).add(name)
+        return f'file://{directory}/{name}'
+
+    @staticmethod
+    def fetch(directory: Path | str, path: str, process: Callable[[str], None] | None = None) -> str | None:
+        """
+        Returns the uri of the image with the provided TMDB path, downloading it to the directory if not stored yet.
+
+        Args:
+            directory (Path or str): directory of the image
+            path (str): TMDB path of the image
+            process (Callable or None): function editing the downloaded image in place, given its file path
+
+        Returns:
+            str with the uri of the image or None if the download failed
+        """
+
+        name = path.lstrip('/')
+        uri = ImageStore.lookup(directory, name)
+        if uri and ImageStore._reuse(uri):
+            return uri
+
+        try:
+            r = HttpSession.get(f'https://image.tmdb.org/t/p/w500{path}')
+        except (requests.exceptions.ConnectionError, requests.exceptions.SSLError):
+            return None
+        if r.status_code != 200:
+            return None
+
+        def write(partial: str) -> None:
+            with open(partial, 'wb') as f:
+                f.write(r.content)
+            if process:
+                process(partial)
+
+        return ImageStore._add(os.path.normpath(directory), name, write)
+
+    @staticmethod
+    def import_file(source: Path | str, directory: Path | str) -> str:
+        """
+        Stores a local file in the directory under the hash of its content, keeping its extension. A file with the
+        same content already in the directory is reused instead of copied again.
+
+        Args:
+            source (Path or str): path of the file to store
+            directory (Path or str): directory to store the file in
+
+        Returns:
+            str with the uri of the stored file
+        """
+
+        digest = hashlib.sha256()
+        with open(source, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        name = f'{digest.hexdigest()[:32]}{os.path.splitext(source)[1].lower()}'
+
+        uri = ImageStore.lookup(directory, name)
+        if uri and ImageStore._reuse(uri):
+            logging.debug('Image %s already stored as %s', source, uri)
+            return uri
+        return ImageStore._add(os.path.normpath(directory), name, lambda partial: shutil.copyfile(source, partial))
+
+    @staticmethod
+    def discard(path: Path | str) -> None:
+        """
+        Removes a file from the index, after it has been deleted from disk.
+
+        Args:
+            path (Path or str): path of the deleted file
+
+        Returns:
+            None
+        """
+
+        directory, name = os.path.split(os.path.normpath(path))
+        with ImageStore._lock:
+            if directory in ImageStore._index:
+                ImageStore._index[directory].discard(name)
+
+    @staticmethod
+    def forget(directory: Path | str) -> None:
+        """
+        Drops the index of a directory and of the ones inside it, after files have been removed from them. They are
+        listed again the next time they are used.
+
+        Args:
+            directory (Path or str): directory to drop
+
+        Returns:
+            None
+        """
+
+        directory = os.path.normpath(directory)
+        with ImageStore._lock:
+            for indexed in [indexed for indexed in ImageStore._index
+                            if indexed == directory or indexed.startswith(f'{directory}{os.sep}')]:
+                del ImageStore._index[indexed]
+
+    @staticmethod
+    def blur_background(path: str) -> None:
+        """
+        Blurs a downloaded background image in place, to be passed as process to fetch().
+
+        Args:
+            path (str): path of the image
+
+        Returns:
+            None
+        """
+
+        with Image.open(path) as image:
+            image = (
+                image.convert('RGB')
+                .filter(ImageFilter.GaussianBlur(20))
+            )
+
+            image.save(path, 'JPEG')
+
+    @staticmethod
+    def resize_still(path: str) -> None:
+        """
+        Resizes a downloaded episode still in place, to be passed as process to fetch().
+
+        Args:
+            path (str): path of the image
+
+        Returns:
+            None
+        """
+
+        with Image.open(path) as img:
+            img = img.resize((500, 281))
+            img.save(path, 'JPEG')
@@ -0,0 +1,301 @@
+# Copyright (C) 2023 Alessandro Iepure
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List
+
+from .. import shared  # type: ignore
+from ..models.episode_model import EpisodeModel
+from ..models.movie_model import MovieModel
+from ..models.season_model import SeasonModel
+from ..models.series_model import SeriesModel
+from ..providers.image_store import ImageStore
+from ..providers.local_provider import LocalProvider as local
+
+
+class LibraryArchive:
+    """
+    This class exports the library to a JSON Lines file and imports it back.
+    The first line of a file is a header, every following line is a title: movies with their columns, tv series with
+    their seasons and episodes nested. Both directions stream the file, holding a batch of titles in memory at most.
+
+    Properties:
+        None
+
+    Methods:
+        export_library(path: Path): Writes all titles in the library to a file
+        import_library(path: Path, download_images: bool): Adds the titles in a file to the library
+    """
+
+    _FORMAT = 'ticketbooth-library'
+    _VERSION = 1
+
+    # Order of the values expected by the t argument of the models
+    _MOVIE_FIELDS = ('add_date', 'backdrop_path', 'budget', 'genres', 'id', 'manual', 'original_language',
+                     'original_title', 'overview', 'poster_path', 'release_date', 'revenue', 'runtime', 'status',
+                     'tagline', 'title', 'watched')
+    _SERIES_FIELDS = ('add_date', 'backdrop_path', 'created_by', 'episodes_number', 'genres', 'id', 'in_production',
+                      'manual', 'original_language', 'original_title', 'overview', 'poster_path', 'release_date',
+                      'seasons_number', 'status', 'tagline', 'title', 'watched')
+    _SEASON_FIELDS = ('episodes_number', 'id', 'number', 'overview', 'poster_path', 'title', 'show_id')
+    _EPISODE_FIELDS = ('id', 'number', 'overview', 'runtime', 'season_number', 'show_id', 'still_path', 'title',
+                       'watched')
+
+    # Imported titles are written to the db in batches of this many titles, or episodes for tv series
+    _BATCH_TITLES = 200
+    _BATCH_EPISODES = 5000
+
+    # Directories of the images inside the data directory
+    _IMAGE_DIRS = ('poster', 'background', 'series')
+
+    @staticmethod
+    def export_library(path: Path) -> int:
+        """
+        Writes all titles in the library, with their seasons, episodes and watched state, to a JSON Lines file.
+        The file is written next to the destination and moved in place once complete.
+
+        Args:
+            path (Path): file to write
+
+        Returns:
+            int with the number of titles written
+        """
+
+        count = 0
+        partial = path.with_name(f'{path.name}.part')
+        with open(partial, 'w', encoding='utf-8') as file:
+            header = {'format': LibraryArchive._FORMAT,
+                      'version': LibraryArchive._VERSION,
+                      'exported': datetime.now().isoformat(timespec='seconds')}
+            file.write(json.dumps(header) + '\n')
+
+            for media_type, title in local.iter_library():
+                file.write(json.dumps({'type': media_type, **title}, ensure_ascii=False, separators=(',', ':')))
+                file.write('\n')
+                count += 1
+        os.replace(partial, path)
+
+        logging.info('Exported %d titles to %s', count, path)
+        return count
+
+    @staticmethod
+    def import_library(path: Path, download_images: bool = True) -> int:
+        """
+        Adds the titles in a file written by export_library() to the library, in batched transactions. Titles from TMDB
+        already in the library, or repeated in the file, are skipped. Manual ids are only meaningful in the library that
+        assigned them, so titles added manually are matched on media type, title and release date instead: the ones
+        already in the library are skipped, the others get new ids, with their seasons and episodes. Images still on disk are reused,
+        the missing ones are downloaded from TMDB if download_images is True and replaced by the placeholders
+        otherwise.
+
+        Args:
+            path (Path): file to read
+            download_images (bool): whether to download the missing images of titles from TMDB
+
+        Returns:
+            int with the number of titles added
+
+        Raises:
+            ValueError: if the file is not a library export
+        """
+
+        summaries = local.get_movie_summaries() + local.get_series_summaries()
+        existing = {(summary.media_type, summary.id) for summary in summaries}
+        existing_manual = {(summary.media_type, summary.title, summary.release_date)
+                           for summary in summaries if summary.id.startswith('M-')}
+
+        movies: List[MovieModel] = []
+        series: List[SeriesModel] = []
+        episodes = 0
+        count = 0
+
+        with open(path, encoding='utf-8') as file:
+            try:
+                header = json.loads(file.readline())
+            except json.JSONDecodeError:
+                header = {}
+            if (not isinstance(header, dict) or header.get('format') != LibraryArchive._FORMAT or
+                    header.get('version', 0) > LibraryArchive._VERSION):
+                raise ValueError(f'{path} is not a library export')
+
+            for line in file:
+                if not line.strip():
+                    continue
+
+                record = json.loads(line)
+                media_type = record.pop('type')
+                if str(record['id']).startswith('M-'):
+                    key = (media_type, record['title'] or '', record['release_date'] or '')
+                    if key in existing_manual:
+                        logging.debug('Skipping %s %s, already in the library', media_type, record['title'])
+                        continue
+                    LibraryArchive._remap_manual_ids(media_type, record)
+                elif (media_type, str(record['id'])) in existing:
+                    continue
+                existing.add((media_type, str(record['id'])))
+
+                if media_type == 'movie':
+                    movies.append(LibraryArchive._build_movie(record, download_images))
+                elif media_type == 'series':
+                    series.append(LibraryArchive._build_series(record, download_images))
+                    episodes += sum(len(season['episodes']) for season in record['seasons'])
+
+                if len(movies) >= LibraryArchive._BATCH_TITLES:
+                    count += local.add_movies_bulk(movies)
+                    movies = []
+                if len(series) >= LibraryArchive._BATCH_TITLES or episodes >= LibraryArchive._BATCH_EPISODES:
+                    count += local.add_series_bulk(series)
+                    series = []
+                    episodes = 0
+
+        if movies:
+            count += local.add_movies_bulk(movies)
+        if series:
+            count += local.add_series_bulk(series)
+        local.sync_id_sequences()
+
+        logging.info('Imported %d titles from %s', count, path)
+        return count
+
+    @staticmethod
+    def _remap_manual_ids(media_type: str, record: dict) -> None:
+        """
+        Replaces the manual ids of an exported title, and of its seasons and episodes, with ids reserved in this
+        library.
+
+        Args:
+            media_type (str): 'movie' or 'series'
+            record (dict): exported title, changed in place
+
+        Returns:
+            None
+        """
+
+        if media_type == 'movie':
+            record['id'] = local.get_next_manual_movie()
+            return
+
+        record['id'] = local.get_next_manual_series()
+        seasons = record['seasons']
+        episodes = [episode for season in seasons for episode in season['episodes']]
+
+        manual_seasons = [season for season in seasons if str(season['id']).startswith('M-')]
+        if manual_seasons:
+            first = int(local.get_next_manual_season(count=len(manual_seasons))[2:])
+            for offset, season in enumerate(manual_seasons):
+                season['id'] = f'M-{first + offset}'
+
+        manual_episodes = [episode for episode in episodes if str(episode['id']).startswith('M-')]
+        if manual_episodes:
+            first = int(local.get_next_manual_episode(count=len(manual_episodes))[2:])
+            for offset, episode in enumerate(manual_episodes):
+                episode['id'] = f'M-{first + offset}'
+
+        for item in [*seasons, *episodes]:
+            item['show_id'] = record['id']
+
+    @staticmethod
+    def _build_movie(record: dict, download_images: bool) -> MovieModel:
+        """
+        Creates a MovieModel from an exported movie, restoring its images.
+
+        Args:
+            record (dict): exported movie
+            download_images (bool): whether to download the missing images
+
+        Returns:
+            MovieModel of the movie
+        """
+
+        movie = MovieModel(t=tuple(record[field] for field in LibraryArchive._MOVIE_FIELDS))
+        download = download_images and not movie.manual
+
+        movie.poster_path = LibraryArchive._restore_image(movie.poster_path,
+                                                          movie._download_poster if download else None,
+                                                          f'resource://{shared.PREFIX}/blank_poster.jpg')
+        movie.backdrop_path = LibraryArchive._restore_image(movie.backdrop_path,
+                                                            movie._download_background if download else None,
+                                                            '')
+        return movie
+
+    @staticmethod
+    def _build_series(record: dict, download_images: bool) -> SeriesModel:
+        """
+        Creates a SeriesModel from an exported tv series, with its seasons and episodes, restoring its images.
+
+        Args:
+            record (dict): exported tv series
+            download_images (bool): whether to download the missing images
+
+        Returns:
+            SeriesModel of the tv series
+        """
+
+        download = download_images and not record['manual']
+
+        seasons = []
+        for season_record in record['seasons']:
+            episodes = []
+            for episode_record in season_record['episodes']:
+                episode = EpisodeModel(t=tuple(episode_record[field] for field in LibraryArchive._EPISODE_FIELDS))
+                episode.still_path = LibraryArchive._restore_image(episode.still_path,
+                                                                   episode._download_still if download else None,
+                                                                   f'resource://{shared.PREFIX}/blank_still.jpg')
+                episodes.append(episode)
+
+            season = SeasonModel(t=tuple(season_record[field] for field in LibraryArchive._SEASON_FIELDS) +
+                                 (episodes,))
+            season.poster_path = LibraryArchive._restore_image(
+                season.poster_path,
+                (lambda path, season=season: season._download_poster(season.show_id, path)) if download else None,
+                f'resource://{shared.PREFIX}/blank_poster.jpg')
+            seasons.append(season)
+
+        serie = SeriesModel(t=tuple(record[field] for field in LibraryArchive._SERIES_FIELDS) + (seasons,))
+        serie.poster_path = LibraryArchive._restore_image(serie.poster_path,
+                                                          serie._download_poster if download else None,
+                                                          f'resource://{shared.PREFIX}/blank_poster.jpg')
+        serie.backdrop_path = LibraryArchive._restore_image(serie.backdrop_path,
+                                                            serie._download_background if download else None,
+                                                            '')
+        return serie
+
+    @staticmethod
+    def _restore_image(uri: str, download: Callable[[str], str] | None, blank: str) -> str:
+        """
+        Finds an exported image on disk, looking in the current data directory too if it was exported from another
+        one, and downloads it if missing.
+
+        Args:
+            uri (str): exported uri of the image
+            download (Callable or None): model method downloading an image given its TMDB path, or None to not
+                download
+            blank (str): uri of the placeholder used when the image is missing and not downloaded
+
+        Returns:
+            str with the uri of the image
+        """
+
+        if not uri.startswith('file://'):
+            return uri
+
+        path = Path(uri[len('file://'):])
+        if ImageStore.lookup(path.parent, path.name):
+            return uri
+
+        parts = path.parts
+        for index in range(len(parts) - 2, -1, -1):
+            if parts[index] in LibraryArchive._IMAGE_DIRS:
+                relocated = ImageStore.lookup(shared.data_dir.joinpath(*parts[index:-1]), path.name)
+                if relocated:
+                    return relocated
+                break
+
+        if download is None:
+            return blank
+        return download(f'/{path.name}')
@@ -2,63 +2,662 @@
 #
 # SPDX-License-Identifier: GPL-3.0-or-later
 
+import hashlib
+import json
 import logging
 import os
-import shutil
+import queue
 import sqlite3
-from typing import List
+import threading
+import time
+from contextlib import closing, contextmanager
+from datetime import datetime
+from pathlib import Path
+from types import MappingProxyType
+from typing import Callable, Dict, Iterable, Iterator, List, Set, Tuple
+
+from gi.repository import Gio, GLib, GObject
 
 from .. import shared  # type: ignore
+from ..logging.query_tracer import QueryTracer
 from ..models.episode_model import EpisodeModel
 from ..models.language_model import LanguageModel
 from ..models.movie_model import MovieModel
 from ..models.season_model import SeasonModel
 from ..models.series_model import SeriesModel
+from ..models.summary_model import SummaryModel
+from ..providers.change_notifier import ChangeNotifier
+from ..providers.image_store import ImageStore
 from ..providers.tmdb_provider import TMDBProvider as tmdb
 
 
+class ConnectionManager:
+    """
+    This class manages the connections to the local db shared by the whole app.
+    Writes go through a single connection serialized by a lock, while reads are served by a pool of connections that,
+    thanks to the WAL journal, never wait for a write in progress.
+
+    Properties:
+        tracer (QueryTracer or None): tracer the connections report to, None if tracing is disabled
+
+    Methods:
+        reader(): Context manager yielding a pooled read-only connection
+        writer(): Context manager yielding the writer connection inside a transaction
+        exclusive(): Context manager yielding the writer connection outside of any transaction
+        after_commit(callback: Callable): Runs a callback once the running transaction is committed
+        close(): Closes all open connections
+    """
+
+    # Connection tuning, applied every time a connection is opened
+    _PRAGMAS = [
+        'PRAGMA journal_mode = WAL;',
+        'PRAGMA synchronous = NORMAL;',
+        'PRAGMA cache_size = -16000;',      # 16 MiB
+        'PRAGMA mmap_size = 268435456;',    # 256 MiB
+        'PRAGMA temp_store = MEMORY;',
+        'PRAGMA foreign_keys = ON;',
+    ]
+
+    # Size of the per-connection prepared statements cache
+    _CACHED_STATEMENTS = 256
+
+    # Idle reader connections kept open for reuse
+    _MAX_IDLE_READERS = 4
+
+    def __init__(self, path: Path, tracer: QueryTracer | None = None):
+        self._path = path
+        self.tracer = tracer
+        self._writer: sqlite3.Connection | None = None
+        self._write_lock = threading.RLock()
+        self._write_depth = 0
+        self._on_commit: List[Callable[[], None]] = []
+        self._readers: queue.LifoQueue = queue.LifoQueue(maxsize=self._MAX_IDLE_READERS)
+
+    def _connect(self, read_only: bool) -> sqlite3.Connection:
+        """
+        Opens a new connection to the db and applies the tuning pragmas.
+        Connections are created in autocommit mode, transactions are handled explicitly by writer().
+
+        Args:
+            read_only (bool): whether the connection will be used only for reading
+
+        Returns:
+            a new sqlite3.Connection
+        """
+
+        connection = sqlite3.connect(self._path,
+                                     timeout=30,
+                                     isolation_level=None,
+                                     check_same_thread=False,
+                                     cached_statements=self._CACHED_STATEMENTS,
+                                     factory=self.tracer.connection_factory() if self.tracer else sqlite3.Connection)
+        for pragma in self._PRAGMAS:
+            connection.execute(pragma)
+        if read_only:
+            connection.execute('PRAGMA query_only = ON;')
+        logging.debug('[db] Opened %s connection', 'reader' if read_only else 'writer')
+        return connection
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """
+        Context manager yielding a connection to be used for reading. The connection is taken from the pool, or
+        opened if none is available, and returned to it on exit.
+
+        Args:
+            None
+
+        Returns:
+            a sqlite3.Connection
+        """
+
+        try:
+            connection = self._readers.get_nowait()
+        except queue.Empty:
+            connection = self._connect(read_only=True)
+
+        try:
+            yield connection
+        finally:
+            try:
+                self._readers.put_nowait(connection)
+            except queue.Full:
+                connection.close()
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """
+        Context manager yielding the writer connection. The outermost block runs in an immediate transaction which
+        is committed on exit, or rolled back if an exception is raised. Nested blocks join the running transaction.
+
+        Args:
+            None
+
+        Returns:
+            a sqlite3.Connection
+        """
+
+        with self._write_lock:
+            if self._writer is None:
+                self._writer = self._connect(read_only=False)
+
+            connection = self._writer
+            if self._write_depth == 0:
+                connection.execute('BEGIN IMMEDIATE;')
+
+            self._write_depth += 1
+            try:
+                yield connection
+            except BaseException:
+                self._write_depth -= 1
+                if self._write_depth == 0:
+                    self._on_commit.clear()
+                    connection.execute('ROLLBACK;')
+                raise
+            else:
+                self._write_depth -= 1
+                if self._write_depth == 0:
+                    connection.execute('COMMIT;')
+                    callbacks, self._on_commit = self._on_commit, []
+                    for callback in callbacks:
+                        callback()
+
+    @contextmanager
+    def exclusive(self) -> Iterator[sqlite3.Connection]:
+        """
+        Context manager yielding the writer connection with no transaction open, for the statements that cannot run
+        inside one, like VACUUM. Other writes wait until the block exits.
+
+        Args:
+            None
+
+        Returns:
+            a sqlite3.Connection
+        """
+
+        with self._write_lock:
+            if self._write_depth > 0:
+                raise RuntimeError('exclusive() cannot be used inside a transaction')
+
+            if self._writer is None:
+                self._writer = self._connect(read_only=False)
+            yield self._writer
+
+    def after_commit(self, callback: Callable[[], None]) -> None:
+        """
+        Runs a callback once the running transaction is committed, or right away if there is none. Callbacks
+        registered in a transaction that is rolled back are discarded.
+
+        Args:
+            callback (Callable): function to call
+
+        Returns:
+            None
+        """
+
+        with self._write_lock:
+            if self._write_depth > 0:
+                self._on_commit.append(callback)
+                return
+        callback()
+
+    def close(self) -> None:
+        """
+        Closes all open connections. New ones will be opened on demand.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+        logging.debug('[db] Closed all connections')
+
+        if self.tracer:
+            self.tracer.log_stats()
+
+
+class AsyncReader:
+    """
+    This class runs read queries on a dedicated thread, so they never block the GTK main loop. Jobs are run one at a
+    time in submission order, and their results are delivered through a Gio.Task on the main context of the thread
+    that submitted them.
+
+    Properties:
+        None
+
+    Methods:
+        submit(function: Callable, args: tuple, callback: Callable, cancellable: Gio.Cancellable): Queues a job
+        finish(result: Gio.AsyncResult): Retrieves the result of a job
+    """
+
+    _ERROR_DOMAIN = GLib.quark_from_string('ticketbooth-db')
+
+    def __init__(self):
+        self._jobs: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def submit(self,
+               function: Callable,
+               args: tuple,
+               callback: Callable,
+               cancellable: Gio.Cancellable | None = None) -> None:
+        """
+        Queues a job on the reader thread, starting it if needed.
+
+        Args:
+            function (Callable): function to run on the reader thread
+            args (tuple): arguments for function
+            callback (Callable): Gio.AsyncReadyCallback called on completion with (source, result)
+            cancellable (Gio.Cancellable or None): a cancellable to skip the job if no longer needed
+
+        Returns:
+            None
+        """
+
+        task = Gio.Task.new(None, cancellable, lambda source, result, user_data: callback(source, result), None)
+        self._jobs.put((task, function, args))
+
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='db-reader', daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        """Loop of the reader thread"""
+
+        while True:
+            task, function, args = self._jobs.get()
+            if task.return_error_if_cancelled():
+                continue
+            try:
+                result = function(*args)
+            except Exception as error:
+                logging.error('[db] Async read %s failed: %s', function.__name__, error)
+                task.return_error(GLib.Error.new_literal(self._ERROR_DOMAIN, str(error), 0))
+            else:
+                task.return_value(GObject.Value(GObject.TYPE_PYOBJECT, result))
+
+    def finish(self, result: Gio.AsyncResult) -> object:
+        """
+        Retrieves the result of a job, raising GLib.Error if it failed or was cancelled.
+
+        Args:
+            result (Gio.AsyncResult): result passed to the callback
+
+        Returns:
+            the value returned by the job function
+        """
+
+        return result.propagate_value().value
+
+
+class LanguageRegistry:
+    """
+    This class is an immutable, in-memory snapshot of the languages table. The LanguageModels it holds are shared by
+    every model referencing them, and must not be modified.
+
+    Properties:
+        languages (tuple[LanguageModel]): all languages, sorted by iso_639_1 code
+
+    Methods:
+        by_code(iso_code: str): Retrieves a language via its iso_639_1 code
+        by_name(name: str): Retrieves a language via its name
+    """
+
+    __slots__ = ('languages', '_by_code', '_by_name')
+
+    def __init__(self, rows: List[tuple]):
+        self.languages = tuple(LanguageModel(t=row) for row in rows)
+        self._by_code = MappingProxyType({language.iso_name: language for language in self.languages})
+
+        by_name = {}
+        for language in self.languages:
+            by_name.setdefault(language.name, language)
+        self._by_name = MappingProxyType(by_name)
+
+    def by_code(self, iso_code: str) -> LanguageModel | None:
+        """
+        Retrieves a language via its iso_639_1 code.
+
+        Args:
+            iso_code (str): iso_639_1 code of the language to look for
+
+        Returns:
+            LanguageModel of the requested language or None if not found
+        """
+
+        return self._by_code.get(iso_code)
+
+    def by_name(self, name: str) -> LanguageModel | None:
+        """
+        Retrieves a language via its name.
+
+        Args:
+            name (str): name of the language to look for
+
+        Returns:
+            LanguageModel of the requested language or None if not found
+        """
+
+        return self._by_name.get(name)
+
+
 class LocalProvider:
     """
     This class provides methods to interface with the local db.
 
     Properties:
-        None
+        changes (ChangeNotifier): hub publishing the changes made to the library
 
     Methods:
         create_movies_table(): Creates the table used to store movie details in a local database
         create_series_table(): Creates the table used to store tv series details in a local database
         create_languages_table(): Creates the table used to store the available languages in a local database
-        create_tables(): Convenience method to create all tables with a single call
+        create_tables(): Convenience method to create all tables with a single call, upgrading the schema if needed
+        migrate(): Brings the db schema up to the latest version
         add_language(language: LanguageModel): Inserts the provided LanguageModel in the languages table
         add_movie(id: int, movie: MovieModel): Inserts a movie in the movies table, querying the data from TMDB if only
             id is provided.
         add_series(id: int, serie: SeriesModel): Inserts a tv series in the series table, querying the data from TMDB
             if only id is provided.
+        add_series_bulk(series: List[SeriesModel]): Inserts many tv series in a single transaction.
+        add_movies_bulk(movies: List[MovieModel]): Inserts many movies in a single transaction.
         add_content(id: int, media_type: str): Convenience method to add movies and series from TMDB without using
             separate methods
+        get_language_registry(): Retrieves the in-memory registry of the available languages.
         get_language_by_code(iso_code: str): Retrieves a language from the db via its iso_639_1 code.
         get_movie_by_id(id: str): Retrieves a movie from the db via its id
         get_all_movies(): Retrieves all movies from the db
+        get_movie_summaries(ids: List[str]): Retrieves the fields needed by the library grid for movies
+        get_series_summaries(ids: List[str]): Retrieves the fields needed by the library grid for tv series
         mark_watched_movie(id: str, status: bool): Sets the watched flag on the movie with the provided id.
-        delete_movie(id: str): Deletes the movie with the provided id, removing associated files too.
+        delete_movie(id: str): Deletes the movie with the provided id, the delete can be undone.
         get_all_seasons(show: str): Retrieves metadata for all seasons of a show.
         get_season_episodes(show: str, season_number: int): Retrieves the episodes for a season of a show
         get_series_by_id(id: str): Retrieves the series with the provided id.
         get_all_series(): Retrieves all tv series from the db.
         mark_watched_series(id: str, watched: bool): Sets the watched flag on all episodes in the series and the series
             itself.
-        delete_series(id: str): Deletes the tv series with the provided id, removing associated files too.
+        delete_series(id: str): Deletes the tv series with the provided id, the delete can be undone.
+        undo_delete(media_type: str, id: str): Restores a deleted title.
+        collect_garbage(): Empties the trash and removes the files no longer referenced by the db.
         get_all_languages(): Retrieves all languages from the db.
-        get_next_manual_movie(): Calculates the next id for a manually added movie.
-        get_next_manual_series(): Calculates the next id for a manually added tv series.
-        get_next_manual_season(): Calculates the next id for a manually added season.
-        get_next_manual_episode(): Calculates the next id for a manually added episode.
+        sync_id_sequences(): Moves the sequences of the manual ids past the highest id in use.
+        get_next_manual_movie(count: int): Reserves the next ids for manually added movies.
+        get_next_manual_series(count: int): Reserves the next ids for manually added tv series.
+        get_next_manual_season(count: int): Reserves the next ids for manually added seasons.
+        get_next_manual_episode(count: int): Reserves the next ids for manually added episodes.
         get_language_by_name(name: str): Retrieves a language from the db via its name.
         update_movie(old: MovieModel, new: MovieModel): Updates a movie with new data.
         mark_watched_episode(id: str, watched: bool): Sets the watched flag on the specified episode.
         get_episode_by_id(id: str): Retrieves an episode from the db via its id.
+        search_library(query: str): Full-text search over the movies and tv series in the db.
+        iter_library(): Streams all titles in the db, with their seasons and episodes.
+        get_facet_counts(media_type: str, filters: dict): Counts the titles for each value of the browsing facets.
+        filter_by_facets(media_type: str, filters: dict): Retrieves the ids of the titles matching the facet filters.
+        close(): Closes all connections to the db.
+        run_maintenance(): Checks the integrity of the db, reclaims unused space and refreshes the planner statistics.
+        backup(keep: int): Saves a snapshot of the db, removing the oldest ones.
+        get_backups(): Retrieves the available snapshots of the db.
+        restore_backup(path: Path): Replaces the content of the db with a snapshot.
+        get_query_stats(): Retrieves the statistics collected by the query tracer.
+        contains(id: str, media_type: str): Checks if a title is in the library.
+        read_finish(result: Gio.AsyncResult): Retrieves the result of one of the *_async methods.
+        get_movie_summaries_async(), get_series_summaries_async(), get_movie_by_id_async(),
+            get_series_by_id_async(), get_episode_by_id_async(), contains_async(), get_facets_async(),
+            search_library_async(), get_progress_async(), get_seasons_progress_async(): Asynchronous versions of the read methods, run on a dedicated thread.
     """
 
+    _db = ConnectionManager(shared.db,
+                            QueryTracer(shared.schema.get_int('db-slow-query-threshold'),
+                                        shared.data_dir / 'logs' / 'slow_queries.log')
+                            if shared.schema.get_boolean('db-tracing') else None)
+
+    # Reads requested from the main loop run here
+    _reader = AsyncReader()
+
+    # Writes publish the ids of the titles they change here, once committed
+    changes = ChangeNotifier()
+
+    # Free pages returned to the filesystem by each incremental vacuum step, other writes can run between steps
+    _VACUUM_STEP_PAGES = 1024
+
+    # Deleted titles can be restored for this long, their files are kept until then
+    _TRASH_RETENTION_SECONDS = 3600
+
+    # Unreferenced files changed more recently than this are not collected, they may belong to content being added
+    _GC_GRACE_SECONDS = 3600
+
+    # Snapshots of the db, saved by backup()
+    backup_dir = shared.data_dir / 'backups'
+
+    # Pages copied by each step of a backup, and pause between steps
+    _BACKUP_STEP_PAGES = 256
+    _BACKUP_STEP_SLEEP = 0.01
+
+    # Languages are loaded once on first use and reloaded only after add_language()
+    _languages: LanguageRegistry | None = None
+    _languages_lock = threading.Lock()
+
+    # Schema migrations, applied in order by migrate(). Entry n upgrades the db to version n+1 (PRAGMA user_version).
+    # Never edit or reorder an entry once released, add a new one instead.
+    _MIGRATIONS = [
+        # 1: fix the 'INTERGER' type typo on seasons.show_id
+        [
+            """CREATE TABLE seasons_new (
+                    episodes_number INTEGER,
+                    id TEXT PRIMARY KEY,
+                    number INTEGER,
+                    overview TEXT,
+                    poster_path TEXT,
+                    title TEXT,
+                    show_id INTEGER,
+                    FOREIGN KEY (show_id) REFERENCES series (id) ON DELETE CASCADE
+               );""",
+            'INSERT INTO seasons_new SELECT * FROM seasons;',
+            'DROP TABLE seasons;',
+            'ALTER TABLE seasons_new RENAME TO seasons;',
+        ],
+        # 2: indexes for season and episode lookups
+        [
+            'CREATE INDEX IF NOT EXISTS seasons_show_number ON seasons (show_id, number);',
+            'CREATE INDEX IF NOT EXISTS episodes_show_season_number ON episodes (show_id, season_number, number);',
+        ],
+        # 3: digest of the last stored content of each tv series, used to skip unchanged updates
+        [
+            """CREATE TABLE IF NOT EXISTS series_hashes (
+                    id TEXT PRIMARY KEY,
+                    content_hash TEXT,
+                    FOREIGN KEY (id) REFERENCES series (id) ON DELETE CASCADE
+               );""",
+        ],
+        # 4: sequences for the ids of manually added content, seeded from the highest id in use
+        [
+            """CREATE TABLE IF NOT EXISTS id_sequences (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+               );""",
+            *[f"""INSERT OR IGNORE INTO id_sequences
+                    SELECT '{table}', COALESCE(MAX(CAST(SUBSTR(id, 3) AS INTEGER)), 0)
+                    FROM {table}
+                    WHERE id LIKE 'M-%';""" for table in ('movies', 'series', 'seasons', 'episodes')],
+        ],
+        # 5: full-text search indexes, kept in sync with their tables by triggers
+        [
+            *[statement
+              for table, columns in (('movies', 'title, original_title, overview, tagline, genres'),
+                                     ('series', 'title, original_title, overview, tagline, genres'),
+                                     ('episodes', 'title, overview'))
+              for statement in (
+                  f"""CREATE VIRTUAL TABLE IF NOT EXISTS {table}_fts USING fts5(
+                          {columns},
+                          content = '{table}',
+                          content_rowid = 'rowid',
+                          tokenize = 'unicode61 remove_diacritics 2',
+                          prefix = '2 3'
+                      );""",
+                  f"""CREATE TRIGGER IF NOT EXISTS {table}_fts_insert AFTER INSERT ON {table} BEGIN
+                          INSERT INTO {table}_fts (rowid, {columns})
+                          VALUES (new.rowid, new.{columns.replace(', ', ', new.')});
+                      END;""",
+                  f"""CREATE TRIGGER IF NOT EXISTS {table}_fts_delete AFTER DELETE ON {table} BEGIN
+                          INSERT INTO {table}_fts ({table}_fts, rowid, {columns})
+                          VALUES ('delete', old.rowid, old.{columns.replace(', ', ', old.')});
+                      END;""",
+                  f"""CREATE TRIGGER IF NOT EXISTS {table}_fts_update AFTER UPDATE OF {columns} ON {table} BEGIN
+                          INSERT INTO {table}_fts ({table}_fts, rowid, {columns})
+                          VALUES ('delete', old.rowid, old.{columns.replace(', ', ', old.')});
+                          INSERT INTO {table}_fts (rowid, {columns})
+                          VALUES (new.rowid, new.{columns.replace(', ', ', new.')});
+                      END;""",
+                  f"INSERT INTO {table}_fts ({table}_fts) VALUES ('rebuild');",
+              )],
+        ],
+        # 6: watched/total episode counters per season and per series, kept up to date by triggers on episodes.
+        #    series.watched is derived from them once a series has episodes.
+        [
+            """CREATE TABLE IF NOT EXISTS season_progress (
+                    show_id TEXT,
+                    season_number INTEGER,
+                    watched INTEGER NOT NULL DEFAULT 0,
+                    total INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (show_id, season_number)
+               );""",
+            """CREATE TABLE IF NOT EXISTS series_progress (
+                    show_id TEXT PRIMARY KEY,
+                    watched INTEGER NOT NULL DEFAULT 0,
+                    total INTEGER NOT NULL DEFAULT 0
+               );""",
+            """INSERT INTO season_progress
+                    SELECT CAST(show_id AS TEXT), season_number, SUM(COALESCE(watched, 0) != 0), COUNT(*)
+                    FROM episodes
+                    GROUP BY 1, 2;""",
+            """INSERT INTO series_progress
+                    SELECT CAST(show_id AS TEXT), SUM(COALESCE(watched, 0) != 0), COUNT(*)
+                    FROM episodes
+                    GROUP BY 1;""",
+            """UPDATE series
+               SET watched = (SELECT watched = total FROM series_progress WHERE show_id = series.id)
+               WHERE id IN (SELECT show_id FROM series_progress);""",
+            """CREATE TRIGGER IF NOT EXISTS episodes_progress_insert AFTER INSERT ON episodes BEGIN
+                      INSERT INTO season_progress (show_id, season_number, watched, total)
+                      VALUES (CAST(new.show_id AS TEXT), new.season_number, COALESCE(new.watched, 0) != 0, 1)
+                      ON CONFLICT (show_id, season_number)
+                      DO UPDATE SET watched = watched + excluded.watched, total = total + 1;
+                      INSERT INTO series_progress (show_id, watched, total)
+                      VALUES (CAST(new.show_id AS TEXT), COALESCE(new.watched, 0) != 0, 1)
+                      ON CONFLICT (show_id)
+                      DO UPDATE SET watched = watched + excluded.watched, total = total + 1;
+                      UPDATE series
+                      SET watched = (SELECT watched = total FROM series_progress WHERE show_id = series.id)
+                      WHERE id = CAST(new.show_id AS TEXT) AND id IN (SELECT show_id FROM series_progress);
+               END;""",
+            """CREATE TRIGGER IF NOT EXISTS episodes_progress_delete AFTER DELETE ON episodes BEGIN
+                      UPDATE season_progress
+                      SET watched = watched - (COALESCE(old.watched, 0) != 0), total = total - 1
+                      WHERE show_id = CAST(old.show_id AS TEXT) AND season_number = old.season_number;
+                      UPDATE series_progress
+                      SET watched = watched - (COALESCE(old.watched, 0) != 0), total = total - 1
+                      WHERE show_id = CAST(old.show_id AS TEXT);
+                      DELETE FROM season_progress WHERE total <= 0 AND show_id = CAST(old.show_id AS TEXT);
+                      DELETE FROM series_progress WHERE total <= 0 AND show_id = CAST(old.show_id AS TEXT);
+                      UPDATE series
+                      SET watched = (SELECT watched = total FROM series_progress WHERE show_id = series.id)
+                      WHERE id = CAST(old.show_id AS TEXT) AND id IN (SELECT show_id FROM series_progress);
+               END;""",
+            """CREATE TRIGGER IF NOT EXISTS episodes_progress_update
+                    AFTER UPDATE OF watched, season_number, show_id ON episodes BEGIN
+                      UPDATE season_progress
+                      SET watched = watched - (COALESCE(old.watched, 0) != 0), total = total - 1
+                      WHERE show_id = CAST(old.show_id AS TEXT) AND season_number = old.season_number;
+                      UPDATE series_progress
+                      SET watched = watched - (COALESCE(old.watched, 0) != 0), total = total - 1
+                      WHERE show_id = CAST(old.show_id AS TEXT);
+                      DELETE FROM season_progress WHERE total <= 0 AND show_id = CAST(old.show_id AS TEXT);
+                      DELETE FROM series_progress WHERE total <= 0 AND show_id = CAST(old.show_id AS TEXT);
+                      INSERT INTO season_progress (show_id, season_number, watched, total)
+                      VALUES (CAST(new.show_id AS TEXT), new.season_number, COALESCE(new.watched, 0) != 0, 1)
+                      ON CONFLICT (show_id, season_number)
+                      DO UPDATE SET watched = watched + excluded.watched, total = total + 1;
+                      INSERT INTO series_progress (show_id, watched, total)
+                      VALUES (CAST(new.show_id AS TEXT), COALESCE(new.watched, 0) != 0, 1)
+                      ON CONFLICT (show_id)
+                      DO UPDATE SET watched = watched + excluded.watched, total = total + 1;
+                      UPDATE series
+                      SET watched = (SELECT watched = total FROM series_progress WHERE show_id = series.id)
+                      WHERE id = CAST(old.show_id AS TEXT) AND id IN (SELECT show_id FROM series_progress);
+                      UPDATE series
+                      SET watched = (SELECT watched = total FROM series_progress WHERE show_id = series.id)
+                      WHERE id = CAST(new.show_id AS TEXT) AND id IN (SELECT show_id FROM series_progress);
+               END;""",
+        ],
+        # 7: normalized genres, seeded by splitting the comma-joined columns, and indexes for the browsing facets.
+        #    The genres columns are kept as they are for the models, facets only use the join table.
+        [
+            """CREATE TABLE IF NOT EXISTS genres (
+                    id INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL UNIQUE
+               );""",
+            """CREATE TABLE IF NOT EXISTS title_genres (
+                    media_type TEXT NOT NULL,
+                    title_id TEXT NOT NULL,
+                    genre_id INTEGER NOT NULL,
+                    PRIMARY KEY (media_type, title_id, genre_id),
+                    FOREIGN KEY (genre_id) REFERENCES genres (id) ON DELETE CASCADE
+               ) WITHOUT ROWID;""",
+            'CREATE INDEX IF NOT EXISTS title_genres_genre ON title_genres (genre_id, media_type, title_id);',
+            """CREATE TEMP TABLE split_genres AS
+                    WITH RECURSIVE split (media_type, title_id, name, rest) AS (
+                        SELECT 'movie', id, '', genres || ',' FROM movies WHERE genres != ''
+                        UNION ALL
+                        SELECT 'series', id, '', genres || ',' FROM series WHERE genres != ''
+                        UNION ALL
+                        SELECT media_type, title_id, TRIM(SUBSTR(rest, 1, INSTR(rest, ',') - 1)),
+                               SUBSTR(rest, INSTR(rest, ',') + 1)
+                        FROM split
+                        WHERE rest != ''
+                    )
+                    SELECT media_type, title_id, name FROM split WHERE name != '';""",
+            'INSERT OR IGNORE INTO genres (name) SELECT DISTINCT name FROM split_genres;',
+            """INSERT OR IGNORE INTO title_genres
+                    SELECT split_genres.media_type, split_genres.title_id, genres.id
+                    FROM split_genres JOIN genres ON genres.name = split_genres.name;""",
+            'DROP TABLE split_genres;',
+            *[statement
+              for table, media_type in (('movies', 'movie'), ('series', 'series'))
+              for statement in (
+                  f"""CREATE TRIGGER IF NOT EXISTS {table}_genres_delete AFTER DELETE ON {table} BEGIN
+                          DELETE FROM title_genres WHERE media_type = '{media_type}' AND title_id = old.id;
+                      END;""",
+                  f'CREATE INDEX IF NOT EXISTS {table}_decade ON {table} (SUBSTR(release_date, 1, 3));',
+                  f'CREATE INDEX IF NOT EXISTS {table}_language ON {table} (original_language);',
+              )],
+        ],
+        # 8: deleted titles with their rows, kept for a while so deletes can be undone
+        [
+            """CREATE TABLE IF NOT EXISTS trash (
+                    media_type TEXT NOT NULL,
+                    title_id TEXT NOT NULL,
+                    deleted_at REAL NOT NULL,
+                    content TEXT NOT NULL,
+                    PRIMARY KEY (media_type, title_id)
+               );""",
+        ],
+    ]
+
     @staticmethod
     def create_movies_table() -> None:
         """
@@ -71,7 +670,7 @@ class LocalProvider:
             None
         """
 
-        with sqlite3.connect(shared.db) as connection:
+        with LocalProvider._db.writer() as connection:
             logging.debug('[db] Create movie table')
             sql = """CREATE TABLE IF NOT EXISTS movies (
                         add_date TEXT,
@@ -94,7 +693,6 @@ class LocalProvider:
                         FOREIGN KEY (original_language) REFERENCES languages (iso_639_1)
                      );"""
             connection.cursor().execute(sql)
-            connection.commit()
 
     @staticmethod
     def create_series_table() -> None:
@@ -108,7 +706,7 @@ class LocalProvider:
             None
         """
 
-        with sqlite3.connect(shared.db) as connection:
+        with LocalProvider._db.writer() as connection:
             logging.debug('[db] Create series, seasons, and episodes tables')
             series_sql = """CREATE TABLE IF NOT EXISTS series (
                             add_date TEXT,
@@ -138,7 +736,7 @@ class LocalProvider:
                                 overview TEXT,
                                 poster_path TEXT,
                                 title TEXT,
-                                show_id INTERGER,
+                                show_id INTEGER,
                                 FOREIGN KEY (show_id) REFERENCES series (id) ON DELETE CASCADE
                             );"""
             episodes_sql = """CREATE TABLE IF NOT EXISTS episodes (
@@ -156,7 +754,6 @@ class LocalProvider:
             connection.cursor().execute(series_sql)
             connection.cursor().execute(seasons_sql)
             connection.cursor().execute(episodes_sql)
-            connection.commit()
 
     @staticmethod
     def create_languages_table() -> None:
@@ -171,19 +768,18 @@ class LocalProvider:
             None
         """
 
-        with sqlite3.connect(shared.db) as connection:
+        with LocalProvider._db.writer() as connection:
             logging.debug('[db] Create languages table')
             sql = """CREATE TABLE IF NOT EXISTS languages (
                         iso_639_1 TEXT PRIMARY KEY,
                         name TEXT NOT NULL
                      );"""
             connection.cursor().execute(sql)
-            connection.commit()
 
     @staticmethod
     def create_tables() -> None:
         """
-        Convenience method to create all tables with a single call.
+        Convenience method to create all tables with a single call. Existing dbs are upgraded to the latest schema.
 
         Args:
             None
@@ -195,6 +791,44 @@ class LocalProvider:
         LocalProvider.create_movies_table()
         LocalProvider.create_series_table()
         LocalProvider.create_languages_table()
+        LocalProvider.migrate()
+
+    @staticmethod
+    def _publish(signal: str, media_type: str, ids: Iterable[str]) -> None:
+        """
+        Publishes a change on LocalProvider.changes once the running transaction, if any, is committed.
+
+        Args:
+            signal (str): name of the ChangeNotifier signal to emit
+            media_type (str): 'movie' or 'series'
+            ids (Iterable[str]): ids of the changed titles
+
+        Returns:
+            None
+        """
+
+        ids = list(ids)
+        LocalProvider._db.after_commit(lambda: LocalProvider.changes.publish(signal, media_type, ids))
+
+    @staticmethod
+    def migrate() -> None:
+        """
+        Brings the db schema up to the latest version, applying the pending migrations in a single transaction.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+
+        with LocalProvider._db.writer() as connection:
+            version = connection.cursor().execute('PRAGMA user_version;').fetchone()[0]
+            for number, migration in enumerate(LocalProvider._MIGRATIONS[version:], start=version + 1):
+                for sql in migration:
+                    connection.cursor().execute(sql)
+                connection.cursor().execute(f'PRAGMA user_version = {number};')
+                logging.info('[db] Migrated schema to version %d', number)
 
     @staticmethod
     def add_language(language: LanguageModel) -> int | None:
@@ -208,13 +842,39 @@ class LocalProvider:
             lastrowid: int or None containing the id of the last inserted row
         """
 
-        with sqlite3.connect(shared.db) as connection:
+        with LocalProvider._db.writer() as connection:
             sql = 'INSERT INTO languages VALUES (?,?);'
             result = connection.cursor().execute(sql, (language.iso_name, language.name))
-            connection.commit()
-            logging.debug(f'[db] Add {language.name}: {result.lastrowid}')
+            logging.debug('[db] Add %s: %s', language.name, result.lastrowid)
+
+        LocalProvider._languages = None
         return result.lastrowid
 
+    @staticmethod
+    def get_language_registry() -> LanguageRegistry:
+        """
+        Retrieves the registry of the available languages, loading it from the db on first use.
+
+        Args:
+            None
+
+        Returns:
+            LanguageRegistry with all languages in the db
+        """
+
+        registry = LocalProvider._languages
+        if registry is not None:
+            return registry
+
+        with LocalProvider._languages_lock:
+            if LocalProvider._languages is None:
+                with LocalProvider._db.reader() as connection:
+                    sql = 'SELECT * FROM languages ORDER BY iso_639_1;'
+                    result = connection.cursor().execute(sql).fetchall()
+                LocalProvider._languages = LanguageRegistry(result)
+                logging.debug('[db] Loaded %d languages', len(result))
+            return LocalProvider._languages
+
     @staticmethod
     def add_movie(id: int = 0, movie: MovieModel | None = None) -> int | None:
         """
@@ -231,32 +891,68 @@ class LocalProvider:
         if not movie:
             movie = MovieModel(tmdb.get_movie(id))
 
-        with sqlite3.connect(shared.db) as connection:
+        with LocalProvider._db.writer() as connection:
             sql = 'INSERT INTO movies VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?);'
-            result = connection.cursor().execute(sql, (
-                movie.add_date,
-                movie.backdrop_path,
-                movie.budget,
-                ','.join(movie.genres),
-                movie.id,
-                movie.manual,
-                movie.original_language.iso_name,  # type: ignore
-                movie.original_title,
-                movie.overview,
-                movie.poster_path,
-                movie.release_date,
-                movie.revenue,
-                movie.runtime,
-                movie.status,
-                movie.tagline,
-                movie.title,
-                movie.watched,
-            ))
-            connection.commit()
-            logging.debug(
-                f'[db] Add {movie.title}, {movie.release_date}: {result.lastrowid}')
+            result = connection.cursor().execute(sql, LocalProvider._movie_row(movie))
+            LocalProvider._set_genres(connection, 'movie', [(movie.id, movie.genres)])
+            logging.debug('[db] Add %s, %s: %s', movie.title, movie.release_date, result.lastrowid)
+            LocalProvider._publish('inserted', 'movie', [movie.id])
         return result.lastrowid
 
+    @staticmethod
+    def add_movies_bulk(movies: List[MovieModel]) -> int:
+        """
+        Inserts many movies in a single transaction, with one batched statement.
+
+        Args:
+            movies (List[MovieModel]): movies to add
+
+        Returns:
+            int with the number of movies added
+        """
+
+        rows = [LocalProvider._movie_row(movie) for movie in movies]
+
+        with LocalProvider._db.writer() as connection:
+            connection.cursor().executemany('INSERT INTO movies VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?);', rows)
+            LocalProvider._set_genres(connection, 'movie', [(movie.id, movie.genres) for movie in movies])
+            LocalProvider._publish('inserted', 'movie', [movie.id for movie in movies])
+
+        logging.debug('[db] Add %d movies', len(rows))
+        return len(rows)
+
+    @staticmethod
+    def _movie_row(movie: MovieModel) -> tuple:
+        """
+        Converts a MovieModel into the row stored in the movies table.
+
+        Args:
+            movie (MovieModel): movie to convert
+
+        Returns:
+            tuple with the movie row
+        """
+
+        return (
+            movie.add_date,
+            movie.backdrop_path,
+            movie.budget,
+            ','.join(movie.genres),
+            movie.id,
+            movie.manual,
+            movie.original_language.iso_name,  # type: ignore
+            movie.original_title,
+            movie.overview,
+            movie.poster_path,
+            movie.release_date,
+            movie.revenue,
+            movie.runtime,
+            movie.status,
+            movie.tagline,
+            movie.title,
+            movie.watched,
+        )
+
     @staticmethod
     def add_series(id: int = 0, serie: SeriesModel | None = None) -> int | None:
         """
@@ -271,61 +967,157 @@ class LocalProvider:
         """
 
         if not serie:
-            serie = SeriesModel(tmdb.get_serie(id))
+            serie = SeriesModel(tmdb.get_serie_with_seasons(id))
 
-        with sqlite3.connect(shared.db) as connection:
-            sql = 'INSERT INTO series VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?);'
-            result = connection.cursor().execute(sql, (
-                serie.add_date,
-                serie.backdrop_path,
-                ','.join(serie.created_by),
-                serie.episodes_number,
-                ','.join(serie.genres),
-                serie.id,
-                serie.in_production,
-                serie.manual,
-                serie.original_language.iso_name,  # type: ignore
-                serie.original_title,
-                serie.overview,
-                serie.poster_path,
-                serie.release_date,
-                serie.seasons_number,
-                serie.status,
-                serie.tagline,
-                serie.title,
-                serie.watched,
+        with LocalProvider._db.writer() as connection:
+            LocalProvider.add_series_bulk([serie])
+            sql = 'SELECT rowid FROM series WHERE id = ?;'
+            result = connection.cursor().execute(sql, (serie.id,)).fetchone()
+            logging.debug('[db] Add %s, %s: %s', serie.title, serie.release_date, result[0])
+        return result[0]
+
+    @staticmethod
+    def add_series_bulk(series: List[SeriesModel]) -> int:
+        """
+        Inserts many tv series, with their seasons and episodes, in a single transaction. Rows are built upfront and
+        inserted with one batched statement per table.
+
+        Args:
+            series (List[SeriesModel]): tv series to add
+
+        Returns:
+            int with the number of tv series added
+        """
+
+        series_rows = []
+        season_rows = []
+        episode_rows = []
+        hash_rows = []
+        for serie in series:
+            rows = LocalProvider._series_rows(serie)
+            series_rows.append(rows[0])
+            season_rows.extend(rows[1])
+            episode_rows.extend(rows[2])
+            hash_rows.append((serie.id, LocalProvider._series_digest(rows)))
+
+        with LocalProvider._db.writer() as connection:
+            cursor = connection.cursor()
+            cursor.executemany('INSERT INTO series VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?);', series_rows)
+            cursor.executemany('INSERT INTO seasons VALUES (?,?,?,?,?,?,?);', season_rows)
+            cursor.executemany('INSERT INTO episodes VALUES (?,?,?,?,?,?,?,?,?);', episode_rows)
+            cursor.executemany('INSERT OR REPLACE INTO series_hashes VALUES (?,?);', hash_rows)
+            LocalProvider._set_genres(connection, 'series', [(serie.id, serie.genres) for serie in series])
+            LocalProvider._publish('inserted', 'series', [serie.id for serie in series])
+
+        logging.debug('[db] Add %d tv series, %d seasons, %d episodes',
+                      len(series_rows), len(season_rows), len(episode_rows))
+        return len(series_rows)
+
+    @staticmethod
+    def _series_rows(serie: SeriesModel) -> Tuple[tuple, List[tuple], List[tuple]]:
+        """
+        Converts a SeriesModel into the rows stored in the series, seasons, and episodes tables.
+
+        Args:
+            serie (SeriesModel): tv series to convert
+
+        Returns:
+            tuple with the series row, the list of season rows and the list of episode rows
+        """
+
+        series_row = (
+            serie.add_date,
+            serie.backdrop_path,
+            ','.join(serie.created_by),
+            serie.episodes_number,
+            ','.join(serie.genres),
+            serie.id,
+            serie.in_production,
+            serie.manual,
+            serie.original_language.iso_name,  # type: ignore
+            serie.original_title,
+            serie.overview,
+            serie.poster_path,
+            serie.release_date,
+            serie.seasons_number,
+            serie.status,
+            serie.tagline,
+            serie.title,
+            serie.watched,
+        )
+
+        season_rows = []
+        episode_rows = []
+        for season in serie.seasons:
+            season_rows.append((
+                season.episodes_number,
+                season.id,
+                season.number,
+                season.overview,
+                season.poster_path,
+                season.title,
+                season.show_id
             ))
 
-            for season in serie.seasons:
-                sql = 'INSERT INTO seasons VALUES (?,?,?,?,?,?,?);'
-                connection.cursor().execute(sql, (
-                    season.episodes_number,
-                    season.id,
-                    season.number,
-                    season.overview,
-                    season.poster_path,
-                    season.title,
-                    season.show_id
+            for episode in season.episodes:
+                episode_rows.append((
+                    episode.id,
+                    episode.number,
+                    episode.overview,
+                    episode.runtime,
+                    episode.season_number,
+                    episode.show_id,
+                    episode.still_path,
+                    episode.title,
+                    episode.watched
                 ))
 
-                for episode in season.episodes:
-                    sql = 'INSERT INTO episodes VALUES (?,?,?,?,?,?,?,?,?);'
-                    connection.cursor().execute(sql, (
-                        episode.id,
-                        episode.number,
-                        episode.overview,
-                        episode.runtime,
-                        episode.season_number,
-                        episode.show_id,
-                        episode.still_path,
-                        episode.title,
-                        episode.watched
-                    ))
-
-            connection.commit()
-            logging.debug(
-                f'[db] Add {serie.title}, {serie.release_date}: {result.lastrowid}')
-        return result.lastrowid
+        return series_row, season_rows, episode_rows
+
+    @staticmethod
+    def _series_digest(rows: Tuple[tuple, List[tuple], List[tuple]]) -> str:
+        """
+        Computes a digest of the content of a tv series, as returned by _series_rows(). The add date and the watched
+        flags are user data and are not part of the digest.
+
+        Args:
+            rows (Tuple[tuple, List[tuple], List[tuple]]): series, season, and episode rows
+
+        Returns:
+            str with the hex digest
+        """
+
+        series_row, season_rows, episode_rows = rows
+
+        digest = hashlib.sha256(repr(series_row[1:17]).encode())
+        for row in season_rows:
+            digest.update(repr(row).encode())
+        for row in episode_rows:
+            digest.update(repr(row[:8]).encode())
+        return digest.hexdigest()
+
+    @staticmethod
+    def _set_genres(connection: sqlite3.Connection, media_type: str, titles: List[Tuple[str, List[str]]]) -> None:
+        """
+        Replaces the genres linked to the provided titles in the title_genres table, adding the missing genres.
+        Must be called with the writer connection, inside the transaction that writes the titles.
+
+        Args:
+            connection (sqlite3.Connection): the writer connection
+            media_type (str): 'movie' or 'series'
+            titles (List[Tuple[str, List[str]]]): list of title ids with their genres
+
+        Returns:
+            None
+        """
+
+        links = [(media_type, str(id), name.strip()) for id, genres in titles for name in genres if name.strip()]
+
+        cursor = connection.cursor()
+        cursor.executemany('DELETE FROM title_genres WHERE media_type = ? AND title_id = ?;',
+                           [(media_type, str(id)) for id, genres in titles])
+        cursor.executemany('INSERT OR IGNORE INTO genres (name) VALUES (?);', {(link[2],) for link in links})
+        cursor.executemany('INSERT OR IGNORE INTO title_genres SELECT ?, ?, id FROM genres WHERE name = ?;', links)
 
     @staticmethod
     def add_content(id: int, media_type: str) -> int | None:
@@ -357,17 +1149,10 @@ class LocalProvider:
             LanguageModel of the requested language or None if not found in db
         """
 
-        with sqlite3.connect(shared.db) as connection:
-            sql = """SELECT * FROM languages WHERE iso_639_1 = ?"""
-            result = connection.cursor().execute(sql, (iso_code,)).fetchone()
-            if result:
-                language = LanguageModel(t=result)
-                logging.debug(
-                    f'[db] Get language by code {iso_code}: {language.name}')
-                return language
-            else:
-                logging.error(f'[db] Get language by code {iso_code}: {None}')
-                return None
+        language = LocalProvider.get_language_registry().by_code(iso_code)
+        if language is None:
+            logging.error('[db] Get language by code %s: None', iso_code)
+        return language
 
     @staticmethod
     def get_movie_by_id(id: str) -> MovieModel | None:
@@ -381,16 +1166,15 @@ class LocalProvider:
             MovieModel of the requested movie or None if not found in db
         """
 
-        with sqlite3.connect(shared.db) as connection:
+        with LocalProvider._db.reader() as connection:
             sql = """SELECT * FROM movies WHERE id = ?;"""
             result = connection.cursor().execute(sql, (id,)).fetchone()
             if result:
                 movie = MovieModel(t=result)
-                logging.debug(
-                    f'[db] Get movie id {id}: {movie.title}, {movie.release_date}')
+                logging.debug('[db] Get movie id %s: %s, %s', id, movie.title, movie.release_date)
                 return movie
             else:
-                logging.error(f'[db] Get movie id {id}: None')
+                logging.error('[db] Get movie id %s: None', id)
                 return None
 
     @staticmethod
@@ -405,19 +1189,79 @@ class LocalProvider:
             List of MovieModel or None
         """
 
-        with sqlite3.connect(shared.db) as connection:
+        with LocalProvider._db.reader() as connection:
             sql = """SELECT * FROM movies;"""
             result = connection.cursor().execute(sql).fetchall()
             if result:
-                logging.debug(f'[db] Get all movies: {result}')
+                logging.debug('[db] Get all movies: %d', len(result))
                 movies = []
                 for movie in result:
                     movies.append(MovieModel(t=movie))
                 return movies
             else:
-                logging.debug(f'[db] Get all movies: {[]}')
+                logging.debug('[db] Get all movies: 0')
                 return []
 
+    @staticmethod
+    def _get_summaries(table: str, media_type: str, ids: List[str] | None = None) -> List[SummaryModel]:
+        """
+        Retrieves the fields needed by the library grid for all movies or tv series, or only the ones with the
+        provided ids.
+
+        Args:
+            table (str): table to query, 'movies' or 'series'
+            media_type (str): media type of the returned summaries
+            ids (List[str] or None): ids of the titles to retrieve, None for all
+
+        Returns:
+            list of SummaryModel
+        """
+
+        sql = f'SELECT id, title, release_date, poster_path, watched, add_date FROM {table}'
+        with LocalProvider._db.reader() as connection:
+            if ids is None:
+                result = connection.cursor().execute(sql).fetchall()
+            else:
+                result = []
+                # Stay under the default host parameter limit of older SQLite versions
+                for i in range(0, len(ids), 500):
+                    chunk = ids[i:i + 500]
+                    result += connection.cursor().execute(
+                        f'{sql} WHERE id IN ({", ".join("?" * len(chunk))});', chunk).fetchall()
+
+        logging.debug('[db] Get %s summaries: %d', table, len(result))
+        return [SummaryModel(str(row[0]), row[1] or '', row[2] or '', row[3] or '', bool(row[4]), str(row[5] or ''),
+                             media_type)
+                for row in result]
+
+    @staticmethod
+    def get_movie_summaries(ids: List[str] | None = None) -> List[SummaryModel]:
+        """
+        Retrieves the fields needed by the library grid for all movies, without loading the full models.
+
+        Args:
+            ids (List[str] or None): ids of the movies to retrieve, None for all
+
+        Returns:
+            list of SummaryModel
+        """
+
+        return LocalProvider._get_summaries('movies', 'movie', ids)
+
+    @staticmethod
+    def get_series_summaries(ids: List[str] | None = None) -> List[SummaryModel]:
+        """
+        Retrieves the fields needed by the library grid for all tv series, without loading seasons and episodes.
+
+        Args:
+            ids (List[str] or None): ids of the tv series to retrieve, None for all
+
+        Returns:
+            list of SummaryModel
+        """
+
+        return LocalProvider._get_summaries('series', 'series', ids)
+
     @staticmethod
     def mark_watched_movie(id: str, watched: bool) -> int | None:
         """
@@ -431,18 +1275,18 @@ class LocalProvider:
             int or None containing the id of the last modified row
         """
 
-        with sqlite3.connect(shared.db) as connection:
+        with LocalProvider._db.writer() as connection:
             sql = """UPDATE movies SET watched = ? WHERE id = ?"""
             result = connection.cursor().execute(sql, (watched, id,))
-            connection.commit()
-            logging.debug(
-                f'[db] Mark movie {id} watched {watched}: {result.lastrowid}')
+            logging.debug('[db] Mark movie %s watched %s: %s', id, watched, result.lastrowid)
+            LocalProvider._publish('watched-changed', 'movie', [id])
         return result.lastrowid
 
     @staticmethod
     def delete_movie(id: str) -> int | None:
         """
-        Deletes the movie with the provided id, removing associated files too.
+        Deletes the movie with the provided id, moving it to the trash so the delete can be undone with
+        undo_delete(). Its files are removed later by collect_garbage().
 
         Args:
             id (str): movie id to delete
@@ -451,29 +1295,45 @@ class LocalProvider:
             int or None containing the id of the last modified row
         """
 
-        logging.debug(f'[db] Movie {id}, delete requested')
-        movie = LocalProvider.get_movie_by_id(id)
+        logging.debug('[db] Movie %s, delete requested', id)
 
-        if movie.backdrop_path.startswith('file'):  # type: ignore
-            os.remove(movie.backdrop_path[7:])      # type: ignore
-            logging.debug(f'[db] Movie {id}, deleted backdrop')
-
-        if movie.poster_path.startswith('file'):    # type: ignore
-            os.remove(movie.poster_path[7:])        # type: ignore
-            logging.debug(f'[db] Movie {id}, deleted poster')
-
-        with sqlite3.connect(shared.db) as connection:
+        with LocalProvider._db.writer() as connection:
+            LocalProvider._move_to_trash(connection, 'movie', id)
             sql = """DELETE FROM movies WHERE id = ?"""
             result = connection.cursor().execute(sql, (id,))
-            connection.commit()
-            logging.debug(f'[db] Movie {id}, deleted: {result.lastrowid}')
+            logging.debug('[db] Movie %s, deleted: %s', id, result.lastrowid)
+            LocalProvider._publish('deleted', 'movie', [id])
 
         return result.lastrowid
 
     @staticmethod
-    def get_all_seasons(show: str) -> List[SeasonModel]:
+    def delete_all_movies() -> int:
         """
-        Retrieves metadata for all seasons of a show.
+        Deletes all movies in a single transaction. Like delete_movie(), every movie is moved to the trash and can be
+        restored with undo_delete() for a while. Their files are not removed here, as images are shared between
+        titles, collect_garbage() removes them once no other title uses them.
+
+        Args:
+            None
+
+        Returns:
+            int containing the number of deleted movies
+        """
+
+        with LocalProvider._db.writer() as connection:
+            rows = connection.cursor().execute('SELECT id FROM movies;').fetchall()
+            for row in rows:
+                LocalProvider._move_to_trash(connection, 'movie', row[0])
+            result = connection.cursor().execute('DELETE FROM movies;')
+            logging.debug('[db] Deleted all movies: %d', result.rowcount)
+            LocalProvider._publish('deleted', 'movie', [row[0] for row in rows])
+
+        return result.rowcount
+
+    @staticmethod
+    def get_all_seasons(show: str) -> List[SeasonModel]:
+        """
+        Retrieves metadata for all seasons of a show.
 
         Args:
             show (str): id of the show
@@ -484,7 +1344,7 @@ class LocalProvider:
 
         seasons = []
 
-        with sqlite3.connect(shared.db) as connection:
+        with LocalProvider._db.reader() as connection:
             sql = """SELECT *
                      FROM seasons
                      WHERE show_id = ?
@@ -492,11 +1352,11 @@ class LocalProvider:
 
             results = connection.cursor().execute(sql, (show,)).fetchall()
             if results:
-                logging.debug(f'[db] Get all seasons: {results}')
+                logging.debug('[db] Get all seasons of %s: %d', show, len(results))
                 for result in results:
                     seasons.append(SeasonModel(t=result))
             else:
-                logging.debug(f'[db] Get all seasons: {[]}')
+                logging.debug('[db] Get all seasons of %s: 0', show)
 
             return seasons
 
@@ -515,7 +1375,7 @@ class LocalProvider:
 
         episodes = []
 
-        with sqlite3.connect(shared.db) as connection:
+        with LocalProvider._db.reader() as connection:
             sql = """SELECT *
                      FROM episodes
                      WHERE show_id = ? AND
@@ -524,64 +1384,118 @@ class LocalProvider:
 
             results = connection.cursor().execute(sql, (show, season_num,)).fetchall()
             if results:
-                logging.debug(
-                    f'[db] Get show {show} season {season_num}: {results}')
+                logging.debug('[db] Get show %s season %s: %d episodes', show, season_num, len(results))
                 for result in results:
                     episodes.append(EpisodeModel(t=result))
             else:
-                logging.debug(
-                    f'[db] Get show {show} season {season_num}: {[]}')
+                logging.debug('[db] Get show %s season %s: 0 episodes', show, season_num)
 
             return episodes
 
     @staticmethod
-    def get_series_by_id(id: str) -> SeriesModel | None:
+    def _group_seasons(season_rows: List[tuple], episode_rows: List[tuple]) -> dict:
+        """
+        Builds SeasonModels with their episodes from raw rows, grouped by show id.
+
+        Args:
+            season_rows (List[tuple]): rows from the seasons table, ordered by show_id and number
+            episode_rows (List[tuple]): rows from the episodes table, ordered by show_id, season_number and number
+
+        Returns:
+            dict mapping the show id (as str) to its list of SeasonModel
+        """
+
+        # TMDB ids are stored as integers in seasons and episodes, but as text in series
+        episodes = {}
+        for row in episode_rows:
+            episodes.setdefault((str(row[5]), row[4]), []).append(EpisodeModel(t=row))
+
+        seasons = {}
+        for row in season_rows:
+            seasons.setdefault(str(row[6]), []).append(
+                SeasonModel(t=row + (episodes.get((str(row[6]), row[2]), []),)))
+        return seasons
+
+    @staticmethod
+    def _load_series(connection: sqlite3.Connection,
+                     series_filter: str = '',
+                     params: tuple = (),
+                     prefetch: bool = False) -> List[SeriesModel]:
+        """
+        Loads tv series. If prefetch is set, seasons and episodes are loaded too using one query per table and
+        assembled in memory, otherwise they are left to be loaded on first access.
+
+        Args:
+            connection (sqlite3.Connection): connection to use
+            series_filter (str): optional WHERE clause restricting the series to load
+            params (tuple): parameters for series_filter
+            prefetch (bool): whether to load seasons and episodes as well
+
+        Returns:
+            list of SeriesModel
+        """
+
+        series_rows = connection.cursor().execute(
+            f'SELECT * FROM series {series_filter};', params).fetchall()
+        if not series_rows:
+            return []
+
+        if not prefetch:
+            return [SeriesModel(t=row) for row in series_rows]
+
+        season_rows = connection.cursor().execute(
+            f"""SELECT *
+                FROM seasons
+                WHERE show_id IN (SELECT id FROM series {series_filter})
+                ORDER BY show_id, number;""", params).fetchall()
+        episode_rows = connection.cursor().execute(
+            f"""SELECT *
+                FROM episodes
+                WHERE show_id IN (SELECT id FROM series {series_filter})
+                ORDER BY show_id, season_number, number;""", params).fetchall()
+
+        seasons = LocalProvider._group_seasons(season_rows, episode_rows)
+        return [SeriesModel(t=row + (seasons.get(str(row[5]), []),)) for row in series_rows]
+
+    @staticmethod
+    def get_series_by_id(id: str, prefetch: bool = False) -> SeriesModel | None:
         """
         Retrieves the series with the provided id.
 
         Args:
             id (str): id of the series to retrieve
+            prefetch (bool): whether to load seasons and episodes right away
 
         Returns:
             SeriesModel for the requested series or None
         """
 
-        with sqlite3.connect(shared.db) as connection:
-            sql = 'SELECT * FROM series WHERE id=?;'
-            result = connection.cursor().execute(sql, (id,)).fetchone()
+        with LocalProvider._db.reader() as connection:
+            result = LocalProvider._load_series(connection, 'WHERE id = ?', (id,), prefetch)
             if result:
-                serie = SeriesModel(t=result)
-                logging.debug(
-                    f'[db] Get tv serie id {id}: {serie.title}')
+                serie = result[0]
+                logging.debug('[db] Get tv serie id %s: %s', id, serie.title)
                 return serie
             else:
-                logging.error(f'[db] Get tv serie id {id}: None')
+                logging.error('[db] Get tv serie id %s: None', id)
                 return None
 
     @staticmethod
-    def get_all_series() -> List[SeriesModel]:
+    def get_all_series(prefetch: bool = False) -> List[SeriesModel]:
         """
-        Retrieves all tv series from the db.
+        Retrieves all tv series from the db. Seasons and episodes are loaded on first access unless prefetch is set.
 
         Args:
-            None
+            prefetch (bool): whether to load seasons and episodes right away
 
         Returns:
             List of SeriesModel or None
         """
 
-        with sqlite3.connect(shared.db) as connection:
-            sql = """SELECT * FROM series;"""
-            result = connection.cursor().execute(sql).fetchall()
-            if result:
-                logging.debug(f'[db] Get all tv series: {result}')
-                series = []
-                for serie in result:
-                    series.append(SeriesModel(t=serie))
-                return series
-            else:
-                logging.debug(f'[db] Get all tv series: {[]}')
-                return []
+        with LocalProvider._db.reader() as connection:
+            series = LocalProvider._load_series(connection, prefetch=prefetch)
+            logging.debug('[db] Get all tv series: %d', len(series))
+            return series
 
     @staticmethod
     def mark_watched_series(id: str, watched: bool) -> int | None:
@@ -596,155 +1510,401 @@ class LocalProvider:
             int or None containing the id of the last modified row
         """
 
-        with sqlite3.connect(shared.db) as connection:
+        with LocalProvider._db.writer() as connection:
             sql = 'UPDATE series SET watched = ? WHERE id = ?;'
             result = connection.cursor().execute(sql, (watched, id,))
-            connection.commit()
-            logging.debug(
-                f'[db] Mark tv serie {id} watched {watched}: {result.lastrowid}')
+            logging.debug('[db] Mark tv serie %s watched %s: %s', id, watched, result.lastrowid)
+            LocalProvider._publish('watched-changed', 'series', [id])
         return result.lastrowid
 
     @staticmethod
-    def delete_series(id: str) -> int | None:
+    def get_progress(show_id: str, season_number: int | None = None) -> Tuple[int, int]:
         """
-        Deletes the tv series with the provided id, removing associated files too.
+        Retrieves how many episodes of a tv series, or of one of its seasons, have been watched. The counters are
+        kept up to date by the db, so no episode is loaded.
 
         Args:
-            id (str): tv series id to delete
+            show_id (str): id of the tv series
+            season_number (int or None): season to restrict the count to, None for the whole series
 
         Returns:
-            int or None containing the id of the last modified row
+            tuple of watched and total episodes
+        """
+
+        with LocalProvider._db.reader() as connection:
+            if season_number is None:
+                sql = 'SELECT watched, total FROM series_progress WHERE show_id = ?;'
+                result = connection.cursor().execute(sql, (str(show_id),)).fetchone()
+            else:
+                sql = 'SELECT watched, total FROM season_progress WHERE show_id = ? AND season_number = ?;'
+                result = connection.cursor().execute(sql, (str(show_id), season_number)).fetchone()
+
+        return result if result else (0, 0)
+
+    @staticmethod
+    def get_seasons_progress(show_id: str) -> Dict[int, Tuple[int, int]]:
         """
+        Retrieves how many episodes of each season of a tv series have been watched, with a single query.
 
-        logging.debug(f'[db] TV series {id}, delete requested')
-        series = LocalProvider.get_series_by_id(id)
+        Args:
+            show_id (str): id of the tv series
 
-        if series.backdrop_path.startswith('file'):   # type: ignore
-            os.remove(series.backdrop_path[7:])       # type: ignore
-            logging.debug(f'[db] TV series {id}, deleted backdrop')
+        Returns:
+            dict mapping the season number to a tuple of watched and total episodes
+        """
 
-        if series.poster_path.startswith('file'):     # type: ignore
-            os.remove(series.poster_path[7:])         # type: ignore
-            logging.debug(f'[db] TV series {id}, deleted poster')
+        with LocalProvider._db.reader() as connection:
+            sql = 'SELECT season_number, watched, total FROM season_progress WHERE show_id = ?;'
+            result = connection.cursor().execute(sql, (str(show_id),)).fetchall()
 
-        if (shared.series_dir/id).is_dir():
-            shutil.rmtree(shared.series_dir / id)
-            logging.debug(
-                f'[db] TV series {id}, deleted folder {shared.series_dir / id}')
+        return {row[0]: (row[1], row[2]) for row in result}
 
-        with sqlite3.connect(shared.db) as connection:
-            connection.cursor().execute('PRAGMA foreign_keys = ON;')
+    @staticmethod
+    def delete_series(id: str) -> int | None:
+        """
+        Deletes the tv series with the provided id, moving it to the trash with its seasons and episodes so the
+        delete can be undone with undo_delete(). Its files are removed later by collect_garbage().
 
+        Args:
+            id (str): tv series id to delete
+
+        Returns:
+            int or None containing the id of the last modified row
+        """
+
+        logging.debug('[db] TV series %s, delete requested', id)
+
+        with LocalProvider._db.writer() as connection:
+            LocalProvider._move_to_trash(connection, 'series', id)
             sql = """DELETE FROM series WHERE id = ?"""
             result = connection.cursor().execute(sql, (id,))
-            connection.commit()
-            logging.debug(f'[db] TV series {id}, deleted: {result.lastrowid}')
+            logging.debug('[db] TV series %s, deleted: %s', id, result.lastrowid)
+            LocalProvider._publish('deleted', 'series', [id])
 
         return result.lastrowid
 
     @staticmethod
-    def get_all_languages() -> List[LanguageModel]:
+    def _move_to_trash(connection: sqlite3.Connection, media_type: str, id: str) -> None:
         """
-        Retrieves all languages from the db.
+        Saves the rows of a title in the trash, before it is deleted. Must be called with the writer connection,
+        inside the transaction that deletes the title.
 
         Args:
+            connection (sqlite3.Connection): the writer connection
+            media_type (str): 'movie' or 'series'
+            id (str): id of the title
+
+        Returns:
             None
+        """
+
+        table = 'movies' if media_type == 'movie' else 'series'
+        cursor = connection.cursor()
+
+        row = cursor.execute(f'SELECT * FROM {table} WHERE id = ?;', (id,)).fetchone()
+        if row is None:
+            return
+
+        sql = """SELECT genres.name
+                 FROM title_genres JOIN genres ON genres.id = title_genres.genre_id
+                 WHERE title_genres.media_type = ? AND title_genres.title_id = ?;"""
+        content = {'row': row, 'genres': [genre[0] for genre in cursor.execute(sql, (media_type, str(id)))]}
+
+        if media_type == 'series':
+            content['seasons'] = cursor.execute('SELECT * FROM seasons WHERE show_id = ?;', (id,)).fetchall()
+            content['episodes'] = cursor.execute('SELECT * FROM episodes WHERE show_id = ?;', (id,)).fetchall()
+            content['hash'] = cursor.execute('SELECT content_hash FROM series_hashes WHERE id = ?;',
+                                             (id,)).fetchone()
+
+        sql = 'INSERT OR REPLACE INTO trash VALUES (?,?,?,?);'
+        cursor.execute(sql, (media_type, str(id), time.time(), json.dumps(content, ensure_ascii=False)))
+
+    @staticmethod
+    def undo_delete(media_type: str, id: str) -> bool:
+        """
+        Restores a title deleted with delete_movie() or delete_series(), if still in the trash.
+
+        Args:
+            media_type (str): 'movie' or 'series'
+            id (str): id of the title
 
         Returns:
-            List of LanguageModel
+            True if the title has been restored, False otherwise
         """
-        with sqlite3.connect(shared.db) as connection:
-            sql = 'SELECT * FROM languages ORDER BY iso_639_1'
-            result = connection.cursor().execute(sql).fetchall()
-            languages = []
-            for language in result:
-                languages.append(LanguageModel(t=language))
-            logging.debug(f'[db] Get all languages: {result}')
-            return languages
+
+        table = 'movies' if media_type == 'movie' else 'series'
+
+        with LocalProvider._db.writer() as connection:
+            cursor = connection.cursor()
+            sql = 'SELECT content FROM trash WHERE media_type = ? AND title_id = ?;'
+            trashed = cursor.execute(sql, (media_type, str(id))).fetchone()
+            if trashed is None:
+                logging.warning('[db] Undo delete [%s] %s: not in the trash', media_type, id)
+                return False
+
+            cursor.execute('DELETE FROM trash WHERE media_type = ? AND title_id = ?;', (media_type, str(id)))
+            if cursor.execute(f'SELECT 1 FROM {table} WHERE id = ?;', (id,)).fetchone():
+                logging.warning('[db] Undo delete [%s] %s: added again meanwhile', media_type, id)
+                return False
+
+            content = json.loads(trashed[0])
+            cursor.execute(f'INSERT INTO {table} VALUES ({",".join("?" * len(content["row"]))});', content['row'])
+            if media_type == 'series':
+                cursor.executemany('INSERT INTO seasons VALUES (?,?,?,?,?,?,?);', content['seasons'])
+                cursor.executemany('INSERT INTO episodes VALUES (?,?,?,?,?,?,?,?,?);', content['episodes'])
+                if content['hash']:
+                    cursor.execute('INSERT OR REPLACE INTO series_hashes VALUES (?,?);', (id, content['hash'][0]))
+            LocalProvider._set_genres(connection, media_type, [(id, content['genres'])])
+
+            logging.debug('[db] Undo delete [%s] %s', media_type, id)
+            LocalProvider._publish('inserted', media_type, [id])
+        return True
+
+    @staticmethod
+    def _referenced_files(connection: sqlite3.Connection) -> Set[str]:
+        """
+        Collects the local files referenced by the titles in a db, including the ones in its trash.
+
+        Args:
+            connection (sqlite3.Connection): connection to the db, the live one or a snapshot
+
+        Returns:
+            set with the normalized paths of the referenced files
+        """
+
+        sql = """SELECT poster_path FROM movies
+                 UNION ALL SELECT backdrop_path FROM movies
+                 UNION ALL SELECT poster_path FROM series
+                 UNION ALL SELECT backdrop_path FROM series
+                 UNION ALL SELECT poster_path FROM seasons
+                 UNION ALL SELECT still_path FROM episodes;"""
+        rows = [row for row in connection.cursor().execute(sql)]
+
+        # Snapshots saved before the trash existed do not have the table
+        sql = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'trash';"
+        if connection.cursor().execute(sql).fetchone():
+            for trashed in connection.cursor().execute('SELECT content FROM trash;'):
+                content = json.loads(trashed[0])
+                rows += [content['row'], *content.get('seasons', []), *content.get('episodes', [])]
+
+        return {os.path.normpath(value[7:]) for row in rows for value in row
+                if isinstance(value, str) and value.startswith('file://')}
 
     @staticmethod
-    def get_next_manual_movie() -> str:
+    def collect_garbage() -> Tuple[int, int]:
         """
-        Calculates the next id for a manually added movie.
+        Empties the trash of the titles deleted longer than the undo window ago, then removes the images in the data
+        directories that are no longer referenced by the db nor by its backups, so restoring a backup never leaves
+        titles without their images. Files changed recently are kept, as they could belong to content being added.
+        The files are removed while holding the writer, after checking again they are still unreferenced. Can take a
+        while on large libraries, run it in a BackgroundActivity.
 
         Args:
             None
 
         Returns:
-            string with calculated id
+            tuple with the number of files removed and the bytes freed
         """
 
-        with sqlite3.connect(shared.db) as connection:
-            sql = "SELECT id FROM movies WHERE id LIKE 'M-%' ORDER BY id DESC;"
-            result = connection.cursor().execute(sql).fetchone()
-            if result:
-                l = result[0].split('-')
-                return f'{l[0]}-{int(l[1])+1}'
-            else:
-                return 'M-1'
+        with LocalProvider._db.writer() as connection:
+            sql = 'DELETE FROM trash WHERE deleted_at < ?;'
+            purged = connection.cursor().execute(sql, (time.time() - LocalProvider._TRASH_RETENTION_SECONDS,))
+            logging.debug('[db] Purged %d titles from the trash', purged.rowcount)
+
+        referenced = set()
+        for backup in LocalProvider.get_backups():
+            try:
+                with closing(sqlite3.connect(f'file:{backup}?mode=ro', uri=True)) as connection:
+                    referenced |= LocalProvider._referenced_files(connection)
+            except sqlite3.Error as error:
+                logging.warning('[db] Reading backup %s failed, keeping all files: %s', backup.name, error)
+                return 0, 0
+
+        with LocalProvider._db.reader() as connection:
+            live = LocalProvider._referenced_files(connection)
+
+        cutoff = time.time() - LocalProvider._GC_GRACE_SECONDS
+        candidates = []
+        directories = []
+        for directory in (shared.poster_dir, shared.background_dir, shared.series_dir):
+            for path in sorted(directory.rglob('*'), key=lambda path: len(path.parts), reverse=True):
+                try:
+                    stat = path.stat()
+                    if stat.st_mtime > cutoff:
+                        continue
+                    if path.is_dir():
+                        if directory == shared.series_dir:
+                            directories.append(path)
+                    elif os.path.normpath(path) not in referenced and os.path.normpath(path) not in live:
+                        candidates.append((path, stat.st_size))
+                except OSError as error:
+                    logging.warning('[db] Collecting %s failed: %s', path, error)
+
+        removed = 0
+        freed = 0
+        with LocalProvider._db.writer() as connection:
+            # Titles committed after the first read may have started using a candidate
+            live = LocalProvider._referenced_files(connection)
+            for path, size in candidates:
+                if os.path.normpath(path) in live:
+                    continue
+                try:
+                    path.unlink()
+                    ImageStore.discard(path)
+                    removed += 1
+                    freed += size
+                except OSError as error:
+                    logging.warning('[db] Collecting %s failed: %s', path, error)
+
+        for path in directories:
+            try:
+                if not any(path.iterdir()):
+                    path.rmdir()
+                    ImageStore.forget(path)
+            except OSError as error:
+                logging.warning('[db] Collecting %s failed: %s', path, error)
+
+        logging.info('[db] Collected %d unreferenced files, %d bytes', removed, freed)
+        return removed, freed
 
     @staticmethod
-    def get_next_manual_series() -> str:
+    def delete_all_series() -> int:
         """
-        Calculates the next id for a manually added tv series.
+        Deletes all tv series, with their seasons and episodes, in a single transaction. Like delete_series(), every
+        tv series is moved to the trash and can be restored with undo_delete() for a while. Their files are not
+        removed here, as images are shared between titles, collect_garbage() removes them once no other title uses
+        them.
 
         Args:
             None
 
         Returns:
-            string with calculated id
+            int containing the number of deleted tv series
         """
 
-        with sqlite3.connect(shared.db) as connection:
-            sql = "SELECT id FROM series WHERE id LIKE 'M-%' ORDER BY id DESC;"
-            result = connection.cursor().execute(sql).fetchone()
-            if result:
-                l = result[0].split('-')
-                return f'{l[0]}-{int(l[1])+1}'
-            else:
-                return 'M-1'
+        with LocalProvider._db.writer() as connection:
+            rows = connection.cursor().execute('SELECT id FROM series;').fetchall()
+            for row in rows:
+                LocalProvider._move_to_trash(connection, 'series', row[0])
+            result = connection.cursor().execute('DELETE FROM series;')
+            logging.debug('[db] Deleted all tv series: %d', result.rowcount)
+            LocalProvider._publish('deleted', 'series', [row[0] for row in rows])
+
+        return result.rowcount
 
     @staticmethod
-    def get_next_manual_season() -> str:
+    def get_all_languages() -> List[LanguageModel]:
         """
-        Calculates the next id for a manually added season.
+        Retrieves all languages from the db.
 
         Args:
             None
 
         Returns:
-            string with calculated id
+            List of LanguageModel
         """
 
-        with sqlite3.connect(shared.db) as connection:
-            sql = "SELECT id FROM seasons WHERE id LIKE 'M-%' ORDER BY id DESC;"
-            result = connection.cursor().execute(sql).fetchone()
-            if result:
-                l = result[0].split('-')
-                return f'{l[0]}-{int(l[1])+1}'
-            else:
-                return 'M-1'
+        return list(LocalProvider.get_language_registry().languages)
+
+    @staticmethod
+    def _reserve_manual_ids(sequence: str, count: int) -> str:
+        """
+        Atomically advances a sequence in the id_sequences table, reserving count consecutive ids.
+
+        Args:
+            sequence (str): name of the sequence, same as the table the ids are for
+            count (int): how many ids to reserve
+
+        Returns:
+            string with the first reserved id
+        """
+
+        with LocalProvider._db.writer() as connection:
+            sql = 'UPDATE id_sequences SET value = value + ? WHERE name = ?;'
+            connection.cursor().execute(sql, (count, sequence))
+            sql = 'SELECT value FROM id_sequences WHERE name = ?;'
+            value = connection.cursor().execute(sql, (sequence,)).fetchone()[0]
+
+        logging.debug('[db] Reserved %d manual ids for %s, last M-%d', count, sequence, value)
+        return f'M-{value - count + 1}'
 
     @staticmethod
-    def get_next_manual_episode() -> str:
+    def sync_id_sequences() -> None:
         """
-        Calculates the next id for a manually added episode.
+        Moves the sequences of the manual ids past the highest id in use, needed after content with manual ids has
+        been added without reserving them, like on import.
 
         Args:
             None
 
         Returns:
-            string with calculated id
+            None
         """
 
-        with sqlite3.connect(shared.db) as connection:
-            sql = "SELECT id FROM episodes WHERE id LIKE 'M-%' ORDER BY id DESC;"
-            result = connection.cursor().execute(sql).fetchone()
-            if result:
-                l = result[0].split('-')
-                return f'{l[0]}-{int(l[1])+1}'
-            else:
-                return 'M-1'
+        with LocalProvider._db.writer() as connection:
+            for table in ('movies', 'series', 'seasons', 'episodes'):
+                sql = f"""INSERT INTO id_sequences
+                          SELECT '{table}', COALESCE(MAX(CAST(SUBSTR(id, 3) AS INTEGER)), 0)
+                          FROM {table}
+                          WHERE id LIKE 'M-%'
+                          ON CONFLICT (name) DO UPDATE SET value = MAX(value, excluded.value);"""
+                connection.cursor().execute(sql)
+
+    @staticmethod
+    def get_next_manual_movie(count: int = 1) -> str:
+        """
+        Reserves the next ids for manually added movies.
+
+        Args:
+            count (int): how many consecutive ids to reserve
+
+        Returns:
+            string with the first reserved id
+        """
+
+        return LocalProvider._reserve_manual_ids('movies', count)
+
+    @staticmethod
+    def get_next_manual_series(count: int = 1) -> str:
+        """
+        Reserves the next ids for manually added tv series.
+
+        Args:
+            count (int): how many consecutive ids to reserve
+
+        Returns:
+            string with the first reserved id
+        """
+
+        return LocalProvider._reserve_manual_ids('series', count)
+
+    @staticmethod
+    def get_next_manual_season(count: int = 1) -> str:
+        """
+        Reserves the next ids for manually added seasons.
+
+        Args:
+            count (int): how many consecutive ids to reserve
+
+        Returns:
+            string with the first reserved id
+        """
+
+        return LocalProvider._reserve_manual_ids('seasons', count)
+
+    @staticmethod
+    def get_next_manual_episode(count: int = 1) -> str:
+        """
+        Reserves the next ids for manually added episodes.
+
+        Args:
+            count (int): how many consecutive ids to reserve
+
+        Returns:
+            string with the first reserved id
+        """
+
+        return LocalProvider._reserve_manual_ids('episodes', count)
 
     @staticmethod
     def get_language_by_name(name: str) -> LanguageModel | None:
@@ -758,17 +1918,10 @@ class LocalProvider:
             LanguageModel of the requested language or None if not found in db
         """
 
-        with sqlite3.connect(shared.db) as connection:
-            sql = 'SELECT * FROM languages WHERE name = ?;'
-            result = connection.cursor().execute(sql, (name,)).fetchone()
-            if result:
-                language = LanguageModel(t=result)
-                logging.debug(
-                    f'[db] Get language by name {name}: {language.iso_name}')
-                return language
-            else:
-                logging.error(f'[db] Get language by name {name}: {None}')
-                return None
+        language = LocalProvider.get_language_registry().by_name(name)
+        if language is None:
+            logging.error('[db] Get language by name %s: None', name)
+        return language
 
     @staticmethod
     def update_movie(old: MovieModel, new: MovieModel) -> int | None:
@@ -783,7 +1936,7 @@ class LocalProvider:
             int or None containing the id of the last modified row
         """
 
-        with sqlite3.connect(shared.db) as connection:
+        with LocalProvider._db.writer() as connection:
             sql = """UPDATE movies
                      SET 
                          backdrop_path = ?,
@@ -819,56 +1972,112 @@ class LocalProvider:
                 new.title,
                 old.id,
             ))
-            connection.commit()
-            logging.debug(f'[db] Update movie {old.id}: {(new.backdrop_path, new.budget, ",".join(new.genres), new.manual, new.original_language.iso_name, new.original_title, new.overview, new.poster_path, new.release_date, new.revenue, new.runtime, new.status, new.tagline, new.title, old.id)}')
+            LocalProvider._set_genres(connection, 'movie', [(old.id, new.genres)])
+            logging.debug('[db] Update movie %s: %s', old.id, new.title)
+            LocalProvider._publish('updated', 'movie', [old.id])
         return result.lastrowid
     
     @staticmethod
     def update_series(old: SeriesModel, new: SeriesModel) -> int | None:
         """
-        Updates a series with new data.
+        Updates a series with new data in a single transaction.
+        Only the rows whose content changed are written, seasons and episodes no longer present are removed, and the
+        watched flags are left untouched. Nothing is written if the content is the same as the one stored.
 
         Args:
-            old: movie to be updated
-            new: new movie data
+            old: tv series to be updated
+            new: new tv series data
 
         Returns:
             int or None containing the id of the last modified row
         """
-        # Save episodes statuses before delete
-        watched_episodes = []
-        for season in old.seasons:  # type: ignore
-            for episode in season.episodes:
-                if episode.watched:
-                    watched_episodes.append(episode.id)
 
-        #remove series but not the posters, therefore not calling remove_series()
-        # TODO Handle if the poster changes, the same problem in update_movie
-        with sqlite3.connect(shared.db) as connection:
-            connection.cursor().execute('PRAGMA foreign_keys = ON;')
-
-            sql = """DELETE FROM series WHERE id = ?"""
-            result = connection.cursor().execute(sql, (old.id,))
-            connection.commit()
-            logging.debug(f'[db] TV series {id}, deleted: {result.lastrowid}')
+        # Superseded images are left on disk and removed by collect_garbage()
+        new.add_date = old.add_date
 
+        series_row, season_rows, episode_rows = LocalProvider._series_rows(new)
+        digest = LocalProvider._series_digest((series_row, season_rows, episode_rows))
 
-        # Restore episodes statuses if they match before addition
-        for idx, season in enumerate(new.seasons):
-            for jdx, episode in enumerate(season.episodes):
-                try:
-                    watched_episodes.index(episode.id)
-                    new.seasons[idx].episodes[jdx].watched = True
-                except ValueError:
-                    new.seasons[idx].episodes[jdx].watched = False
+        with LocalProvider._db.writer() as connection:
+            sql = 'SELECT content_hash FROM series_hashes WHERE id = ?;'
+            stored = connection.cursor().execute(sql, (old.id,)).fetchone()
+            if stored and stored[0] == digest:
+                logging.debug('[db] Update tv series %s: unchanged', old.id)
+                return None
 
-        new.add_date = old.add_date
-        
-        LocalProvider.add_series(serie=new)
+            sql = """UPDATE series
+                     SET
+                         backdrop_path = ?,
+                         created_by = ?,
+                         episodes_number = ?,
+                         genres = ?,
+                         in_production = ?,
+                         manual = ?,
+                         original_language = ?,
+                         original_title = ?,
+                         overview = ?,
+                         poster_path = ?,
+                         release_date = ?,
+                         seasons_number = ?,
+                         status = ?,
+                         tagline = ?,
+                         title = ?
+                     WHERE id = ?;"""
+            result = connection.cursor().execute(sql, series_row[1:5] + series_row[6:17] + (old.id,))
+
+            sql = """INSERT INTO seasons VALUES (?,?,?,?,?,?,?)
+                     ON CONFLICT (id) DO UPDATE SET
+                         episodes_number = excluded.episodes_number,
+                         number = excluded.number,
+                         overview = excluded.overview,
+                         poster_path = excluded.poster_path,
+                         title = excluded.title,
+                         show_id = excluded.show_id
+                     WHERE (seasons.episodes_number, seasons.number, seasons.overview, seasons.poster_path,
+                            seasons.title, seasons.show_id)
+                           IS NOT
+                           (excluded.episodes_number, excluded.number, excluded.overview, excluded.poster_path,
+                            excluded.title, excluded.show_id);"""
+            seasons_changed = connection.cursor().executemany(sql, season_rows).rowcount
+
+            sql = """INSERT INTO episodes VALUES (?,?,?,?,?,?,?,?,?)
+                     ON CONFLICT (id) DO UPDATE SET
+                         number = excluded.number,
+                         overview = excluded.overview,
+                         runtime = excluded.runtime,
+                         season_number = excluded.season_number,
+                         show_id = excluded.show_id,
+                         still_path = excluded.still_path,
+                         title = excluded.title
+                     WHERE (episodes.number, episodes.overview, episodes.runtime, episodes.season_number,
+                            episodes.show_id, episodes.still_path, episodes.title)
+                           IS NOT
+                           (excluded.number, excluded.overview, excluded.runtime, excluded.season_number,
+                            excluded.show_id, excluded.still_path, excluded.title);"""
+            episodes_changed = connection.cursor().executemany(sql, episode_rows).rowcount
+
+            # Remove seasons and episodes no longer present
+            new_ids = {str(row[1]) for row in season_rows}
+            sql = 'SELECT id FROM seasons WHERE show_id = ?;'
+            stale = [(row[0],) for row in connection.cursor().execute(sql, (old.id,)) if row[0] not in new_ids]
+            connection.cursor().executemany('DELETE FROM seasons WHERE id = ?;', stale)
+
+            new_ids = {str(row[0]) for row in episode_rows}
+            sql = 'SELECT id FROM episodes WHERE show_id = ?;'
+            stale_episodes = [(row[0],) for row in connection.cursor().execute(sql, (old.id,))
+                              if row[0] not in new_ids]
+            connection.cursor().executemany('DELETE FROM episodes WHERE id = ?;', stale_episodes)
+
+            sql = 'INSERT OR REPLACE INTO series_hashes VALUES (?,?);'
+            connection.cursor().execute(sql, (old.id, digest))
+            LocalProvider._set_genres(connection, 'series', [(old.id, new.genres)])
+
+            logging.debug('[db] Update tv series %s: %d seasons and %d episodes written, %d seasons and %d episodes '
+                          'removed', old.id, seasons_changed, episodes_changed, len(stale), len(stale_episodes))
+            LocalProvider._publish('updated', 'series', [old.id])
 
         return result.lastrowid
 
-
     @staticmethod
     def mark_watched_episode(id: str, watched: bool) -> int | None:
         """
@@ -881,14 +2090,61 @@ class LocalProvider:
         Returns:
             int or None containing the id of the last modified row
         """
-        with sqlite3.connect(shared.db, check_same_thread=False) as connection:
+        with LocalProvider._db.writer() as connection:
             sql = """UPDATE episodes SET watched = ? WHERE id = ?"""
             result = connection.cursor().execute(sql, (watched, id,))
-            connection.commit()
-            logging.debug(
-                f'[db] Mark episode {id} watched {watched}: {result.lastrowid}')
+            logging.debug('[db] Mark episode %s watched %s: %s', id, watched, result.lastrowid)
+            show = connection.cursor().execute('SELECT show_id FROM episodes WHERE id = ?;', (id,)).fetchone()
+            if show:
+                LocalProvider._publish('watched-changed', 'series', [show[0]])
         return result.lastrowid
 
+    @staticmethod
+    def mark_watched_season(show_id: str, season_number: int, watched: bool) -> int:
+        """
+        Sets the watched flag on all episodes of a season with a single statement.
+
+        Args:
+            show_id (str): id of the tv series
+            season_number (int): season number
+            watched (bool): status to set the flag to
+
+        Returns:
+            int containing the number of modified episodes
+        """
+
+        with LocalProvider._db.writer() as connection:
+            sql = """UPDATE episodes
+                     SET watched = ?
+                     WHERE show_id = ? AND season_number = ? AND watched IS NOT ?;"""
+            result = connection.cursor().execute(sql, (watched, show_id, season_number, watched))
+            logging.debug('[db] Mark show %s season %s watched %s: %d episodes',
+                          show_id, season_number, watched, result.rowcount)
+            LocalProvider._publish('watched-changed', 'series', [show_id])
+        return result.rowcount
+
+    @staticmethod
+    def mark_watched_series_episodes(show_id: str, watched: bool) -> int:
+        """
+        Sets the watched flag on all episodes of a tv series, and on the series itself, in a single transaction.
+
+        Args:
+            show_id (str): id of the tv series
+            watched (bool): status to set the flag to
+
+        Returns:
+            int containing the number of modified episodes
+        """
+
+        with LocalProvider._db.writer() as connection:
+            sql = 'UPDATE episodes SET watched = ? WHERE show_id = ? AND watched IS NOT ?;'
+            result = connection.cursor().execute(sql, (watched, show_id, watched))
+            # Series without episodes are not covered by the progress triggers
+            connection.cursor().execute('UPDATE series SET watched = ? WHERE id = ?;', (watched, show_id))
+            logging.debug('[db] Mark show %s watched %s: %d episodes', show_id, watched, result.rowcount)
+            LocalProvider._publish('watched-changed', 'series', [show_id])
+        return result.rowcount
+
     @staticmethod
     def get_episode_by_id(id: str) -> EpisodeModel | None:
         """
@@ -901,13 +2157,656 @@ class LocalProvider:
             EpisodeModel of the requested episode or None if not found in db
         """
 
-        with sqlite3.connect(shared.db) as connection:
+        with LocalProvider._db.reader() as connection:
             sql = """SELECT * FROM episodes WHERE id = ?;"""
             result = connection.cursor().execute(sql, (id,)).fetchone()
             if result:
                 episode = EpisodeModel(t=result)
-                logging.debug(f'[db] Get episode id {id}: {episode.title}')
+                logging.debug('[db] Get episode id %s: %s', id, episode.title)
                 return episode
             else:
-                logging.error(f'[db] Get episode id {id}: None')
+                logging.error('[db] Get episode id %s: None', id)
                 return None
+
+    @staticmethod
+    def search_library(query: str, limit: int = 500) -> List[Tuple[str, str]]:
+        """
+        Searches titles, original titles, overviews, taglines and genres of the movies and tv series in the db, and
+        titles and overviews of the episodes. Every word in the query is matched as a prefix. Episode matches are
+        reported as their tv series, ranked below title matches.
+
+        Args:
+            query (str): text to look for
+            limit (int): maximum number of results
+
+        Returns:
+            list of tuples with media type ('movie' or 'series') and id, best match first
+        """
+
+        words = ['"' + word.replace('"', '""') + '"*' for word in query.split()]
+        if not words:
+            return []
+        match = ' '.join(words)
+
+        with LocalProvider._db.reader() as connection:
+            sql = """SELECT media_type, id, MIN(rank) AS best
+                     FROM (
+                         SELECT 'movie' AS media_type, movies.id AS id,
+                                bm25(movies_fts, 10.0, 5.0, 1.0, 2.0, 3.0) AS rank
+                         FROM movies_fts JOIN movies ON movies.rowid = movies_fts.rowid
+                         WHERE movies_fts MATCH :match
+                         UNION ALL
+                         SELECT 'series', series.id,
+                                bm25(series_fts, 10.0, 5.0, 1.0, 2.0, 3.0)
+                         FROM series_fts JOIN series ON series.rowid = series_fts.rowid
+                         WHERE series_fts MATCH :match
+                         UNION ALL
+                         SELECT 'series', CAST(episodes.show_id AS TEXT),
+                                bm25(episodes_fts, 2.0, 1.0) * 0.5
+                         FROM episodes_fts JOIN episodes ON episodes.rowid = episodes_fts.rowid
+                         WHERE episodes_fts MATCH :match
+                     )
+                     GROUP BY media_type, id
+                     ORDER BY best
+                     LIMIT :limit;"""
+            result = connection.cursor().execute(sql, {'match': match, 'limit': limit}).fetchall()
+
+        logging.debug('[db] Search library %r: %d results', query, len(result))
+        return [(row[0], str(row[1])) for row in result]
+
+    @staticmethod
+    def iter_library() -> Iterator[Tuple[str, dict]]:
+        """
+        Streams all titles in the db from a consistent snapshot, one at a time, so memory use does not depend on the
+        size of the library. Every title is a dict of its columns, tv series also have a 'seasons' list and every
+        season an 'episodes' list.
+
+        Args:
+            None
+
+        Returns:
+            an iterator of tuples with media type ('movie' or 'series') and title
+        """
+
+        with LocalProvider._db.reader() as connection:
+            # A read transaction keeps the snapshot stable across the queries
+            connection.cursor().execute('BEGIN;')
+            try:
+                cursor = connection.cursor().execute('SELECT * FROM movies ORDER BY rowid;')
+                columns = [column[0] for column in cursor.description]
+                for row in cursor:
+                    yield 'movie', dict(zip(columns, row))
+
+                cursor = connection.cursor().execute('SELECT * FROM series ORDER BY rowid;')
+                columns = [column[0] for column in cursor.description]
+                for row in cursor:
+                    serie = dict(zip(columns, row))
+
+                    sql = 'SELECT * FROM seasons WHERE show_id = ? ORDER BY number;'
+                    seasons = connection.cursor().execute(sql, (serie['id'],))
+                    season_columns = [column[0] for column in seasons.description]
+                    serie['seasons'] = [dict(zip(season_columns, season), episodes=[]) for season in seasons]
+
+                    sql = 'SELECT * FROM episodes WHERE show_id = ? ORDER BY season_number, number;'
+                    episodes = connection.cursor().execute(sql, (serie['id'],))
+                    episode_columns = [column[0] for column in episodes.description]
+                    by_number = {season['number']: season for season in serie['seasons']}
+                    for episode in episodes:
+                        episode = dict(zip(episode_columns, episode))
+                        if episode['season_number'] in by_number:
+                            by_number[episode['season_number']]['episodes'].append(episode)
+
+                    yield 'series', serie
+            finally:
+                connection.cursor().execute('COMMIT;')
+
+    @staticmethod
+    def _facet_conditions(table: str,
+                          media_type: str,
+                          filters: Dict[str, Iterable[str]],
+                          skip: str = '') -> Tuple[str, list]:
+        """
+        Builds the conditions selecting the titles that match the provided facet filters. Values of the same facet
+        are alternatives, different facets must all match.
+
+        Args:
+            table (str): 'movies' or 'series'
+            media_type (str): 'movie' or 'series'
+            filters (Dict[str, Iterable[str]]): selected values for each facet
+            skip (str): facet to leave out, used when counting the values of that facet
+
+        Returns:
+            tuple with the conditions, each starting with ' AND ', and their parameters
+        """
+
+        conditions = ''
+        params = []
+        for facet, values in sorted(filters.items()):
+            values = sorted(values)
+            if facet == skip or not values:
+                continue
+
+            marks = ','.join('?' * len(values))
+            match facet:
+                case 'genre':
+                    conditions += f""" AND {table}.id IN (
+                                          SELECT title_id FROM title_genres
+                                          WHERE media_type = ?
+                                                AND genre_id IN (SELECT id FROM genres WHERE name IN ({marks})))"""
+                    params += [media_type, *values]
+                case 'decade':
+                    conditions += f' AND SUBSTR({table}.release_date, 1, 3) IN ({marks})'
+                    params += [value[:3] for value in values]
+                case 'language':
+                    conditions += f' AND {table}.original_language IN ({marks})'
+                    params += values
+        return conditions, params
+
+    @staticmethod
+    def get_facet_counts(media_type: str,
+                         filters: Dict[str, Iterable[str]] | None = None) -> Dict[str, List[Tuple[str, int]]]:
+        """
+        Counts the titles for each value of the browsing facets: genre, decade of release and original language.
+        The counts of a facet take into account the filters selected on the other facets.
+
+        Args:
+            media_type (str): 'movie' or 'series'
+            filters (Dict[str, Iterable[str]] or None): selected values for each facet, None for no filters
+
+        Returns:
+            dict mapping each facet to a list of tuples with value and number of titles
+        """
+
+        filters = filters or {}
+        table = 'movies' if media_type == 'movie' else 'series'
+        counts = {}
+
+        with LocalProvider._db.reader() as connection:
+            conditions, params = LocalProvider._facet_conditions(table, media_type, filters, 'genre')
+            join = f'JOIN {table} ON {table}.id = title_genres.title_id' if conditions else ''
+            sql = f"""SELECT genres.name, COUNT(*)
+                      FROM title_genres JOIN genres ON genres.id = title_genres.genre_id {join}
+                      WHERE title_genres.media_type = ?{conditions}
+                      GROUP BY genres.name
+                      ORDER BY genres.name;"""
+            counts['genre'] = connection.cursor().execute(sql, (media_type, *params)).fetchall()
+
+            conditions, params = LocalProvider._facet_conditions(table, media_type, filters, 'decade')
+            sql = f"""SELECT SUBSTR(release_date, 1, 3) || '0', COUNT(*)
+                      FROM {table}
+                      WHERE release_date GLOB '[0-9][0-9][0-9]*'{conditions}
+                      GROUP BY SUBSTR(release_date, 1, 3)
+                      ORDER BY 1 DESC;"""
+            counts['decade'] = connection.cursor().execute(sql, params).fetchall()
+
+            conditions, params = LocalProvider._facet_conditions(table, media_type, filters, 'language')
+            sql = f"""SELECT original_language, COUNT(*)
+                      FROM {table}
+                      WHERE original_language != ''{conditions}
+                      GROUP BY original_language
+                      ORDER BY 2 DESC, 1;"""
+            counts['language'] = connection.cursor().execute(sql, params).fetchall()
+
+        logging.debug('[db] Facet counts [%s]: %s', media_type,
+                      ', '.join(f'{len(values)} {facet}' for facet, values in counts.items()))
+        return counts
+
+    @staticmethod
+    def filter_by_facets(media_type: str, filters: Dict[str, Iterable[str]]) -> set | None:
+        """
+        Retrieves the ids of the titles matching the provided facet filters.
+
+        Args:
+            media_type (str): 'movie' or 'series'
+            filters (Dict[str, Iterable[str]]): selected values for each facet
+
+        Returns:
+            set with the ids of the matching titles, or None if no filter is selected
+        """
+
+        table = 'movies' if media_type == 'movie' else 'series'
+        conditions, params = LocalProvider._facet_conditions(table, media_type, filters)
+        if not conditions:
+            return None
+
+        with LocalProvider._db.reader() as connection:
+            sql = f'SELECT id FROM {table} WHERE 1{conditions};'
+            result = {str(row[0]) for row in connection.cursor().execute(sql, params)}
+
+        logging.debug('[db] Filter by facets [%s]: %d titles', media_type, len(result))
+        return result
+
+    @staticmethod
+    def _browse_facets(media_type: str, filters: Dict[str, Iterable[str]]) -> Tuple[dict, set | None]:
+        """
+        Runs get_facet_counts() and filter_by_facets() together, for get_facets_async().
+
+        Args:
+            media_type (str): 'movie' or 'series'
+            filters (Dict[str, Iterable[str]]): selected values for each facet
+
+        Returns:
+            tuple with the facet counts and the ids of the matching titles
+        """
+
+        return LocalProvider.get_facet_counts(media_type, filters), LocalProvider.filter_by_facets(media_type, filters)
+
+    @staticmethod
+    def read_finish(result: Gio.AsyncResult) -> object:
+        """
+        Retrieves the result of one of the *_async methods, to be called in their callback.
+
+        Args:
+            result (Gio.AsyncResult): result passed to the callback
+
+        Returns:
+            the value the synchronous method would have returned. Raises GLib.Error if the read failed or was
+            cancelled.
+        """
+
+        return LocalProvider._reader.finish(result)
+
+    @staticmethod
+    def get_movie_summaries_async(callback: Callable,
+                            cancellable: Gio.Cancellable | None = None,
+                            ids: List[str] | None = None) -> None:
+        """
+        Asynchronous version of get_movie_summaries(), run on the reader thread.
+
+        Args:
+            callback (Callable): called on the main loop with (source, result), use read_finish() to get the result
+            cancellable (Gio.Cancellable or None): a cancellable
+            ids (List[str] or None): ids of the movies to retrieve, None for all
+
+        Returns:
+            None
+        """
+
+        LocalProvider._reader.submit(LocalProvider.get_movie_summaries, (ids,), callback, cancellable)
+
+    @staticmethod
+    def get_series_summaries_async(callback: Callable,
+                            cancellable: Gio.Cancellable | None = None,
+                            ids: List[str] | None = None) -> None:
+        """
+        Asynchronous version of get_series_summaries(), run on the reader thread.
+
+        Args:
+            callback (Callable): called on the main loop with (source, result), use read_finish() to get the result
+            cancellable (Gio.Cancellable or None): a cancellable
+            ids (List[str] or None): ids of the tv series to retrieve, None for all
+
+        Returns:
+            None
+        """
+
+        LocalProvider._reader.submit(LocalProvider.get_series_summaries, (ids,), callback, cancellable)
+
+    @staticmethod
+    def search_library_async(query: str, callback: Callable, cancellable: Gio.Cancellable | None = None) -> None:
+        """
+        Asynchronous version of search_library(), run on the reader thread.
+
+        Args:
+            query (str): text to look for
+            callback (Callable): called on the main loop with (source, result), use read_finish() to get the result
+            cancellable (Gio.Cancellable or None): a cancellable
+
+        Returns:
+            None
+        """
+
+        LocalProvider._reader.submit(LocalProvider.search_library, (query,), callback, cancellable)
+
+    @staticmethod
+    def get_facets_async(media_type: str,
+                         filters: Dict[str, Iterable[str]],
+                         callback: Callable,
+                         cancellable: Gio.Cancellable | None = None) -> None:
+        """
+        Asynchronously retrieves the facet counts and the ids of the titles matching the filters, run on the reader
+        thread. The result is a tuple with the values returned by get_facet_counts() and filter_by_facets().
+
+        Args:
+            media_type (str): 'movie' or 'series'
+            filters (Dict[str, Iterable[str]]): selected values for each facet
+            callback (Callable): called on the main loop with (source, result), use read_finish() to get the result
+            cancellable (Gio.Cancellable or None): a cancellable
+
+        Returns:
+            None
+        """
+
+        LocalProvider._reader.submit(LocalProvider._browse_facets, (media_type, filters), callback, cancellable)
+
+    @staticmethod
+    def get_movie_by_id_async(id: str, callback: Callable, cancellable: Gio.Cancellable | None = None) -> None:
+        """
+        Asynchronous version of get_movie_by_id(), run on the reader thread.
+
+        Args:
+            id (str): id of the movie to retrieve
+            callback (Callable): called on the main loop with (source, result), use read_finish() to get the result
+            cancellable (Gio.Cancellable or None): a cancellable
+
+        Returns:
+            None
+        """
+
+        LocalProvider._reader.submit(LocalProvider.get_movie_by_id, (id,), callback, cancellable)
+
+    @staticmethod
+    def get_series_by_id_async(id: str,
+                               callback: Callable,
+                               prefetch: bool = False,
+                               cancellable: Gio.Cancellable | None = None) -> None:
+        """
+        Asynchronous version of get_series_by_id(), run on the reader thread. With prefetch, seasons and episodes
+        are loaded on the reader thread too.
+
+        Args:
+            id (str): id of the series to retrieve
+            callback (Callable): called on the main loop with (source, result), use read_finish() to get the result
+            prefetch (bool): whether to load seasons and episodes right away
+            cancellable (Gio.Cancellable or None): a cancellable
+
+        Returns:
+            None
+        """
+
+        LocalProvider._reader.submit(LocalProvider.get_series_by_id, (id, prefetch), callback, cancellable)
+
+    @staticmethod
+    def get_episode_by_id_async(id: str, callback: Callable, cancellable: Gio.Cancellable | None = None) -> None:
+        """
+        Asynchronous version of get_episode_by_id(), run on the reader thread.
+
+        Args:
+            id (str): id of the episode to retrieve
+            callback (Callable): called on the main loop with (source, result), use read_finish() to get the result
+            cancellable (Gio.Cancellable or None): a cancellable
+
+        Returns:
+            None
+        """
+
+        LocalProvider._reader.submit(LocalProvider.get_episode_by_id, (id,), callback, cancellable)
+
+    @staticmethod
+    def get_progress_async(show_id: str,
+                           callback: Callable,
+                           cancellable: Gio.Cancellable | None = None,
+                           season_number: int | None = None) -> None:
+        """
+        Asynchronous version of get_progress(), run on the reader thread.
+
+        Args:
+            show_id (str): id of the tv series
+            callback (Callable): called on the main loop with (source, result), use read_finish() to get the result
+            cancellable (Gio.Cancellable or None): a cancellable
+            season_number (int or None): season to restrict the count to, None for the whole series
+
+        Returns:
+            None
+        """
+
+        LocalProvider._reader.submit(LocalProvider.get_progress, (show_id, season_number), callback, cancellable)
+
+    @staticmethod
+    def get_seasons_progress_async(show_id: str,
+                                   callback: Callable,
+                                   cancellable: Gio.Cancellable | None = None) -> None:
+        """
+        Asynchronous version of get_seasons_progress(), run on the reader thread.
+
+        Args:
+            show_id (str): id of the tv series
+            callback (Callable): called on the main loop with (source, result), use read_finish() to get the result
+            cancellable (Gio.Cancellable or None): a cancellable
+
+        Returns:
+            None
+        """
+
+        LocalProvider._reader.submit(LocalProvider.get_seasons_progress, (show_id,), callback, cancellable)
+
+    @staticmethod
+    def contains(id: str, media_type: str) -> bool:
+        """
+        Checks if a title is in the library, without loading it.
+
+        Args:
+            id (str): id of the title
+            media_type (str): 'movie' or 'series'
+
+        Returns:
+            True if the title is in the library, False otherwise
+        """
+
+        table = 'movies' if media_type == 'movie' else 'series'
+        with LocalProvider._db.reader() as connection:
+            sql = f'SELECT EXISTS (SELECT 1 FROM {table} WHERE id = ?);'
+            return bool(connection.cursor().execute(sql, (str(id),)).fetchone()[0])
+
+    @staticmethod
+    def contains_async(id: str,
+                       media_type: str,
+                       callback: Callable,
+                       cancellable: Gio.Cancellable | None = None) -> None:
+        """
+        Asynchronous version of contains(), run on the reader thread.
+
+        Args:
+            id (str): id of the title
+            media_type (str): 'movie' or 'series'
+            callback (Callable): called on the main loop with (source, result), use read_finish() to get the result
+            cancellable (Gio.Cancellable or None): a cancellable
+
+        Returns:
+            None
+        """
+
+        LocalProvider._reader.submit(LocalProvider.contains, (id, media_type), callback, cancellable)
+
+    @staticmethod
+    def close() -> None:
+        """
+        Closes all connections to the db, checkpointing the WAL journal.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+
+        LocalProvider._db.close()
+
+    @staticmethod
+    def _db_size() -> int:
+        """
+        Computes the space taken on disk by the db, including its WAL journal.
+
+        Args:
+            None
+
+        Returns:
+            int with the size in bytes
+        """
+
+        return sum(os.path.getsize(f'{shared.db}{suffix}')
+                   for suffix in ('', '-wal') if os.path.exists(f'{shared.db}{suffix}'))
+
+    @staticmethod
+    def run_maintenance() -> Dict[str, object]:
+        """
+        Checks the integrity of the db, returns its free pages to the filesystem a step at a time, refreshes the
+        statistics used by the query planner and truncates the WAL journal. The first run switches the db to
+        incremental auto-vacuum, which requires a full VACUUM. Space is not reclaimed if the integrity check fails.
+        Can take a while on large libraries, run it in a BackgroundActivity.
+
+        Args:
+            None
+
+        Returns:
+            dict with 'integrity_ok' (bool), 'bytes_reclaimed' (int) and 'seconds' (float)
+        """
+
+        started = time.perf_counter()
+        size = LocalProvider._db_size()
+
+        with LocalProvider._db.reader() as connection:
+            problems = [row[0] for row in connection.cursor().execute('PRAGMA integrity_check;')]
+        integrity_ok = problems == ['ok']
+
+        if not integrity_ok:
+            logging.error('[db] Integrity check failed: %s', '; '.join(problems[:10]))
+        else:
+            with LocalProvider._db.exclusive() as connection:
+                if connection.cursor().execute('PRAGMA auto_vacuum;').fetchone()[0] != 2:
+                    logging.info('[db] Switching to incremental auto-vacuum')
+                    connection.cursor().execute('PRAGMA auto_vacuum = INCREMENTAL;')
+                    connection.cursor().execute('VACUUM;')
+
+                    # VACUUM can renumber the rowids the full-text indexes refer to
+                    for table in ('movies', 'series', 'episodes'):
+                        connection.cursor().execute(f"INSERT INTO {table}_fts ({table}_fts) VALUES ('rebuild');")
+
+                incremental = connection.cursor().execute('PRAGMA auto_vacuum;').fetchone()[0] == 2
+
+            steps = 0
+            free_pages = None
+            while incremental:
+                with LocalProvider._db.exclusive() as connection:
+                    remaining = connection.cursor().execute('PRAGMA freelist_count;').fetchone()[0]
+                    # Stops when done, or when a step did not release any page
+                    if not remaining or (free_pages is not None and remaining >= free_pages):
+                        break
+                    free_pages = remaining
+                    # Pages are released one per step of the statement, execute() only steps it once
+                    connection.executescript(f'PRAGMA incremental_vacuum({LocalProvider._VACUUM_STEP_PAGES});')
+                    steps += 1
+            if not incremental:
+                logging.warning('[db] Incremental auto-vacuum not enabled, space not reclaimed')
+            logging.debug('[db] Incremental vacuum: %d steps', steps)
+
+        with LocalProvider._db.exclusive() as connection:
+            connection.cursor().execute('PRAGMA analysis_limit = 1000;')
+            connection.cursor().execute('ANALYZE;')
+            connection.cursor().execute('PRAGMA optimize;')
+            connection.cursor().execute('PRAGMA wal_checkpoint(TRUNCATE);').fetchall()
+
+        report = {
+            'integrity_ok': integrity_ok,
+            'bytes_reclaimed': size - LocalProvider._db_size(),
+            'seconds': time.perf_counter() - started,
+        }
+        logging.info('[db] Maintenance done in %.2f s: %d bytes reclaimed, integrity %s',
+                     report['seconds'], report['bytes_reclaimed'], 'ok' if integrity_ok else 'failed')
+        return report
+
+    @staticmethod
+    def backup(keep: int = 7) -> Path:
+        """
+        Saves a snapshot of the db in backup_dir with the sqlite online backup API, then removes the oldest snapshots.
+        Pages are copied in small steps from a read transaction, so writes are never blocked and the snapshot is
+        consistent even if the db changes meanwhile.
+
+        Args:
+            keep (int): number of snapshots to keep
+
+        Returns:
+            Path of the new snapshot
+        """
+
+        started = time.perf_counter()
+        LocalProvider.backup_dir.mkdir(parents=True, exist_ok=True)
+        path = LocalProvider.backup_dir / f'data-{datetime.now().strftime("%Y%m%d-%H%M%S-%f")}.db'
+        partial = path.with_name(f'{path.name}.part')
+
+        with LocalProvider._db.reader() as connection, closing(sqlite3.connect(partial)) as target:
+            connection.cursor().execute('BEGIN;')
+            try:
+                connection.backup(target, pages=LocalProvider._BACKUP_STEP_PAGES, sleep=LocalProvider._BACKUP_STEP_SLEEP)
+            finally:
+                connection.cursor().execute('COMMIT;')
+            target.execute('PRAGMA journal_mode = DELETE;')
+        os.replace(partial, path)
+
+        for old in LocalProvider.get_backups()[keep:]:
+            old.unlink(missing_ok=True)
+            logging.debug('[db] Removed backup %s', old.name)
+
+        logging.info('[db] Backup %s saved in %.2f s', path.name, time.perf_counter() - started)
+        return path
+
+    @staticmethod
+    def get_backups() -> List[Path]:
+        """
+        Retrieves the snapshots of the db saved by backup().
+
+        Args:
+            None
+
+        Returns:
+            list of Paths of the snapshots, newest first
+        """
+
+        return sorted(LocalProvider.backup_dir.glob('data-*.db'), reverse=True)
+
+    @staticmethod
+    def restore_backup(path: Path) -> None:
+        """
+        Replaces the content of the db with a snapshot, after saving a snapshot of the current content. The pages are
+        copied into the open db, so the app keeps running on the restored data. Snapshots of older versions are
+        migrated to the current schema.
+
+        Args:
+            path (Path): snapshot to restore
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: if the file is not a valid snapshot
+        """
+
+        with closing(sqlite3.connect(f'file:{path}?mode=ro', uri=True)) as source:
+            try:
+                problems = [row[0] for row in source.execute('PRAGMA quick_check;')]
+                version = source.execute('PRAGMA user_version;').fetchone()[0]
+                source.execute('SELECT 1 FROM movies, series LIMIT 1;')
+            except sqlite3.DatabaseError as error:
+                raise ValueError(f'{path.name} is not a valid backup: {error}') from error
+            if problems != ['ok'] or version > len(LocalProvider._MIGRATIONS):
+                raise ValueError(f'{path.name} is not a valid backup')
+
+            # Saving a snapshot of the current content, none is rotated out
+            LocalProvider.backup(keep=len(LocalProvider.get_backups()) + 1)
+            with LocalProvider._db.exclusive() as connection:
+                source.backup(connection)
+
+        LocalProvider._db.close()
+        with LocalProvider._languages_lock:
+            LocalProvider._languages = None
+        LocalProvider.migrate()
+
+        logging.info('[db] Restored backup %s', path.name)
+        LocalProvider.changes.publish_reload()
+
+    @staticmethod
+    def get_query_stats() -> Dict[str, Tuple[int, float, int, float]]:
+        """
+        Retrieves the statistics collected by the query tracer, enabled with the 'db-tracing' setting.
+
+        Args:
+            None
+
+        Returns:
+            dict mapping each LocalProvider method to a tuple with the number of statements, the total duration, the
+            total number of rows and the longest duration (durations in seconds). Empty if tracing is disabled.
+        """
+
+        if LocalProvider._db.tracer is None:
+            return {}
+        return LocalProvider._db.tracer.get_stats()
@@ -7,6 +7,7 @@ import os
 import tmdbsimple as tmdb
 
 from .. import shared  # type: ignore
+from .http_session import HttpSession
 
 
 class TMDBProvider:
@@ -21,6 +22,7 @@ class TMDBProvider:
         get_languages(): Retrieves all available languages usable with the API
         get_movie(id: int, lang: str): Retrieves general information about a movie.
         get_serie(id: int, lang: str): Retrieves general information about a tv series.
+        get_serie_with_seasons(id: int, lang: str): Retrieves a tv series with the episodes of all its seasons.
         get_season_episodes(id: int, series:int, lang: str): Retrieves information about the episodes in a season.
     """
 
@@ -28,6 +30,10 @@ class TMDBProvider:
         tmdb.API_KEY = shared.schema.get_string('own-tmdb-key')
     else:
         tmdb.API_KEY = os.environ.get('TMDB_KEY')
+    tmdb.REQUESTS_SESSION = HttpSession.session()
+
+    # Most sub-requests the API accepts in append_to_response
+    _APPEND_LIMIT = 20
 
     def __init__(self):
         super().__init__()
@@ -100,6 +106,46 @@ class TMDBProvider:
 
         return tmdb.TV(id).info(language=lang)
 
+    @staticmethod
+    def get_serie_with_seasons(id: int, lang: str | None = None) -> dict:
+        """
+        Retrieves general information about the tv series with the provided id, along with the episodes of all its
+        seasons. Seasons are requested in batches appended to the tv series request, instead of one request each: the
+        first batch guesses the season numbers and is sent with the request of the tv series itself, the seasons it
+        does not cover are requested afterwards.
+        The episodes are added to each season in the result with the 'episodes' key, a season missing from the
+        batched responses, or returned as an error, is left without it.
+
+        Args:
+            id (int): id of the tv series
+            lang (str): the prefered language for the results (optional)
+
+        Returns:
+            dict containg the API result
+        """
+
+        if not lang:
+            lang = shared.schema.get_string('tmdb-lang')
+
+        # Seasons are usually numbered from 0 (specials) onwards
+        guessed = range(TMDBProvider._APPEND_LIMIT)
+        serie = tmdb.TV(id).info(language=lang,
+                                 append_to_response=','.join(f'season/{number}' for number in guessed))
+        appended = {key: serie.pop(key) for key in list(serie) if key.startswith('season/')}
+
+        numbers = [season['season_number'] for season in serie['seasons'] if season['season_number'] not in guessed]
+        for start in range(0, len(numbers), TMDBProvider._APPEND_LIMIT):
+            batch = numbers[start:start + TMDBProvider._APPEND_LIMIT]
+            result = tmdb.TV(id).info(language=lang,
+                                      append_to_response=','.join(f'season/{number}' for number in batch))
+            appended.update({key: value for key, value in result.items() if key.startswith('season/')})
+
+        for season in serie['seasons']:
+            season_result = appended.get(f'season/{season["season_number"]}')
+            if isinstance(season_result, dict) and 'episodes' in season_result:
+                season['episodes'] = season_result['episodes']
+        return serie
+
     @staticmethod
     def get_season_episodes(id: int, season: int, lang: str | None = None) -> dict:
         """
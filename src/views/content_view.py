@@ -3,14 +3,16 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 import logging
+from gettext import gettext as _
 
-from gi.repository import Adw, GObject, Gtk
+from gi.repository import Adw, Gio, GLib, GObject, Gtk
 
 import src.providers.local_provider as local
 
 from .. import shared  # type: ignore
 from ..models.movie_model import MovieModel
 from ..models.series_model import SeriesModel
+from ..models.summary_model import SummaryModel
 from ..pages.details_page import DetailsView
 from ..widgets.poster_button import PosterButton
 
@@ -21,10 +23,11 @@ class ContentView(Adw.Bin):
     This class represents the content grid view.
 
     Properties:
-        None
+        show_facets (bool): whether the facet sidebar is shown
 
     Methods:
         refresh(): Causes the view to update its contents
+        set_search_filter(ids: set or None): Shows only the titles with the provided ids
 
     Signals:
         None
@@ -34,6 +37,7 @@ class ContentView(Adw.Bin):
 
     movie_view = GObject.Property(type=bool, default=True)
     icon_name = GObject.Property(type=str, default='movies')
+    show_facets = GObject.Property(type=bool, default=False)
 
     _stack = Gtk.Template.Child()
     _updating_status_lbl = Gtk.Template.Child()
@@ -44,6 +48,10 @@ class ContentView(Adw.Bin):
     _unwatched_flow_box = Gtk.Template.Child()
     _watched_box = Gtk.Template.Child()
     _watched_flow_box = Gtk.Template.Child()
+    _genre_list = Gtk.Template.Child()
+    _decade_list = Gtk.Template.Child()
+    _language_list = Gtk.Template.Child()
+    _clear_facets_btn = Gtk.Template.Child()
 
     def __init__(self, movie_view: bool):
         super().__init__()
@@ -51,6 +59,13 @@ class ContentView(Adw.Bin):
         self.icon_name = 'movies' if self.movie_view else 'series'
 
         self._stack.set_visible_child_name('loading')
+        self._search_ids = None
+        self._buttons = {}
+        self._load_generation = 0
+        self._pending_updates = []
+        self._facet_filters = {'genre': set(), 'decade': set(), 'language': set()}
+        self._facet_ids = None
+        self._facets_generation = 0
 
         self._load_content(self.movie_view)
 
@@ -63,6 +78,14 @@ class ContentView(Adw.Bin):
         shared.schema.connect('changed::hide-watched',
                               self._on_hide_watched_changed)
 
+        local.LocalProvider.changes.connect('inserted', self._on_titles_changed)
+        local.LocalProvider.changes.connect('updated', self._on_titles_changed)
+        local.LocalProvider.changes.connect('watched-changed', self._on_titles_changed)
+        local.LocalProvider.changes.connect('deleted', self._on_titles_deleted)
+        local.LocalProvider.changes.connect('reloaded', lambda source: self.refresh_view())
+
+        self.connect('notify::show-facets', lambda *args: self._refresh_facets())
+
     def _on_sort_changed(self, pspec: GObject.ParamSpec, user_data: object | None) -> None:
         """
         Callback for the "changed" signal.
@@ -110,7 +133,7 @@ class ContentView(Adw.Bin):
 
     def _load_content(self, movie_view: bool) -> None:
         """
-        For each title currently in the db, creates a PosterButton and adds it to the FlowBox.
+        Loads the titles currently in the db in the background, then creates a PosterButton for each of them.
 
         Args:
             movie_view (bool): if true it will load movies, otherwise it will load series
@@ -119,45 +142,102 @@ class ContentView(Adw.Bin):
             None
         """
 
-        # self._stack.set_visible_child_name('loading')
+        # Results of loads started before the last one are discarded
+        self._load_generation += 1
+        generation = self._load_generation
+
         if movie_view:
-            content = local.LocalProvider.get_all_movies()
+            local.LocalProvider.get_movie_summaries_async(
+                lambda source, result: self._on_content_loaded(result, generation))
         else:
-            content = local.LocalProvider.get_all_series()
+            local.LocalProvider.get_series_summaries_async(
+                lambda source, result: self._on_content_loaded(result, generation))
 
-        if not content:
-            self._stack.set_visible_child_name('empty')
+    def _on_content_loaded(self, result: Gio.AsyncResult, generation: int) -> None:
+        """
+        Callback for the async load of the titles.
+        Creates a PosterButton for each title and adds it to the FlowBox.
+
+        Args:
+            result (Gio.AsyncResult): result of the async load
+            generation (int): load the result belongs to
+
+        Returns:
+            None
+        """
+
+        if generation != self._load_generation:
             return
-        else:
-            self._stack.set_visible_child_name('filled')
 
-        for item in content:
-            logging.debug(
-                f'Created poster button for [{"movie" if self.movie_view else "TV series"}] {item.title}')
-            btn = PosterButton(content=item)
-            btn.connect('clicked', self._on_clicked)
-            if shared.schema.get_boolean('separate-watched'):
-                if item.watched:
-                    self._watched_flow_box.insert(btn, -1)
-                else:
-                    self._unwatched_flow_box.insert(btn, -1)
+        try:
+            content = local.LocalProvider.read_finish(result)
+        except GLib.Error as error:
+            logging.error('Loading content failed: %s', error.message)
+            content = []
+
+        for item in content:  # type: ignore
+            self._add_button(item)
+
+        self._update_visibility()
+        self._refresh_facets()
+
+    def _add_button(self, item: SummaryModel) -> None:
+        """
+        Creates a PosterButton for a title and adds it to the right FlowBox, replacing the existing one if any.
+
+        Args:
+            item (SummaryModel): title to add
+
+        Returns:
+            None
+        """
+
+        logging.debug('Created poster button for [%s] %s', 'movie' if self.movie_view else 'TV series', item.title)
+        self._remove_button(item.id)
+        btn = PosterButton(content=item)
+        btn.connect('clicked', self._on_clicked)
+        if shared.schema.get_boolean('separate-watched'):
+            if item.watched:
+                self._watched_flow_box.insert(btn, -1)
             else:
-                self._flow_box.insert(btn, -1)
+                self._unwatched_flow_box.insert(btn, -1)
+        else:
+            self._flow_box.insert(btn, -1)
+
+        btn.get_parent().set_focusable(False)
+        self._buttons[item.id] = btn
+
+    def _remove_button(self, id: str) -> None:
+        """
+        Removes the PosterButton of a title, if present.
 
-        idx = 0
-        while self._flow_box.get_child_at_index(idx):
-            self._flow_box.get_child_at_index(idx).set_focusable(False)
-            idx += 1
+        Args:
+            id (str): id of the title
+
+        Returns:
+            None
+        """
+
+        btn = self._buttons.pop(id, None)
+        if btn is not None:
+            btn.get_ancestor(Gtk.FlowBox).remove(btn.get_parent())
+
+    def _update_visibility(self) -> None:
+        """
+        Shows the empty page or the FlowBoxes according to the titles present and the current setting.
+
+        Args:
+            None
 
-        idx = 0
-        while self._watched_flow_box.get_child_at_index(idx):
-            self._watched_flow_box.get_child_at_index(idx).set_focusable(False)
-            idx += 1
+        Returns:
+            None
+        """
 
-        idx = 0
-        while self._watched_flow_box.get_child_at_index(idx):
-            self._watched_flow_box.get_child_at_index(idx).set_focusable(False)
-            idx += 1
+        if not self._buttons:
+            self._stack.set_visible_child_name('empty')
+            return
+        else:
+            self._stack.set_visible_child_name('filled')
 
         self._full_box.set_visible(False)
         self._separated_box.set_visible(False)
@@ -173,7 +253,92 @@ class ContentView(Adw.Bin):
         else:
             self._full_box.set_visible(True)
 
-        # self._stack.set_visible_child_name('filled')
+    def _on_titles_changed(self, source: GObject.Object, media_type: str, ids: list) -> None:
+        """
+        Callback for the "inserted", "updated" and "watched-changed" signals of LocalProvider.changes.
+        Loads the changed titles in the background, to replace their PosterButtons leaving the others untouched.
+
+        Args:
+            source (GObject.Object): the ChangeNotifier
+            media_type (str): media type of the changed titles
+            ids (list): ids of the changed titles
+
+        Returns:
+            None
+        """
+
+        if media_type != ('movie' if self.movie_view else 'series'):
+            return
+
+        # Titles deleted while loading are removed from the set, so they are not added back
+        pending = set(ids)
+        self._pending_updates.append(pending)
+        generation = self._load_generation
+
+        if self.movie_view:
+            local.LocalProvider.get_movie_summaries_async(
+                lambda source, result: self._on_titles_loaded(result, generation, pending), ids=ids)
+        else:
+            local.LocalProvider.get_series_summaries_async(
+                lambda source, result: self._on_titles_loaded(result, generation, pending), ids=ids)
+
+    def _on_titles_loaded(self, result: Gio.AsyncResult, generation: int, pending: set) -> None:
+        """
+        Callback for the async load of the changed titles.
+        Replaces their PosterButtons, unless the whole view has been loaded again meanwhile.
+
+        Args:
+            result (Gio.AsyncResult): result of the async load
+            generation (int): load of the view the result belongs to
+            pending (set): ids of the changed titles not deleted meanwhile
+
+        Returns:
+            None
+        """
+
+        self._pending_updates.remove(pending)
+        if generation != self._load_generation:
+            return
+
+        try:
+            content = local.LocalProvider.read_finish(result)
+        except GLib.Error as error:
+            logging.error('Loading changed titles failed: %s', error.message)
+            return
+
+        for id in pending:
+            self._remove_button(id)
+        for item in content:  # type: ignore
+            if item.id in pending:
+                self._add_button(item)
+
+        self._update_visibility()
+        self._refresh_facets()
+
+    def _on_titles_deleted(self, source: GObject.Object, media_type: str, ids: list) -> None:
+        """
+        Callback for the "deleted" signal of LocalProvider.changes.
+        Removes the PosterButtons of the deleted titles.
+
+        Args:
+            source (GObject.Object): the ChangeNotifier
+            media_type (str): media type of the deleted titles
+            ids (list): ids of the deleted titles
+
+        Returns:
+            None
+        """
+
+        if media_type != ('movie' if self.movie_view else 'series'):
+            return
+
+        for id in ids:
+            self._remove_button(id)
+        for pending in self._pending_updates:
+            pending.difference_update(ids)
+
+        self._update_visibility()
+        self._refresh_facets()
 
     def refresh_view(self) -> None:
         """
@@ -191,17 +356,18 @@ class ContentView(Adw.Bin):
         self._flow_box.remove_all()
         self._watched_flow_box.remove_all()
         self._unwatched_flow_box.remove_all()
+        self._buttons.clear()
 
         self._load_content(self.movie_view)
 
-    def _on_clicked(self, source: Gtk.Widget, content: MovieModel | SeriesModel) -> None:
+    def _on_clicked(self, source: Gtk.Widget, content: SummaryModel) -> None:
         """
         Callback for the "clicked" signal.
         Opens the details view for the selected content.
 
         Args:
             source (Gtk.Widget): widget that emited the signal
-            movie (MovieModel): associated movie
+            content (SummaryModel): associated content
 
         Returns:
             None
@@ -210,7 +376,6 @@ class ContentView(Adw.Bin):
         logging.info(
             f'Clicked on [{"movie" if self.movie_view else "TV series"}] {content.title}')
         page = DetailsView(content)
-        page.connect('deleted', lambda *args: self.refresh_view())
         self.get_ancestor(Adw.NavigationView).push(page)
 
     def _set_sorting_function(self) -> None:
@@ -263,7 +428,7 @@ class ContentView(Adw.Bin):
 
     def _set_filter_function(self) -> None:
         """
-        Based on the current setting, sets the filter function of the FlowBox.
+        Based on the current setting and search, sets the filter function of the FlowBoxes.
 
         Args:
             None
@@ -274,7 +439,176 @@ class ContentView(Adw.Bin):
 
         if shared.schema.get_boolean('hide-watched'):
             self._flow_box.set_filter_func(lambda child, user_data: (
-                not child.get_child().content.watched), None)
+                self._matches_filters(child) and not child.get_child().content.watched), None)
         else:
-            self._flow_box.set_filter_func(lambda child, user_data: True, None)
+            self._flow_box.set_filter_func(lambda child, user_data: self._matches_filters(child), None)
+
+        self._watched_flow_box.set_filter_func(lambda child, user_data: self._matches_filters(child), None)
+        self._unwatched_flow_box.set_filter_func(lambda child, user_data: self._matches_filters(child), None)
+
         self._flow_box.invalidate_filter()
+        self._watched_flow_box.invalidate_filter()
+        self._unwatched_flow_box.invalidate_filter()
+
+    def _matches_filters(self, child: Gtk.FlowBoxChild) -> bool:
+        """
+        Checks if the content of a FlowBox child is part of the current search results and matches the selected
+        facets.
+
+        Args:
+            child (Gtk.FlowBoxChild): child to check
+
+        Returns:
+            True if the content matches the active search and facets, False otherwise
+        """
+
+        id = str(child.get_child().content.id)
+        return ((self._search_ids is None or id in self._search_ids) and
+                (self._facet_ids is None or id in self._facet_ids))
+
+    def set_search_filter(self, ids: set | None) -> None:
+        """
+        Shows only the titles with the provided ids, or all titles if ids is None.
+
+        Args:
+            ids (set or None): ids of the titles to show
+
+        Returns:
+            None
+        """
+
+        self._search_ids = ids
+        self._set_filter_function()
+
+    def _refresh_facets(self) -> None:
+        """
+        Reloads the facet counts and the titles matching the selected facets in the background. Nothing is loaded
+        while the sidebar is hidden and no facet is selected.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+
+        if not self.show_facets and not any(self._facet_filters.values()):
+            return
+
+        # Results of loads started before the last one are discarded
+        self._facets_generation += 1
+        generation = self._facets_generation
+
+        filters = {facet: set(values) for facet, values in self._facet_filters.items()}
+        local.LocalProvider.get_facets_async('movie' if self.movie_view else 'series',
+                                             filters,
+                                             lambda source, result: self._on_facets_loaded(result, generation))
+
+    def _on_facets_loaded(self, result: Gio.AsyncResult, generation: int) -> None:
+        """
+        Callback for the async load of the facets.
+        Rebuilds the facet lists and filters the FlowBoxes to show only the matching titles.
+
+        Args:
+            result (Gio.AsyncResult): result of the async load
+            generation (int): load the result belongs to
+
+        Returns:
+            None
+        """
+
+        if generation != self._facets_generation:
+            return
+
+        try:
+            counts, self._facet_ids = local.LocalProvider.read_finish(result)  # type: ignore
+        except GLib.Error as error:
+            logging.error('Loading facets failed: %s', error.message)
+            return
+
+        languages = local.LocalProvider.get_language_registry()
+        for facet, list_box in (('genre', self._genre_list),
+                                ('decade', self._decade_list),
+                                ('language', self._language_list)):
+            values = dict(counts[facet])
+            # Selected values stay visible even when the other facets leave no title for them
+            for value in self._facet_filters[facet]:
+                values.setdefault(value, 0)
+
+            list_box.remove_all()
+            for value, count in values.items():
+                if facet == 'decade':
+                    title = _('{decade}s').format(decade=value)
+                elif facet == 'language':
+                    language = languages.by_code(value)
+                    title = language.name if language else value
+                else:
+                    title = value
+                list_box.append(self._build_facet_row(facet, value, title, count))
+            list_box.set_visible(bool(values))
+
+        self._clear_facets_btn.set_sensitive(any(self._facet_filters.values()))
+        self._set_filter_function()
+
+    def _build_facet_row(self, facet: str, value: str, title: str, count: int) -> Adw.ActionRow:
+        """
+        Creates the row to select a value of a facet.
+
+        Args:
+            facet (str): facet the value belongs to
+            value (str): value of the facet
+            title (str): text to show for the value
+            count (int): number of titles with the value
+
+        Returns:
+            the row
+        """
+
+        check = Gtk.CheckButton(active=value in self._facet_filters[facet], valign=Gtk.Align.CENTER)
+        check.connect('toggled', self._on_facet_toggled, facet, value)
+
+        row = Adw.ActionRow(title=title, activatable_widget=check)
+        row.add_prefix(check)
+        row.add_suffix(Gtk.Label(label=str(count), css_classes=['dim-label']))
+        return row
+
+    def _on_facet_toggled(self, source: Gtk.CheckButton, facet: str, value: str) -> None:
+        """
+        Callback for the "toggled" signal of the facet rows.
+        Updates the selected facets and reloads the facets.
+
+        Args:
+            source (Gtk.CheckButton): the toggled check button
+            facet (str): facet the value belongs to
+            value (str): value of the facet
+
+        Returns:
+            None
+        """
+
+        if source.get_active():
+            self._facet_filters[facet].add(value)
+        else:
+            self._facet_filters[facet].discard(value)
+
+        self._refresh_facets()
+
+    @Gtk.Template.Callback('_on_clear_facets_clicked')
+    def _on_clear_facets_clicked(self, user_data: object | None) -> None:
+        """
+        Callback for the "clicked" signal.
+        Deselects all facets.
+
+        Args:
+            user_data (object or None): additional data passed to the callback
+
+        Returns:
+            None
+        """
+
+        for values in self._facet_filters.values():
+            values.clear()
+
+        self._facet_ids = None
+        self._set_filter_function()
+        self._refresh_facets()
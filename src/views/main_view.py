@@ -2,11 +2,12 @@
 #
 # SPDX-License-Identifier: GPL-3.0-or-later
 import logging
+import sqlite3
 from datetime import datetime, timedelta
 from gettext import gettext as _
 from gettext import pgettext as C_
 
-from gi.repository import Adw, Gio, GObject, Gtk
+from gi.repository import Adw, Gio, GLib, GObject, Gtk
 
 from .. import shared  # type: ignore
 from ..background_queue import (ActivityType, BackgroundActivity,
@@ -29,6 +30,7 @@ class MainView(Adw.Bin):
 
     Methods:
         refresh(): Causes the window to update its contents
+        start_search(): Shows the search bar and focuses it
 
     Signals:
         None
@@ -40,8 +42,19 @@ class MainView(Adw.Bin):
     _menu_btn = Gtk.Template.Child()
     _banner = Gtk.Template.Child()
     _background_indicator = Gtk.Template.Child()
+    _search_btn = Gtk.Template.Child()
+    _facets_btn = Gtk.Template.Child()
+    _search_bar = Gtk.Template.Child()
+    _search_entry = Gtk.Template.Child()
 
     _needs_refresh = ''
+    _jobs_scheduled = False
+
+    # Days between automatic backups and db maintenance runs, and delay between checks for an idle moment
+    _BACKUP_INTERVAL_DAYS = 1
+    _MAINTENANCE_INTERVAL_DAYS = 7
+    _GC_INTERVAL_DAYS = 1
+    _JOBS_DELAY_SECONDS = 120
 
     def __init__(self):
         super().__init__()
@@ -58,6 +71,10 @@ class MainView(Adw.Bin):
                                              'series'
                                              )
 
+        for name in ('movies', 'series'):
+            self._facets_btn.bind_property('active', self._tab_stack.get_child_by_name(name), 'show-facets',
+                                           GObject.BindingFlags.SYNC_CREATE)
+
         shared.schema.bind('win-tab', self._tab_stack,
                            'visible-child-name', Gio.SettingsBindFlags.DEFAULT)
         shared.schema.bind('offline-mode', self._banner,
@@ -69,6 +86,112 @@ class MainView(Adw.Bin):
         # Theme switcher (Adapted from https://gitlab.gnome.org/tijder/blueprintgtk/)
         self._menu_btn.get_popover().add_child(ThemeSwitcher(), 'themeswitcher')
 
+        self._search_bar.connect_entry(self._search_entry)
+        self._search_bar.connect('notify::search-mode-enabled', self._on_search_mode_changed)
+        self._search_generation = 0
+        self._search_cancellable = None
+
+    def start_search(self) -> None:
+        """
+        Shows the search bar and focuses it.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+
+        self._search_bar.set_search_mode(True)
+        self._search_entry.grab_focus()
+
+    def _on_search_mode_changed(self, pspec: GObject.ParamSpec, user_data: object | None) -> None:
+        """
+        Callback for the "notify::search-mode-enabled" signal.
+        Clears the search when the search bar is closed.
+
+        Args:
+            pspec (GObject.ParamSpec): pspec of the changed property
+            user_data (object or None): additional data passed to the callback
+
+        Returns:
+            None
+        """
+
+        if not self._search_bar.get_search_mode():
+            self._search_entry.set_text('')
+
+    @Gtk.Template.Callback('_on_search_changed')
+    def _on_search_changed(self, user_data: object | None) -> None:
+        """
+        Callback for the "search-changed" signal.
+        Searches the library on the reader thread, cancelling the search of the previous query if still running.
+
+        Args:
+            user_data (object or None): additional data passed to the callback
+
+        Returns:
+            None
+        """
+
+        self._search_generation += 1
+        generation = self._search_generation
+        if self._search_cancellable:
+            self._search_cancellable.cancel()
+            self._search_cancellable = None
+
+        query = self._search_entry.get_text().strip()
+        if not query:
+            self._apply_search(None)
+            return
+
+        self._search_cancellable = Gio.Cancellable()
+        local.search_library_async(query,
+                                   lambda source, result: self._on_search_done(result, query, generation),
+                                   self._search_cancellable)
+
+    def _on_search_done(self, result: Gio.AsyncResult, query: str, generation: int) -> None:
+        """
+        Callback for the async search of the library.
+        Applies the results, unless the query has changed meanwhile.
+
+        Args:
+            result (Gio.AsyncResult): result of the async search
+            query (str): the searched text
+            generation (int): search the result belongs to
+
+        Returns:
+            None
+        """
+
+        if generation != self._search_generation:
+            return
+        self._search_cancellable = None
+
+        try:
+            results = local.read_finish(result)
+        except GLib.Error as error:
+            logging.error('Search %r failed: %s', query, error.message)
+            results = []
+
+        logging.debug(f'Search {query!r}: {len(results)}')
+        self._apply_search(results)
+
+    def _apply_search(self, results: list | None) -> None:
+        """
+        Filters both tabs to show only the titles matching a search.
+
+        Args:
+            results (list or None): media types and ids of the matching titles, None to show all titles
+
+        Returns:
+            None
+        """
+
+        for name, media_type in (('movies', 'movie'), ('series', 'series')):
+            ids = None if results is None else {id for kind, id in results if kind == media_type}
+            self._tab_stack.get_child_by_name(name).set_search_filter(ids)
+
     def _check_needs_refresh(self, pspec: GObject.ParamSpec, user_data: object | None) -> None:
         """
         Checks if the tab switched to is pending a refresh and does it if needed.
@@ -105,6 +228,10 @@ class MainView(Adw.Bin):
         if not shared.schema.get_boolean('first-run'):
             self._check_update_content()
 
+            if not self._jobs_scheduled:
+                self._jobs_scheduled = True
+                GLib.timeout_add_seconds(self._JOBS_DELAY_SECONDS, self._check_scheduled_jobs)
+
     def _check_update_content(self) -> None:
         """
         Checks if a content update is due, triggering it by adding background activities, if necessary.
@@ -161,6 +288,139 @@ class MainView(Adw.Bin):
         shared.schema.set_string(
             'last-update', datetime.now().strftime('%Y-%m-%d'))
 
+    def _check_scheduled_jobs(self) -> bool:
+        """
+        Checks if a backup, a db maintenance or a collection of unused files is due, starting it with a background
+        activity once no other activity is running. Only one job is started at a time, the others are started by later
+        checks.
+
+        Args:
+            None
+
+        Returns:
+            True to check again later if a job is still due, False otherwise
+        """
+
+        jobs = [
+            ('last-backup', self._BACKUP_INTERVAL_DAYS,
+             C_('Background activity title', 'Automatic backup'), self._run_backup, self._on_backup_done),
+            ('last-maintenance', self._MAINTENANCE_INTERVAL_DAYS,
+             C_('Background activity title', 'Automatic maintenance'), self._run_maintenance,
+             self._on_maintenance_done),
+            ('last-gc', self._GC_INTERVAL_DAYS,
+             C_('Background activity title', 'Clean up unused files'), self._collect_garbage,
+             self._on_collect_garbage_done),
+        ]
+        due = [job for job in jobs
+               if datetime.fromisoformat(shared.schema.get_string(job[0])) + timedelta(days=job[1]) <= datetime.now()]
+
+        if not due:
+            return GLib.SOURCE_REMOVE
+
+        if any(not activity.completed for activity in BackgroundQueue.get_queue()):
+            logging.debug('Scheduled jobs due, waiting for the running activities')
+            return GLib.SOURCE_CONTINUE
+
+        key, interval, title, task_function, on_done = due[0]
+        logging.info('Starting scheduled job %s...', key)
+        shared.schema.set_string(key, datetime.now().strftime('%Y-%m-%d'))
+        BackgroundQueue.add(
+            activity=BackgroundActivity(
+                activity_type=ActivityType.UPDATE,
+                title=title,
+                task_function=task_function),
+            on_done=on_done)
+        return GLib.SOURCE_CONTINUE if len(due) > 1 else GLib.SOURCE_REMOVE
+
+    def _run_backup(self, activity: BackgroundActivity) -> None:
+        """
+        Saves a backup of the db.
+
+        Args:
+            activity (BackgroundActivity): the calling activity
+
+        Returns:
+            None
+        """
+
+        self._backup_failed = False
+        try:
+            local.backup(keep=shared.schema.get_int('backup-keep'))
+        except (OSError, sqlite3.Error) as error:
+            logging.error('Automatic backup failed: %s', error)
+            self._backup_failed = True
+
+    def _on_backup_done(self,
+                        source: GObject.Object,
+                        result: Gio.AsyncResult,
+                        cancellable: Gio.Cancellable,
+                        activity: BackgroundActivity):
+        """Callback to complete async activity"""
+
+        logging.info('Automatic backup done')
+        if self._backup_failed:
+            activity.error()
+        activity.end()
+
+    def _run_maintenance(self, activity: BackgroundActivity) -> None:
+        """
+        Runs the db maintenance.
+
+        Args:
+            activity (BackgroundActivity): the calling activity
+
+        Returns:
+            None
+        """
+
+        try:
+            self._maintenance_report = local.run_maintenance()
+        except (OSError, sqlite3.Error) as error:
+            logging.error('Automatic maintenance failed: %s', error)
+            self._maintenance_report = None
+
+    def _on_maintenance_done(self,
+                             source: GObject.Object,
+                             result: Gio.AsyncResult,
+                             cancellable: Gio.Cancellable,
+                             activity: BackgroundActivity):
+        """Callback to complete async activity"""
+
+        logging.info('Automatic maintenance done')
+        if self._maintenance_report is None or not self._maintenance_report['integrity_ok']:
+            activity.error()
+        activity.end()
+
+    def _collect_garbage(self, activity: BackgroundActivity) -> None:
+        """
+        Empties the trash and removes the files no longer used by the library.
+
+        Args:
+            activity (BackgroundActivity): the calling activity
+
+        Returns:
+            None
+        """
+
+        self._garbage_failed = False
+        try:
+            local.collect_garbage()
+        except (OSError, sqlite3.Error) as error:
+            logging.error('Automatic clean up failed: %s', error)
+            self._garbage_failed = True
+
+    def _on_collect_garbage_done(self,
+                                 source: GObject.Object,
+                                 result: Gio.AsyncResult,
+                                 cancellable: Gio.Cancellable,
+                                 activity: BackgroundActivity):
+        """Callback to complete async activity"""
+
+        logging.info('Automatic clean up done')
+        if self._garbage_failed:
+            activity.error()
+        activity.end()
+
     def _update_content(self, activity: BackgroundActivity) -> None:
         """
         Performs a content update on content added from TMDB.
@@ -185,8 +445,8 @@ class MainView(Adw.Bin):
         if series:
             for serie in series:    # type: ignore
                 if not serie.manual:
-                    new_serie = SeriesModel(tmdb.get_serie(serie.id))
-                    local.update_series(old=serie,serie=new_serie)
+                    new_serie = SeriesModel(tmdb.get_serie_with_seasons(serie.id))
+                    local.update_series(old=serie, new=new_serie)
 
     def _on_update_done(self,
                         source: GObject.Object,
@@ -195,7 +455,6 @@ class MainView(Adw.Bin):
                         activity: BackgroundActivity):
         """Callback to complete async activity"""
 
-        self.refresh()
         logging.info('Automatic update done')
         activity.end()
 
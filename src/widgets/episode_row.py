@@ -2,10 +2,11 @@
 #
 # SPDX-License-Identifier: GPL-3.0-or-later
 
+import logging
 from gettext import gettext as _
 from gettext import pgettext as C_
 
-from gi.repository import Adw, Gio, GObject, Gtk
+from gi.repository import Adw, Gio, GLib, GObject, Gtk
 
 import src.dialogs.edit_season_dialog as dialog
 
@@ -103,19 +104,35 @@ class EpisodeRow(Adw.PreferencesRow):
             None
         """
 
-        if not self.editable and self.show_controls:
-            self.watched = local.get_episode_by_id(self.id).watched  # type: ignore
-
         self._still_picture.set_file(Gio.File.new_for_uri(self.still_uri))
         self._title_lbl.set_text(f'{self.episode_number}. {self.title}')
         self._runtime_lbl.set_text(self._format_runtime(self.runtime))
+        self.set_watched_btn(self.watched)
 
-        if self.watched:
-            self._watched_btn.set_label(_('Watched'))
-            self._watched_btn.set_icon_name('check-plain')
-        else:
-            self._watched_btn.set_label(_('Mark as Watched'))
-            self._watched_btn.set_icon_name('watchlist')
+        if not self.editable and self.show_controls:
+            local.get_episode_by_id_async(self.id, self._on_episode_loaded)
+
+    def _on_episode_loaded(self, source: GObject.Object | None, result: Gio.AsyncResult) -> None:
+        """
+        Callback for the async load of the episode.
+        Updates the watched button with the status stored in the db.
+
+        Args:
+            source (GObject.Object or None): object that started the async operation
+            result (Gio.AsyncResult): result of the async load
+
+        Returns:
+            None
+        """
+
+        try:
+            episode = local.read_finish(result)
+        except GLib.Error as error:
+            logging.error('Loading episode %s failed: %s', self.id, error.message)
+            return
+
+        if episode is not None:
+            self.set_watched_btn(episode.watched)  # type: ignore
 
     @Gtk.Template.Callback('_on_watched_btn_clicked')
     def _on_watched_btn_clicked(self, user_data: object | None) -> None:
@@ -278,7 +295,7 @@ class EpisodeRow(Adw.PreferencesRow):
 
     def set_watched_btn(self, watched: bool) -> None:
         """
-        Updates the watched button label and icon.
+        Updates the watched status, and the button label and icon accordingly.
 
         Args:
             watched (bool): status to set
@@ -287,6 +304,7 @@ class EpisodeRow(Adw.PreferencesRow):
             None
         """
 
+        self.watched = watched
         if watched:
             self._watched_btn.set_label(_('Watched'))
             self._watched_btn.set_icon_name('check-plain')
@@ -7,6 +7,7 @@ from gi.repository import Gio, GObject, Gtk
 from .. import shared  # type: ignore
 from ..models.movie_model import MovieModel
 from ..models.series_model import SeriesModel
+from ..models.summary_model import SummaryModel
 
 
 @Gtk.Template(resource_path=shared.PREFIX + '/ui/widgets/poster_button.ui')
@@ -24,7 +25,7 @@ class PosterButton(Gtk.Box):
         None
 
     Signals:
-        clicked(content: MovieModel or SeriesModel): emited when the user clicks on the widget
+        clicked(content: MovieModel, SeriesModel or SummaryModel): emited when the user clicks on the widget
     """
 
     __gtype_name__ = 'PosterButton'
@@ -46,7 +47,7 @@ class PosterButton(Gtk.Box):
         'clicked': (GObject.SIGNAL_RUN_FIRST, None, (object,)),
     }
 
-    def __init__(self, content: MovieModel | SeriesModel):
+    def __init__(self, content: MovieModel | SeriesModel | SummaryModel):
         super().__init__()
         self.title = content.title
         self.year = content.release_date[0:4]
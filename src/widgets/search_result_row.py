@@ -2,17 +2,16 @@
 #
 # SPDX-License-Identifier: GPL-3.0-or-later
 
-import glob
 import logging
 from gettext import gettext as _
 from gettext import pgettext as C_
 
-import requests
 from gi.repository import Adw, Gio, GLib, GObject, Gtk
 
 from .. import shared  # type: ignore
 from ..background_queue import (ActivityType, BackgroundActivity,
                                 BackgroundQueue)
+from ..providers.image_store import ImageStore
 from ..providers.local_provider import LocalProvider as local
 
 
@@ -87,16 +86,37 @@ class SearchResultRow(Gtk.ListBoxRow):
 
     def _check_in_db(self) -> None:
         """
-        Checks if the content is already in db and disables the 'add' button.
+        Checks in the background if the content is already in db.
 
         Args:
-            thread_data (object or None): data passed to the thread
+            None
+
+        Returns:
+            None
+        """
+
+        local.contains_async(self.tmdb_id, self.media_type, self._on_check_in_db_done)
+
+    def _on_check_in_db_done(self, source: GObject.Object | None, result: Gio.AsyncResult) -> None:
+        """
+        Callback for the async check of the content in db.
+        Disables the 'add' button if the content is already in db.
+
+        Args:
+            source (GObject.Object or None): object that started the async operation
+            result (Gio.AsyncResult): result of the async check
 
         Returns:
             None
         """
 
-        if local.get_movie_by_id(self.tmdb_id) or local.get_series_by_id(self.tmdb_id):
+        try:
+            in_db = local.read_finish(result)
+        except GLib.Error as error:
+            logging.error('Checking %s in db failed: %s', self.tmdb_id, error.message)
+            return
+
+        if in_db:
             self._add_btn.set_label(_('Already in your watchlist'))
             self._add_btn.set_icon_name('check-plain')
             self._add_btn.set_sensitive(False)
@@ -192,8 +212,6 @@ class SearchResultRow(Gtk.ListBoxRow):
         self._add_btn.set_label(_('Already in your watchlist'))
         self._add_btn.set_icon_name('check-plain')
         self._add_spinner.set_visible(False)
-        self.get_ancestor(Adw.Window).get_transient_for(
-        ).activate_action('win.refresh', None)
         activity.end()
 
     def _get_poster_thread(self, task: Gio.Task, source_object: GObject.Object, task_data: object | None,
@@ -227,21 +245,11 @@ class SearchResultRow(Gtk.ListBoxRow):
             Gio.File containing the poster
         """
 
-        files = glob.glob(
-            f'{self.poster_path[1:-4]}.jpg', root_dir=shared.cache_dir)
-        if files:
-            logging.debug(
-                f'{self.poster_path}, cache hit: {shared.cache_dir}/{files[0]}')
-            return Gio.File.new_for_path(f'{shared.cache_dir}/{files[0]}')
-        else:
-            url = f'https://image.tmdb.org/t/p/w500{self.poster_path}'
-            r = requests.get(url)
-            if r.status_code == 200:
-                with open(f'{shared.cache_dir}{self.poster_path}', 'wb') as f:
-                    f.write(r.content)
-            logging.debug(
-                f'{self.poster_path}, downloaded to {shared.cache_dir}{self.poster_path}')
-            return Gio.File.new_for_path(f'{shared.cache_dir}{self.poster_path}')
+        uri = ImageStore.fetch(shared.cache_dir, self.poster_path)
+        logging.debug(f'{self.poster_path}, cached as {uri}')
+        if uri:
+            return Gio.File.new_for_uri(uri)
+        return Gio.File.new_for_path(f'{shared.cache_dir}{self.poster_path}')
 
     def _get_poster_file_finish(self, result: Gio.AsyncResult, caller: GObject.Object) -> int | Gio.File:
         """
@@ -14,6 +14,8 @@ from . import shared  # type: ignore
 from .background_queue import BackgroundQueue
 from .dialogs.add_manual_dialog import AddManualDialog
 from .dialogs.add_tmdb_dialog import AddTMDBDialog
+from .providers.image_store import ImageStore
+from .providers.local_provider import LocalProvider as local
 from .views.first_run_view import FirstRunView
 from .views.main_view import MainView
 
@@ -115,6 +117,22 @@ class TicketboothWindow(Adw.ApplicationWindow):
         source._win_stack.get_child_by_name(
             'main')._background_indicator.refresh()
 
+    def _search(self, new_state: None, source: Gtk.Widget) -> None:
+        """
+        Callback for the win.search action
+
+        Args:
+            new_state (None): stateless action, always None
+            source (Gtk.Widget): widget that caused the activation
+
+        Returns:
+            None
+        """
+
+        main_view = source._win_stack.get_child_by_name('main')
+        if main_view:
+            main_view.start_search()
+
     def _unwatched_first_changed(self, new_state: GLib.Variant, source: Gtk.Widget) -> None:
         """
         Callback for the win.unwatched-first action
@@ -173,6 +191,7 @@ class TicketboothWindow(Adw.ApplicationWindow):
         ('add-tmdb', _add_tmdb),
         ('add-manual', _add_manual),
         ('refresh', _refresh),
+        ('search', _search),
         ('update-backgroud-indicator', _update_background_indicator)
     }
 
@@ -224,8 +243,11 @@ class TicketboothWindow(Adw.ApplicationWindow):
             files = glob.glob('*.jpg', root_dir=shared.cache_dir)
             for file in files:
                 os.remove(shared.cache_dir / file)
+            ImageStore.forget(shared.cache_dir)
             logging.info('Cache deleted')
 
+        local.close()
+
         logging.info('Closing')
         return False
 
@@ -245,6 +267,7 @@ class TicketboothWindow(Adw.ApplicationWindow):
         logging.info(f'is first run: {is_first_run}')
 
         if not is_first_run:
+            local.create_tables()
             self._win_stack.add_named(child=MainView(), name='main')
             self._win_stack.set_visible_child_name('main')
             return